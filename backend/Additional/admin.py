@@ -1,8 +1,6 @@
-def request_admin_approval(current_bus, nearby_bus, action):
-    if action == "reallocate":
-        print(f"Requesting admin approval to reallocate students from Bus {current_bus['id']} to Bus {nearby_bus['id']}.")  # Corrected key names
-    elif action == "combine":
-        print(f"Requesting admin approval to combine Bus {current_bus['id']} with Bus {nearby_bus['id']}.")  # Corrected key names
-    
-    admin_approval = input(f"Does the admin approve the {action} action? (yes/no): ").lower()
-    return admin_approval == "yes"
+import os
+import sys
+
+# The approval prompt is shared with main.py, in backend/allocation
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from allocation import prompt_admin as request_admin_approval
@@ -1,16 +1,14 @@
 import json
-import pyttsx3
 import os
+import sys
 
-# Initialize the text-to-speech engine
-engine = pyttsx3.init()
+# Bus records are defined in backend/fleet.py, notifiers in backend/allocation
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from allocation import SpeechNotifier
+from fleet import Bus
 
-# Set the voice (optional)
-voices = engine.getProperty('voices')
-if len(voices) > 1:
-    engine.setProperty('voice', voices[1].id)  # Use second voice if available
-else:
-    engine.setProperty('voice', voices[0].id)
+# Reads notifications aloud; the text-to-speech engine starts on first use (needs an audio stack)
+speech = SpeechNotifier()
 
 def load_bus_data(filepath):
     # Get the directory of the current script
@@ -18,20 +16,17 @@ def load_bus_data(filepath):
     full_path = os.path.join(current_dir, filepath)
     
     with open(full_path, 'r') as file:
-        buses = json.load(file)
+        buses = [Bus.from_dict(bus) for bus in json.load(file)]
     return buses
 
 def speak(text):
     """
     This function converts text to speech using pyttsx3.
     """
-    engine.say(text)
-    engine.runAndWait()
+    speech.speak(text)
 
 def notify_driver(driver, message):
     """
     This function sends a notification to the driver and speaks the message aloud.
     """
-    print(f"Notification to {driver}: {message}")
-    speak(f"Notification for {driver}. {message}")
-
+    speech.notify(driver, None, message)
@@ -0,0 +1,9 @@
+# Allocation engine shared by every entry point: the Flask and ASGI apps, the CLI
+# in main.py, zone sweeps, the simulation and the scripts in Additional/. The
+# search and decision logic lives in engine.py once; entry points differ only in
+# the distance provider, notifier and approval strategy they plug in.
+
+from allocation.approval import approve_all, approve_none, get_approval_policy, max_distance_policy, prompt_admin
+from allocation.distances import DistanceMatrixDistances, FallbackDistances, ManhattanDistances, StraightLineDistances
+from allocation.engine import AllocationEngine, driver_notifications, get_allocator, select_nearby_bus, suggested_action
+from allocation.notifiers import SpeechNotifier, TwilioNotifier
@@ -0,0 +1,42 @@
+# Approval strategies decide whether a suggested action goes ahead. Each is called
+# as approve(current_bus, nearby_bus, action, distance) with the action name from
+# policy.py ('Reallocation' or 'Combination') and the distance in meters, and
+# returns True to notify the drivers. The web app has none: its suggestions wait
+# in the dashboard for an admin.
+
+# How the interactive prompt names each action
+ACTION_VERBS = {'Reallocation': "reallocate", 'Combination': "combine"}
+
+def prompt_admin(current_bus, nearby_bus, action, distance=None):
+    verb = ACTION_VERBS.get(action, action)
+    if verb == "reallocate":
+        print(f"Requesting admin approval to reallocate students from Bus {current_bus.id} to Bus {nearby_bus.id}.")
+    elif verb == "combine":
+        print(f"Requesting admin approval to combine Bus {current_bus.id} with Bus {nearby_bus.id}.")
+
+    admin_approval = input(f"Does the admin approve the {verb} action? (yes/no): ").lower()
+    return admin_approval == "yes"
+
+def approve_all(current_bus, nearby_bus, action, distance):
+    return True
+
+def approve_none(current_bus, nearby_bus, action, distance):
+    return False
+
+def max_distance_policy(max_distance):
+    def approve_within_distance(current_bus, nearby_bus, action, distance):
+        return distance <= max_distance
+    return approve_within_distance
+
+def get_approval_policy(name, max_distance=None):
+    if name == 'all':
+        return approve_all
+    if name == 'none':
+        return approve_none
+    if name == 'max-distance':
+        if max_distance is None:
+            raise ValueError("--max-distance is required with --policy max-distance")
+        return max_distance_policy(max_distance)
+    if name == 'prompt':
+        return prompt_admin
+    raise ValueError(f"Unknown approval policy: {name}")
@@ -0,0 +1,191 @@
+import math
+import os
+
+from rate_limit import SWEEP, maps_limiter
+
+# Distance providers for the allocation engine. A provider is called as
+# provider(current_bus, buses, priority) and returns the meters from the current
+# bus to every other bus, in list order, or None if it has no answer. A provider
+# with a nearest_first(current_bus, buses) method also does the ranking itself.
+
+# Google Maps API key
+GOOGLE_MAPS_API_KEY = os.getenv('GOOGLE_MAPS_API_KEY')
+
+# Distance Matrix endpoint (overridable so sweeps can run against fake_services.py)
+DISTANCE_MATRIX_URL = os.getenv('DISTANCE_MATRIX_URL', 'https://maps.googleapis.com/maps/api/distancematrix/json')
+
+EARTH_RADIUS_METERS = 6371000
+
+# Approximate meters per degree of latitude, for the Manhattan fallback
+METERS_PER_DEGREE = 111000
+
+# Neighbours sorted up front per lookup; the rest are only sorted if a search gets past them
+NEAREST_FIRST_BATCH = 32
+
+class DistanceMatrixDistances:
+    """
+    Road distances from the Google Distance Matrix API. Requests go through the
+    shared Distance Matrix rate limiter (see rate_limit.py) and reuse one HTTP
+    session. params() and parse() are shared with the async client in async_app.py.
+    """
+    def __init__(self, api_key=GOOGLE_MAPS_API_KEY, url=DISTANCE_MATRIX_URL, limiter=maps_limiter):
+        self.api_key = api_key
+        self.url = url
+        self.limiter = limiter
+        self.session = None
+
+    def get_session(self):
+        if self.session is None:
+            import requests
+            self.session = requests.Session()
+        return self.session
+
+    def params(self, current_bus, buses):
+        return {
+            'origins': f"{current_bus.latitude},{current_bus.longitude}",
+            'destinations': "|".join([f"{bus.latitude},{bus.longitude}" for bus in buses if bus.id != current_bus.id]),
+            'key': self.api_key,
+        }
+
+    def parse(self, data, buses):
+        """
+        This function pulls the distances out of a Distance Matrix response, or
+        returns None if the response does not cover every other bus.
+        """
+        if 'rows' in data and data['rows']:
+            elements = data['rows'][0]['elements']
+            if len(elements) != len(buses) - 1:
+                print("Error: Mismatch between number of buses in Excel and distance elements")
+                return None
+            return [element['distance']['value'] for element in elements]
+        print("Error: 'rows' not found in API response")
+        return None
+
+    def __call__(self, current_bus, buses, priority=SWEEP):
+        import requests
+
+        if not self.api_key:
+            print("Error: GOOGLE_MAPS_API_KEY not found in environment variables")
+            return None
+
+        try:
+            if not self.limiter.acquire(priority):
+                print("Error: still waiting for the Distance Matrix rate limit, giving up")
+                return None
+            response = self.get_session().get(self.url, params=self.params(current_bus, buses))
+            response.raise_for_status()
+            return self.parse(response.json(), buses)
+        except requests.exceptions.RequestException as e:
+            print(f"Error making API request: {e}")
+            return None
+        except (KeyError, ValueError) as e:
+            print(f"Error processing API response: {e}")
+            return None
+
+class ManhattanDistances:
+    """
+    Offline estimate: the latitude and longitude differences added up and
+    converted to meters. Needs no API key, so it is the fallback provider.
+    """
+    def __call__(self, current_bus, buses, priority=SWEEP):
+        return [
+            (abs(bus.latitude - current_bus.latitude) + abs(bus.longitude - current_bus.longitude)) * METERS_PER_DEGREE
+            for bus in buses if bus.id != current_bus.id
+        ]
+
+class FallbackDistances:
+    """
+    Asks each provider in turn and returns the first answer.
+    """
+    def __init__(self, *providers):
+        self.providers = providers
+
+    def __call__(self, current_bus, buses, priority=SWEEP):
+        for provider in self.providers:
+            distances = provider(current_bus, buses, priority)
+            if distances is not None:
+                return distances
+        return None
+
+class StraightLineDistances:
+    """
+    Great-circle meters between the buses of one snapshot, as used by the
+    simulation. Coordinates are converted once per snapshot, so each lookup is one
+    vectorized pass (or a plain loop without numpy). nearest_first() lets the
+    engine skip sorting the whole fleet for every bus.
+    """
+    def __init__(self):
+        from policy import get_numpy
+
+        self.np = get_numpy()
+        self.buses = None
+        self.index = {}
+
+    def set_positions(self, buses):
+        np = self.np
+        self.buses = buses
+        self.index = {bus.id: i for i, bus in enumerate(buses)}
+        lats = [math.radians(bus.latitude) for bus in buses]
+        lngs = [math.radians(bus.longitude) for bus in buses]
+        if np is not None:
+            self.lats, self.lngs = np.array(lats), np.array(lngs)
+            self.cos_lats = np.cos(self.lats)
+        else:
+            self.lats, self.lngs = lats, lngs
+            self.cos_lats = [math.cos(lat) for lat in lats]
+
+    def from_point(self, latitude, longitude):
+        np = self.np
+        lat, lng = math.radians(latitude), math.radians(longitude)
+        if np is not None:
+            a = np.sin((self.lats - lat) / 2) ** 2 + math.cos(lat) * self.cos_lats * np.sin((self.lngs - lng) / 2) ** 2
+            return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(a))
+        cos_lat = math.cos(lat)
+        return [
+            2 * EARTH_RADIUS_METERS * math.asin(math.sqrt(
+                math.sin((lat2 - lat) / 2) ** 2 + cos_lat * cos_lat2 * math.sin((lng2 - lng) / 2) ** 2
+            ))
+            for lat2, lng2, cos_lat2 in zip(self.lats, self.lngs, self.cos_lats)
+        ]
+
+    def nearest(self, latitude, longitude):
+        distances = self.from_point(latitude, longitude)
+        if self.np is not None:
+            return self.buses[int(self.np.argmin(distances))]
+        return self.buses[min(range(len(distances)), key=distances.__getitem__)]
+
+    def nearest_first(self, current_bus, buses):
+        """
+        This function yields (distance, bus) for the other buses, nearest first.
+        """
+        np = self.np
+        if buses is not self.buses:
+            self.set_positions(buses)
+        i = self.index[current_bus.id]
+        distances = self.from_point(current_bus.latitude, current_bus.longitude)
+        if np is None:
+            for distance, j in sorted((distance, j) for j, distance in enumerate(distances) if j != i):
+                yield distance, buses[j]
+            return
+
+        distances[i] = np.inf
+        batch = min(NEAREST_FIRST_BATCH, len(distances) - 1)
+        if batch <= 0:
+            return
+        head = np.argpartition(distances, batch - 1)[:batch]
+        head = head[np.argsort(distances[head], kind='stable')]
+        for j in head.tolist():
+            yield float(distances[j]), buses[j]
+        seen = set(head.tolist())
+        for j in np.argsort(distances, kind='stable').tolist():
+            if j != i and j not in seen:
+                yield float(distances[j]), buses[j]
+
+    def __call__(self, current_bus, buses, priority=SWEEP):
+        if buses is not self.buses:
+            self.set_positions(buses)
+        i = self.index[current_bus.id]
+        distances = self.from_point(current_bus.latitude, current_bus.longitude)
+        if self.np is not None:
+            return self.np.delete(distances, i).tolist()
+        return distances[:i] + distances[i + 1:]
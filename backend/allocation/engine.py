@@ -0,0 +1,262 @@
+from policy import COMBINATION, REALLOCATION, get_policy
+from rate_limit import ADMIN, SWEEP
+from reservations import NeighbourCache, SeatLedger, action_key, reserve_nearby_bus
+
+from allocation.distances import DistanceMatrixDistances
+from allocation.notifiers import TwilioNotifier
+
+# What is printed when a flagged bus is searched, and when nothing suitable is found
+SEARCH_MESSAGES = {
+    REALLOCATION: (
+        "Bus {} is full. Looking for nearby bus...",
+        "No nearby bus with available seats found or unable to fetch nearby bus information.",
+    ),
+    COMBINATION: (
+        "Bus {} has low attendance. Looking for nearby bus to combine...",
+        "No suitable nearby bus found for combining or unable to fetch nearby bus information.",
+    ),
+}
+
+# Engine used by the web app and the zone sweep workers, created on first use
+default_allocator = None
+
+def select_nearby_bus(current_bus, buses, distances, find_empty, rule=None):
+    """
+    This function picks the nearest other bus that can take the current bus's
+    overflow (find_empty) or all of its students. distances are in list order
+    without the current bus. rule is the current bus's policy.BusRule: candidates
+    past its maximum detour or of an incompatible bus type are skipped.
+    """
+    min_distance = float('inf')
+    selected_bus = None
+
+    # Create a list of buses excluding the current bus
+    other_buses = [bus for bus in buses if bus.id != current_bus.id]
+
+    for idx, bus in enumerate(other_buses):
+        if idx >= len(distances):
+            print("Warning: Distance data is missing for some buses in Excel.")
+            continue
+        if rule is not None and not rule.accepts(bus, distances[idx]):
+            continue
+
+        if find_empty:
+            available_seats = bus.seatingCapacity - bus.currentAttendance
+            if available_seats > 0 and distances[idx] < min_distance:
+                min_distance = distances[idx]
+                selected_bus = bus
+        else:
+            combined_attendance = current_bus.currentAttendance + bus.currentAttendance
+            if combined_attendance <= max(current_bus.seatingCapacity, bus.seatingCapacity) and distances[idx] < min_distance:
+                min_distance = distances[idx]
+                selected_bus = bus
+
+    return selected_bus, min_distance
+
+def suggested_action(action, current_bus, nearby_bus, distance, reserved_seats=None):
+    """
+    This function returns a suggestion in the shape the dashboard lists as a
+    pending action.
+    """
+    if action == REALLOCATION:
+        message = f"Reallocate students from Bus {current_bus.id} to Bus {nearby_bus.id}."
+    else:
+        message = f"Combine Bus {current_bus.id} with Bus {nearby_bus.id}."
+    suggestion = {
+        'current_bus_id': current_bus.id,
+        'nearby_bus_id': nearby_bus.id,
+        'action': action,
+        'message': message,
+    }
+    if reserved_seats is not None:
+        suggestion['reserved_seats'] = reserved_seats
+    suggestion['distance'] = distance
+    suggestion['current_bus_details'] = current_bus
+    suggestion['nearby_bus_details'] = nearby_bus
+    return suggestion
+
+def driver_notifications(action, current_bus, nearby_bus):
+    """
+    This function returns the (driver, phone, message) calls for an approved action.
+    """
+    if action == REALLOCATION:
+        return [
+            (current_bus.driver, current_bus.phone, f"Your bus is full. Students will be allocated to Bus {nearby_bus.id}."),
+            (nearby_bus.driver, nearby_bus.phone, f"Please pick up additional students from Bus {current_bus.id}."),
+        ]
+    elif action == COMBINATION:
+        return [
+            (current_bus.driver, current_bus.phone, f"Your bus will be combined with Bus {nearby_bus.id}. Please proceed to the designated meeting point."),
+            (nearby_bus.driver, nearby_bus.phone, f"Your bus will be combined with Bus {current_bus.id}. Please proceed to the designated meeting point."),
+        ]
+    return []
+
+class AllocationEngine:
+    """
+    Finds a nearby bus for every bus the allocation policy flags and carries the
+    decision through to the drivers. Where distances come from, how drivers are
+    told and who approves are plugged in:
+
+    distances -- a provider from allocation.distances (Distance Matrix by default)
+    notifier  -- a notifier from allocation.notifiers (Twilio calls by default)
+    approve   -- a strategy from allocation.approval; None leaves decisions to an
+                 admin (the web app lists suggestions as pending actions)
+    policy    -- a compiled policy.Policy; None follows the policy file
+    """
+    def __init__(self, distances=None, notifier=None, approve=None, policy=None):
+        self.distances = distances if distances is not None else DistanceMatrixDistances()
+        self.notifier = notifier if notifier is not None else TwilioNotifier()
+        self.approve = approve
+        self.policy = policy
+        # Seats held by suggested actions, and cached nearest-first neighbour lists (see reservations.py)
+        self.seat_ledger = SeatLedger()
+        self.neighbour_cache = NeighbourCache()
+
+    def evaluate(self, buses, now=None):
+        policy = self.policy if self.policy is not None else get_policy()
+        return policy.evaluate(buses, now)
+
+    def fetch_distances(self, current_bus, buses, priority=SWEEP):
+        return self.distances(current_bus, buses, priority)
+
+    def find_nearby_bus(self, current_bus, buses, find_empty=True, priority=SWEEP, rule=None):
+        distances = self.fetch_distances(current_bus, buses, priority)
+        if distances is None:
+            return None, float('inf')
+        return select_nearby_bus(current_bus, buses, distances, find_empty, rule)
+
+    def rank_nearby_buses(self, current_bus, buses, priority=SWEEP):
+        """
+        This function returns [(distance, bus), ...] for the other buses, nearest
+        first. The ranking is cached per bus, so retries reuse it instead of asking
+        the provider again; attendance always comes from the buses passed in.
+        """
+        nearest_first = getattr(self.distances, 'nearest_first', None)
+        if nearest_first is not None:
+            return nearest_first(current_bus, buses)
+
+        ranked = self.neighbour_cache.get(current_bus.id)
+        if ranked is None:
+            distances = self.fetch_distances(current_bus, buses, priority)
+            if distances is None:
+                return []
+            ranked = self.cache_ranking(current_bus, buses, distances)
+
+        buses_by_id = {bus.id: bus for bus in buses}
+        return [(distance, buses_by_id[bus_id]) for distance, bus_id in ranked if bus_id in buses_by_id]
+
+    def cache_ranking(self, current_bus, buses, distances):
+        """
+        This function caches the ranking for distances to the other buses, in the
+        order fetch_distances returns them. async_app.py fetches them itself and
+        caches them here before its sweep.
+        """
+        other_buses = [bus for bus in buses if bus.id != current_bus.id]
+        ranked = sorted(zip(distances, [bus.id for bus in other_buses]), key=lambda pair: pair[0])
+        self.neighbour_cache.put(current_bus.id, ranked)
+        return ranked
+
+    def suggest(self, current_bus, buses, actions, pending_bus_ids=None, plan=None, priority=SWEEP):
+        """
+        This function adds a suggestion for the bus to actions if the policy flags
+        it, holding the seats it needs on the nearby bus until an admin decides,
+        and returns it (None if there is none).
+        Sweeps can pass the set of str bus IDs that already have an action instead
+        of having the list scanned per bus; it is kept up to date here. Sweeps also
+        pass the policy.SweepPlan they evaluated for the whole fleet; without one,
+        the bus is evaluated alone. Suggestions in one sweep never contradict each
+        other: a bus with an action of its own is not a target, a bus flagged for
+        Combination is not a Reallocation target, and a bus that seats are held on
+        is not combined away.
+        """
+        if plan is None:
+            plan = self.evaluate([current_bus])
+        action = plan.action(current_bus)
+        if action is None:
+            return
+
+        bus_id = str(current_bus.id)
+        if pending_bus_ids is None:
+            pending_bus_ids = {str(pending['current_bus_id']) for pending in actions}
+        if bus_id in pending_bus_ids:
+            return None  # Already waiting on an admin decision, and its seats are still held
+        if action == COMBINATION and self.seat_ledger.reserved_seats(current_bus.id):
+            return None  # Students of other buses are being moved onto it, so it keeps running
+
+        searching, not_found = SEARCH_MESSAGES[action]
+        print(searching.format(current_bus.id))
+        ranked = self.rank_nearby_buses(current_bus, buses, priority)
+        rule = plan.rule(current_bus)
+        if rule is not None:
+            ranked = rule.candidates(ranked)
+        ranked = self.targets(ranked, action, plan, pending_bus_ids)
+        nearby_bus, distance, reserved_seats = reserve_nearby_bus(self.seat_ledger, current_bus, ranked, action)
+        if not nearby_bus:
+            print(not_found)
+            return None
+        suggestion = suggested_action(action, current_bus, nearby_bus, distance, reserved_seats)
+        actions.append(suggestion)
+        pending_bus_ids.add(bus_id)
+        return suggestion
+
+    def targets(self, ranked, action, plan, pending_bus_ids):
+        """
+        This function filters a ranking down to the buses that can take students
+        in this sweep, lazily like BusRule.candidates.
+        """
+        for distance, bus in ranked:
+            if str(bus.id) in pending_bus_ids:
+                continue
+            if action == REALLOCATION and bus.id in plan.index and plan.action(bus) == COMBINATION:
+                continue
+            yield distance, bus
+
+    def sweep(self, buses, actions, pending_bus_ids=None):
+        """
+        This function evaluates the policy once for the whole fleet and adds a
+        suggestion for every flagged bus to actions.
+        """
+        plan = self.evaluate(buses)
+        if pending_bus_ids is None:
+            pending_bus_ids = {str(pending['current_bus_id']) for pending in actions}
+        for bus in plan.flagged():
+            self.suggest(bus, buses, actions, pending_bus_ids, plan)
+
+    def notify(self, action, current_bus, nearby_bus, priority=ADMIN):
+        """
+        This function tells both drivers and returns whether every message went out.
+        """
+        delivered = [
+            self.notifier.notify(driver, driver_phone, message, priority)
+            for driver, driver_phone, message in driver_notifications(action, current_bus, nearby_bus)
+        ]
+        return all(delivered)
+
+    def allocate(self, current_bus, buses, plan=None, priority=ADMIN):
+        """
+        This function handles one bus from start to finish: suggest, ask the
+        approval strategy, and notify both drivers if it agrees. An approved
+        action keeps its seat hold, so later buses in the same run do not fill
+        the seats again; a denied one gives it back. An admin is usually waiting
+        on the answer, so its calls go out at ADMIN priority.
+        """
+        suggestion = self.suggest(current_bus, buses, [], set(), plan, priority)
+        if suggestion is None:
+            return
+        action, nearby_bus = suggestion['action'], suggestion['nearby_bus_details']
+        if self.approve(current_bus, nearby_bus, action, suggestion['distance']):
+            print(f"Request approved. Notifying drivers {current_bus.driver} and {nearby_bus.driver}.")
+            self.notify(action, current_bus, nearby_bus, priority)
+        else:
+            self.seat_ledger.release(action_key(current_bus.id, nearby_bus.id, action))
+            print("Request denied by admin.")
+
+def get_allocator():
+    """
+    This function returns the engine shared by the web app and zone sweeps:
+    Distance Matrix distances, Twilio calls and decisions left to the dashboard.
+    """
+    global default_allocator
+    if default_allocator is None:
+        default_allocator = AllocationEngine()
+    return default_allocator
@@ -0,0 +1,88 @@
+import os
+
+from rate_limit import ADMIN, twilio_limiter
+
+# Notifiers tell drivers about an approved action. A notifier has
+# notify(driver, driver_phone, message, priority), returning whether the message
+# went out, and is chosen per entry point:
+# the web app and CLI phone drivers through Twilio, the scripts in Additional/
+# read the message aloud.
+
+# Twilio credentials
+TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID')
+TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')
+TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER')
+
+class TwilioNotifier:
+    """
+    Phones the driver and plays the message. Calls wait their turn in the shared
+    Twilio rate limiter; the client is created on the first call.
+    """
+    def __init__(self, account_sid=TWILIO_ACCOUNT_SID, auth_token=TWILIO_AUTH_TOKEN, phone_number=TWILIO_PHONE_NUMBER,
+                 limiter=twilio_limiter):
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.phone_number = phone_number
+        self.limiter = limiter
+        self.client = None
+
+    def get_client(self):
+        if self.client is None:
+            from twilio.rest import Client
+            self.client = Client(self.account_sid, self.auth_token)
+        return self.client
+
+    def call(self, driver_phone, message, priority=ADMIN):
+        """
+        This function makes a phone call to the driver and plays the message, and
+        returns whether Twilio accepted the call.
+        """
+        if not self.limiter.acquire(priority):
+            print(f"Error making call to {driver_phone}: still waiting for the Twilio rate limit, giving up")
+            return False
+        try:
+            call = self.get_client().calls.create(
+                to=driver_phone,
+                from_=self.phone_number,
+                twiml=f'<Response><Say>{message}</Say></Response>'
+            )
+            print(f"Call initiated to {driver_phone}. Call SID: {call.sid}")
+            return True
+        except Exception as e:
+            print(f"Error making call to {driver_phone}: {e}")
+            return False
+
+    def notify(self, driver, driver_phone, message, priority=ADMIN):
+        print(f"Initiating call to {driver}: {message}")
+        return self.call(driver_phone, f"Notification for {driver}. {message}", priority)
+
+class SpeechNotifier:
+    """
+    Speaks the message with pyttsx3 instead of calling, for a console next to
+    the dispatcher. The engine is initialized on first use (needs an audio stack).
+    """
+    def __init__(self):
+        self.engine = None
+
+    def get_engine(self):
+        if self.engine is None:
+            import pyttsx3
+            self.engine = pyttsx3.init()
+
+            # Set the voice (optional)
+            voices = self.engine.getProperty('voices')
+            if len(voices) > 1:
+                self.engine.setProperty('voice', voices[1].id)  # Use second voice if available
+            elif voices:
+                self.engine.setProperty('voice', voices[0].id)
+        return self.engine
+
+    def speak(self, text):
+        engine = self.get_engine()
+        engine.say(text)
+        engine.runAndWait()
+
+    def notify(self, driver, driver_phone, message, priority=ADMIN):
+        print(f"Notification to {driver}: {message}")
+        self.speak(f"Notification for {driver}. {message}")
+        return True
@@ -1,141 +1,121 @@
 from flask import Flask, jsonify, request, render_template, send_from_directory
-import pandas as pd
+from flask.json.provider import DefaultJSONProvider
 import os
-import requests
+import queue
+import threading
+import time
 from dotenv import load_dotenv
-from twilio.rest import Client
+from fleet import Bus
+from rate_limit import ADMIN, SWEEP, maps_limiter, twilio_limiter
+from reservations import action_key, free_seats, seats_needed
+from slo import ADMIN_PHONE, SLO_AUTO_APPROVE_MAX_DISTANCE, SLO_AUTO_APPROVE_POLICY, SLO_CHECK_INTERVAL_SECONDS, SLO_ESCALATION, SloTracker
+
+# openpyxl, requests and twilio are imported on first use so the app starts quickly
 
 # Load environment variables
 load_dotenv()
 
-app = Flask(__name__)
+# The allocation engine reads its API keys from the environment when imported
+from allocation import approve_none, driver_notifications, get_allocator, get_approval_policy
+from allocation.distances import GOOGLE_MAPS_API_KEY
 
-# Twilio credentials
-TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID')
-TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')
-TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER')
+class FleetJSONProvider(DefaultJSONProvider):
+    # Bus records serialize to the same shape as the spreadsheet rows
+    @staticmethod
+    def default(o):
+        if isinstance(o, Bus):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
+
+app = Flask(__name__)
+app.json = FleetJSONProvider(app)
 
-# Initialize Twilio client
-twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+# Fleet spreadsheet (or CSV) read by every sweep and dashboard request
+BUS_DATA_FILE = os.getenv('BUS_DATA_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'buses.xlsx'))
 
-# Google Maps API key
-GOOGLE_MAPS_API_KEY = os.getenv('GOOGLE_MAPS_API_KEY')
+# Map markers per zoom level, rebuilt when the fleet file changes (see clusters.py)
+cluster_cache = {}
 
 # Center coordinates (e.g., college campus)
 CENTER_COORDINATES = {'lat': 13.0382, 'lng': 80.0454}
 
+# History CSV that every sweep appends a snapshot to, for replay in simulation.py (unset to skip)
+HISTORY_FILE = os.getenv('HISTORY_FILE')
+
+# Zone partitioning for sweeps: unset for a single flat sweep, "campus" or "grid" (see zones.py)
+ZONE_MODE = os.getenv('ZONE_MODE')
+
 # Global variable to store actions
 pending_actions = []
 
-def load_bus_data():
-    
-    file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'buses.xlsx')
-    df = pd.read_excel(file_path)
-    return df.to_dict(orient='records')
+# Seat-level allocation (see seating.py), rebuilt when the fleet file or roster changes
+seat_map = None
+seat_map_modified = None
 
-def call_driver(driver_phone, message):
-    try:
-        call = twilio_client.calls.create(
-            to=driver_phone,
-            from_=TWILIO_PHONE_NUMBER,
-            twiml=f'<Response><Say>{message}</Say></Response>'
-        )
-        print(f"Call initiated to {driver_phone}. Call SID: {call.sid}")
-    except Exception as e:
-        print(f"Error making call to {driver_phone}: {e}")
-
-def find_nearby_bus(current_bus, buses, find_empty=True):
-    if not GOOGLE_MAPS_API_KEY:
-        print("Error: GOOGLE_MAPS_API_KEY not found in environment variables")
-        return None, float('inf')
+# Buses students were moved off by approved actions since the seat map was built.
+# Sweeps leave them alone until the fleet file changes
+moved_bus_ids = set()
 
-    try:
-        origins = f"{current_bus['latitude']},{current_bus['longitude']}"
-        destinations = "|".join([f"{bus['latitude']},{bus['longitude']}" for bus in buses if bus['id'] != current_bus['id']])
-        url = f"https://maps.googleapis.com/maps/api/distancematrix/json?origins={origins}&destinations={destinations}&key={GOOGLE_MAPS_API_KEY}"
-
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-
-        if 'rows' in data and data['rows']:
-            elements = data['rows'][0]['elements']
-            if len(elements) != len(buses) - 1:
-                print("Error: Mismatch between number of buses in Excel and distance elements")
-                return None, float('inf')
-
-            distances = [element['distance']['value'] for element in elements]
-            return process_excel_distances(current_bus, buses, distances, find_empty)
-        else:
-            print("Error: 'rows' not found in API response")
-            return None, float('inf')
-    except requests.exceptions.RequestException as e:
-        print(f"Error making API request: {e}")
-        return None, float('inf')
-    except ValueError as e:
-        print(f"Error processing API response: {e}")
-        return None, float('inf')
+# Serializes admin decisions so a batch commits against one view of pending_actions
+admin_lock = threading.Lock()
 
-def process_excel_distances(current_bus, buses, distances, find_empty):
-    min_distance = float('inf')
-    selected_bus = None
+# Searches, seat holds and driver calls (see allocation/engine.py). Suggestions
+# wait in pending_actions for an admin
+allocator = get_allocator()
 
-    # Create a list of buses excluding the current bus
-    other_buses = [bus for bus in buses if bus['id'] != current_bus['id']]
+# Driver notifications waiting to be dialled by the notification worker
+notification_queue = queue.Queue()
+notification_worker = None
 
-    for idx, bus in enumerate(other_buses):
-        if idx >= len(distances):
-            print("Warning: Distance data is missing for some buses in Excel.")
-            continue
+# How long pending actions wait for a view, a decision and the driver calls, and
+# the thread that escalates the ones past the decision SLO (see slo.py)
+slo_tracker = SloTracker()
+slo_monitor = None
 
-        if find_empty:
-            available_seats = bus['seatingCapacity'] - bus['currentAttendance']
-            if available_seats > 0 and distances[idx] < min_distance:
-                min_distance = distances[idx]
-                selected_bus = bus
-        else:
-            combined_attendance = current_bus['currentAttendance'] + bus['currentAttendance']
-            if combined_attendance <= max(current_bus['seatingCapacity'], bus['seatingCapacity']) and distances[idx] < min_distance:
-                min_distance = distances[idx]
-                selected_bus = bus
-
-    return selected_bus, min_distance
-
-def check_attendance_and_notify(current_bus, buses):
-    if current_bus['currentAttendance'] >= current_bus['seatingCapacity']:
-        handle_full_bus(current_bus, buses)
-    elif current_bus['currentAttendance'] < current_bus['seatingCapacity'] * 0.5:
-        handle_low_attendance_bus(current_bus, buses)
-
-def handle_full_bus(current_bus, buses):
-    print(f"Bus {current_bus['id']} is full. Looking for nearby bus...")
-    nearby_bus, distance = find_nearby_bus(current_bus, buses, find_empty=True)
-    if nearby_bus:
-        pending_actions.append({
-            'current_bus_id': current_bus['id'],
-            'nearby_bus_id': nearby_bus['id'],
-            'action': 'Reallocation',
-            'message': f"Reallocate students from Bus {current_bus['id']} to Bus {nearby_bus['id']}.",
-            'current_bus_details': current_bus,
-            'nearby_bus_details': nearby_bus
-        })
-    else:
-        print("No nearby bus with available seats found or unable to fetch nearby bus information.")
-
-def handle_low_attendance_bus(current_bus, buses):
-    print(f"Bus {current_bus['id']} has low attendance. Looking for nearby bus to combine...")
-    nearby_bus, distance = find_nearby_bus(current_bus, buses, find_empty=False)
-    if nearby_bus:
-        pending_actions.append({
-            'current_bus_id': current_bus['id'],
-            'nearby_bus_id': nearby_bus['id'],
-            'action': 'Combination',
-            'message': f"Combine Bus {current_bus['id']} with Bus {nearby_bus['id']}.",
-            'current_bus_details': current_bus,
-            'nearby_bus_details': nearby_bus
-        })
-    else:
-        print("No suitable nearby bus found for combining or unable to fetch nearby bus information.")
+# Restart the development server when a source file changes (0 turns it off)
+USE_RELOADER = os.getenv('USE_RELOADER', '1') != '0'
+
+def load_bus_data():
+    from fleet_import import import_buses
+
+    buses, errors = import_buses(BUS_DATA_FILE)
+    for row_number, message in errors:
+        print(f"Warning: skipped row {row_number} of {BUS_DATA_FILE}: {message}")
+    return buses
+
+def get_seat_map():
+    global seat_map, seat_map_modified, moved_bus_ids
+    from seating import SeatMap, STUDENTS_FILE, load_students
+    modified = (os.path.getmtime(BUS_DATA_FILE), os.path.getmtime(STUDENTS_FILE) if os.path.exists(STUDENTS_FILE) else None)
+    if seat_map is None or modified != seat_map_modified:
+        students = load_students() if modified[1] is not None else None
+        seat_map = SeatMap.from_buses(load_bus_data(), students)
+        seat_map_modified = modified
+        moved_bus_ids = set()
+    return seat_map
+
+def load_current_buses():
+    """
+    This function returns the fleet as approved actions left it: the fleet file
+    with each bus's attendance taken from the seat map, so sweeps and decision
+    checks see the students that were moved.
+    """
+    seats = get_seat_map()
+    buses = load_bus_data()
+    with seats.lock:
+        for bus in buses:
+            if bus.id in seats.bus_index:
+                bus.currentAttendance = seats.attendance(bus.id)
+    return buses
+
+def get_clusters(zoom):
+    from clusters import cluster_buses
+    modified = os.path.getmtime(BUS_DATA_FILE)
+    cached = cluster_cache.get(zoom)
+    if cached is None or cached[0] != modified:
+        cached = (modified, cluster_buses(load_bus_data(), zoom))
+        cluster_cache[zoom] = cached
+    return cached[1]
 
 @app.route('/')
 def serve_index():
@@ -145,68 +125,424 @@ def serve_index():
 def serve_static(path):
     return send_from_directory('static', path)
 
-@app.route('/api/bus-locations')
-def bus_locations():
-    bus_data = load_bus_data()
-    locations = [{'id': bus['id'], 'latitude': bus['latitude'], 'longitude': bus['longitude']} for bus in bus_data]
-    return jsonify(locations)
+# Dashboard API, served by this app and by async_app.py. Each handler takes the
+# query arguments, the JSON body (None if there is none) and the URL parameters,
+# and returns (payload, status).
 
-@app.route('/api/bus-details')
-def bus_details():
+def bus_locations(args, body):
     bus_data = load_bus_data()
-    return jsonify(bus_data)
+    locations = [{'id': bus.id, 'latitude': bus.latitude, 'longitude': bus.longitude} for bus in bus_data]
+    return locations, 200
+
+def bus_clusters(args, body):
+    from clusters import parse_bounds, parse_zoom, visible_markers
+    try:
+        zoom = parse_zoom(args.get('zoom', 10))
+        bounds = parse_bounds(args.get('bounds'))
+    except ValueError as e:
+        return {'success': False, 'message': f"Invalid zoom or bounds: {e}"}, 400
 
-@app.route('/api/google-maps-key')
-def google_maps_key():
-    return jsonify({'apiKey': GOOGLE_MAPS_API_KEY})
+    markers = get_clusters(zoom)
+    if bounds:
+        markers = visible_markers(markers, bounds, zoom)
+    return {'zoom': zoom, 'clusters': markers}, 200
 
-@app.route('/api/pending-actions')
-def get_pending_actions():
-    return jsonify(pending_actions)
+def bus_details(args, body):
+    return load_current_buses(), 200
 
-@app.route('/api/admin-action', methods=['POST'])
-def admin_action():
-    data = request.json
-    current_bus_id = data.get('current_bus_id')
-    nearby_bus_id = data.get('nearby_bus_id')
-    action = data.get('action')
-    approved = data.get('approved')
+def google_maps_key(args, body):
+    return {'apiKey': GOOGLE_MAPS_API_KEY}, 200
 
-    buses = load_bus_data()
+def rate_limits(args, body):
+    return [maps_limiter.usage(), twilio_limiter.usage()], 200
+
+def get_pending_actions(args, body):
+    with admin_lock:
+        expire_pending_actions()
+    return pending_actions, 200
+
+def pending_actions_viewed(args, body):
+    """
+    The dashboard posts {"actions": [{"current_bus_id", "nearby_bus_id",
+    "action"}, ...]} for the rows it has shown on screen. Listing the pending
+    actions does not count as a view, since the dashboard polls that endpoint.
+    """
+    actions = body.get('actions') if isinstance(body, dict) else None
+    if not isinstance(actions, list) or not all(isinstance(action, dict) for action in actions):
+        return {'success': False, 'message': 'Expected {"actions": [...]}.'}, 400
+    slo_tracker.viewed([pending_key(action) for action in actions if all(name in action for name in ('current_bus_id', 'nearby_bus_id', 'action'))])
+    return {'success': True}, 200
+
+def slo_summary(args, body):
+    return slo_tracker.summary(), 200
+
+def bus_seating(args, body, bus_id):
+    seats = get_seat_map()
+    key = next((known for known in seats.bus_ids if str(known) == str(bus_id)), None)
+    if key is None:
+        return {'success': False, 'message': f'Bus with ID {bus_id} not found.'}, 404
+    return seats.occupancy(key), 200
+
+def admin_action(args, body):
+    if not isinstance(body, dict):
+        return {'success': False, 'message': 'Expected a JSON object.'}, 400
+    current_bus_id = body.get('current_bus_id')
+    nearby_bus_id = body.get('nearby_bus_id')
+    action = body.get('action')
+    approved = body.get('approved')
+
+    buses = load_current_buses()
     print(f"Received admin action: current_bus_id={current_bus_id}, nearby_bus_id={nearby_bus_id}, action={action}, approved={approved}")
-    print(f"Loaded bus IDs: {[bus['id'] for bus in buses]}")
+    print(f"Loaded bus IDs: {[bus.id for bus in buses]}")
 
-    current_bus = next((bus for bus in buses if str(bus['id']) == str(current_bus_id)), None)
-    nearby_bus = next((bus for bus in buses if str(bus['id']) == str(nearby_bus_id)), None)
+    current_bus = next((bus for bus in buses if str(bus.id) == str(current_bus_id)), None)
+    nearby_bus = next((bus for bus in buses if str(bus.id) == str(nearby_bus_id)), None)
 
     if current_bus is None:
-        return jsonify({'success': False, 'message': f'Current bus with ID {current_bus_id} not found.'}), 404
+        return {'success': False, 'message': f'Current bus with ID {current_bus_id} not found.'}, 404
     if nearby_bus is None:
-        return jsonify({'success': False, 'message': f'Nearby bus with ID {nearby_bus_id} not found.'}), 404
+        return {'success': False, 'message': f'Nearby bus with ID {nearby_bus_id} not found.'}, 404
+
+    # Decided like a batch of one, so the action leaves pending_actions and its hold is released
+    decision = {'current_bus_id': current_bus.id, 'nearby_bus_id': nearby_bus.id, 'action': action, 'approved': bool(approved)}
+    with admin_lock:
+        planned, errors, conflict = check_decisions([decision], buses)
+        if errors:
+            return {'success': False, 'message': errors[0]['message']}, 409 if conflict else 400
+        try:
+            results, _ = apply_decisions(planned)
+        except ValueError as e:
+            return {'success': False, 'message': str(e)}, 409
 
     if approved:
-        if action == "Reallocation":
-            notify_driver(current_bus['driver'], current_bus['phone'], f"Your bus is full. Students will be allocated to Bus {nearby_bus['id']}.")
-            notify_driver(nearby_bus['driver'], nearby_bus['phone'], f"Please pick up additional students from Bus {current_bus['id']}.")
-        elif action == "Combination":
-            notify_driver(current_bus['driver'], current_bus['phone'], f"Your bus will be combined with Bus {nearby_bus['id']}. Please proceed to the designated meeting point.")
-            notify_driver(nearby_bus['driver'], nearby_bus['phone'], f"Your bus will be combined with Bus {current_bus['id']}. Please proceed to the designated meeting point.")
-        return jsonify({'success': True, 'message': 'Action approved and notifications sent.'})
+        return {'success': True, 'message': 'Action approved and notifications queued.', 'students_moved': results[0]['students_moved']}, 200
     else:
-        return jsonify({'success': False, 'message': 'Action denied by admin.'})
+        return {'success': False, 'message': 'Action denied by admin.'}, 200
 
-def notify_driver(driver, driver_phone, message):
+def admin_actions_batch(args, body):
+    """
+    This endpoint takes many decisions at once:
+    {"decisions": [{"current_bus_id", "nearby_bus_id", "action", "approved"}, ...]}.
+    All of them are checked against one load of the fleet and the pending
+    actions. If any is invalid, is not pending (any more), or conflicts with
+    another approved decision, nothing is applied.
+    Otherwise the seat moves and the pending-action removals happen together and
+    the driver calls are queued as one batch.
+    """
+    decisions = body.get('decisions', []) if isinstance(body, dict) else None
+    if not isinstance(decisions, list):
+        return {'success': False, 'message': 'Expected {"decisions": [...]}.'}, 400
+    print(f"Received {len(decisions)} admin decisions")
+
+    buses = load_current_buses()
+    # Checked and applied in one critical section, so two batches cannot both
+    # pass the checks against the same pending actions
+    with admin_lock:
+        planned, errors, conflict = check_decisions(decisions, buses)
+        if errors:
+            status = 409 if conflict else 400
+            return {'success': False, 'message': 'No decisions were applied.', 'errors': errors}, status
+        try:
+            results, calls_queued = apply_decisions(planned)
+        except ValueError as e:
+            return {'success': False, 'message': 'No decisions were applied.', 'errors': [{'index': None, 'message': str(e)}]}, 409
+    approved_count = sum(1 for result in results if result['approved'])
+    return {
+        'success': True,
+        'message': f"{approved_count} approved, {len(results) - approved_count} denied. {calls_queued} driver calls queued.",
+        'results': results,
+    }, 200
+
+# (URL rule, methods, handler) for every dashboard API endpoint
+DASHBOARD_API = [
+    ('/api/bus-locations', ['GET'], bus_locations),
+    ('/api/bus-clusters', ['GET'], bus_clusters),
+    ('/api/bus-details', ['GET'], bus_details),
+    ('/api/google-maps-key', ['GET'], google_maps_key),
+    ('/api/rate-limits', ['GET'], rate_limits),
+    ('/api/pending-actions', ['GET'], get_pending_actions),
+    ('/api/pending-actions/viewed', ['POST'], pending_actions_viewed),
+    ('/api/slo', ['GET'], slo_summary),
+    ('/api/bus-seating/<bus_id>', ['GET'], bus_seating),
+    ('/api/admin-action', ['POST'], admin_action),
+    ('/api/admin-actions', ['POST'], admin_actions_batch),
+]
+
+def flask_view(handler):
+    def view(**params):
+        payload, status = handler(request.args, request.get_json(silent=True), **params)
+        return jsonify(payload), status
+    view.__name__ = handler.__name__
+    return view
+
+for rule, methods, handler in DASHBOARD_API:
+    app.add_url_rule(rule, view_func=flask_view(handler), methods=methods)
+
+def check_decisions(decisions, buses):
     """
-    This function sends a notification to the driver via phone call.
+    This function checks decisions against one load of the fleet and the pending
+    actions; call it with admin_lock held. It returns the planned (action,
+    current_bus, nearby_bus, approved) tuples, the errors as {'index',
+    'message'}, and whether any error is a conflict with the pending actions or
+    between approved decisions rather than a bad request. Conflicting decisions
+    are left out of the plan.
+
+    Every decision must be on a pending action, once. A bus students move off
+    (the current bus of an approved decision) may not be in any other approved
+    decision. A bus students move onto may take several, as long as the seats
+    they need fit: what their holds reserved, or what the action would move if
+    the hold has expired.
     """
-    print(f"Initiating call to {driver}: {message}")
-    call_driver(driver_phone, f"Notification for {driver}. {message}")
+    buses_by_id = {str(bus.id): bus for bus in buses}
+    pending_keys = {pending_key(pending) for pending in pending_actions}
+    decided = set()
+    errors = []
+    conflict = False
+    planned = []
+    sources = {}  # bus id -> decision moving students off it
+    targets = {}  # bus id -> (decisions moving students onto it, seats they need)
+    for index, decision in enumerate(decisions):
+        if not isinstance(decision, dict):
+            errors.append({'index': index, 'message': "Each decision must be an object."})
+            continue
+        current_bus = buses_by_id.get(str(decision.get('current_bus_id')))
+        nearby_bus = buses_by_id.get(str(decision.get('nearby_bus_id')))
+        action = decision.get('action')
+        approved = decision.get('approved')
 
-def process_buses():
-    buses = load_bus_data()
-    for bus in buses:
-        check_attendance_and_notify(bus, buses)
+        if not isinstance(approved, bool):
+            errors.append({'index': index, 'message': f"approved must be true or false, got {approved!r}"})
+            continue
+        if current_bus is None:
+            errors.append({'index': index, 'message': f"Current bus with ID {decision.get('current_bus_id')} not found."})
+            continue
+        if nearby_bus is None:
+            errors.append({'index': index, 'message': f"Nearby bus with ID {decision.get('nearby_bus_id')} not found."})
+            continue
+        if action not in ("Reallocation", "Combination"):
+            errors.append({'index': index, 'message': f"Unknown action: {action}"})
+            continue
+        key = action_key(current_bus.id, nearby_bus.id, action)
+        if key in decided:
+            errors.append({'index': index, 'message': f"{action} of Bus {current_bus.id} to Bus {nearby_bus.id} is decided twice."})
+            continue
+        if key not in pending_keys:
+            conflict = True
+            errors.append({'index': index, 'message': f"{action} of Bus {current_bus.id} to Bus {nearby_bus.id} is not pending."})
+            continue
+        decided.add(key)
+
+        if approved:
+            current_id, nearby_id = str(current_bus.id), str(nearby_bus.id)
+            others = [sources[bus_id] for bus_id in (current_id, nearby_id) if bus_id in sources]
+            others += targets[current_id][0] if current_id in targets else []
+            if others:
+                conflict = True
+                errors.append({'index': index, 'message': f"Buses {current_bus.id} and {nearby_bus.id} are already used by approved decision {others[0]}."})
+                continue
+            free = free_seats(action, current_bus, nearby_bus)
+            seats = allocator.seat_ledger.held(key)
+            if seats is None:
+                # Reallocation only moves as many students as there are free seats, but at least one
+                seats = seats_needed(action, current_bus)
+                seats = max(min(seats, free), 1) if action == "Reallocation" else seats
+            incoming, reserved = targets.get(nearby_id, ([], 0))
+            if reserved + seats > free:
+                conflict = True
+                if incoming:
+                    errors.append({'index': index, 'message': f"Bus {nearby_bus.id} has no room for this and approved decisions {incoming}."})
+                else:
+                    errors.append({'index': index, 'message': f"Bus {nearby_bus.id} has no room for this decision."})
+                continue
+            sources[current_id] = index
+            targets[nearby_id] = (incoming + [index], reserved + seats)
+        planned.append((action, current_bus, nearby_bus, approved))
+    return planned, errors, conflict
+
+def pending_key(pending):
+    return action_key(pending['current_bus_id'], pending['nearby_bus_id'], pending['action'])
+
+def apply_decisions(planned, automatic=False):
+    """
+    This function applies decisions checked by check_decisions, [(action,
+    current_bus, nearby_bus, approved), ...], together: the seat moves, the
+    pending-action removals and the released holds, then queues the driver calls
+    as one batch, at SWEEP priority for automatic decisions. Call it with
+    admin_lock held, in the same critical section as check_decisions. Returns the
+    result of every decision and the number of calls queued. Every bus is looked
+    up in the seat map before the first move; if one is missing, ValueError is
+    raised and nothing is applied.
+    """
+    results = []
+    notifications = []
+    seats = get_seat_map()
+    with seats.lock:
+        for action, current_bus, nearby_bus, approved in planned:
+            for bus in (current_bus, nearby_bus):
+                if approved and bus.id not in seats.bus_index:
+                    raise ValueError(f"Bus {bus.id} is not in the seat map.")
+        for action, current_bus, nearby_bus, approved in planned:
+            students_moved = seats.apply_action(action, current_bus.id, nearby_bus.id) if approved else 0
+            key = action_key(current_bus.id, nearby_bus.id, action)
+            slo_tracker.decided(key, approved, automatic)
+            if approved:
+                moved_bus_ids.add(str(current_bus.id))
+                notifications.append((key, driver_notifications(action, current_bus, nearby_bus)))
+            results.append({
+                'current_bus_id': current_bus.id,
+                'nearby_bus_id': nearby_bus.id,
+                'action': action,
+                'approved': approved,
+                'students_moved': students_moved,
+            })
+
+    decided = {action_key(current_bus.id, nearby_bus.id, action) for action, current_bus, nearby_bus, _ in planned}
+    pending_actions[:] = [pending for pending in pending_actions if pending_key(pending) not in decided]
+    for key in decided:
+        allocator.seat_ledger.release(key)
+
+    if notifications:
+        enqueue_notifications(notifications, SWEEP if automatic else ADMIN)
+    return results, sum(len(calls) for _, calls in notifications)
+
+def enqueue_notifications(notifications, priority=ADMIN):
+    """
+    This function hands a batch of driver calls, [(action key, [(driver, phone,
+    message), ...]), ...], to the background worker.
+    """
+    global notification_worker
+    if notification_worker is None or not notification_worker.is_alive():
+        notification_worker = threading.Thread(target=run_notification_worker, daemon=True)
+        notification_worker.start()
+    notification_queue.put((notifications, priority))
+
+def run_notification_worker():
+    while True:
+        batch, priority = notification_queue.get()
+        for key, calls in batch:
+            delivered = [allocator.notifier.notify(driver, driver_phone, message, priority) for driver, driver_phone, message in calls]
+            slo_tracker.notified(key, all(delivered))
+        notification_queue.task_done()
+
+def escalate_overdue_actions():
+    """
+    This function handles pending actions that have waited longer than the
+    decision SLO (again at every further multiple of it). With SLO_ESCALATION
+    "auto-approve" the actions the auto-approval policy agrees with are approved
+    together, through the same checks as the batch endpoint: one that conflicts
+    with another, or whose buses no longer fit, is left for the admin. The admin
+    is called about every action that is not approved, with "renotify" too.
+    """
+    overdue = slo_tracker.overdue()
+    if not overdue:
+        return
+
+    approve = approve_none
+    if SLO_ESCALATION == 'auto-approve':
+        try:
+            approve = get_approval_policy(SLO_AUTO_APPROVE_POLICY, SLO_AUTO_APPROVE_MAX_DISTANCE)
+        except ValueError as e:
+            print(f"Error in SLO_AUTO_APPROVE_POLICY: {e}")
+
+    buses = load_current_buses()
+    waiting = []
+    approvals = []
+    errors = []
+    # Looked up, checked and applied in one critical section, so an action the
+    # admin decides at the same time is applied once
+    with admin_lock:
+        pending_by_key = {pending_key(pending): pending for pending in pending_actions}
+        for key, age in overdue:
+            pending = pending_by_key.get(key)
+            if pending is None:
+                continue
+            print(f"Warning: \"{pending['message']}\" has waited {age / 60:.0f} minutes for a decision")
+            if approve(pending['current_bus_details'], pending['nearby_bus_details'], pending['action'], pending.get('distance', float('inf'))):
+                approvals.append((pending, age))
+            else:
+                waiting.append((pending, age))
+
+        if approvals:
+            decisions = [
+                {'current_bus_id': pending['current_bus_id'], 'nearby_bus_id': pending['nearby_bus_id'], 'action': pending['action'], 'approved': True}
+                for pending, _ in approvals
+            ]
+            planned, errors, _ = check_decisions(decisions, buses)
+            skipped = {error['index'] for error in errors}
+            try:
+                apply_decisions(planned, automatic=True)
+            except ValueError as e:
+                print(f"Error auto-approving overdue actions: {e}")
+                skipped = set(range(len(approvals)))
+
+    for error in errors:
+        print(f"Warning: not auto-approving \"{approvals[error['index']][0]['message']}\": {error['message']}")
+    for index, (pending, age) in enumerate(approvals):
+        if index in skipped:
+            waiting.append((pending, age))
+        else:
+            print(f"Auto-approved after the decision SLO: {pending['message']}")
+
+    if SLO_ESCALATION in ('renotify', 'auto-approve') and ADMIN_PHONE:
+        for pending, age in waiting:
+            allocator.notifier.notify('Admin', ADMIN_PHONE, f"{pending['message']} This action has waited {age / 60:.0f} minutes for your decision.", SWEEP)
+
+@app.before_request
+def ensure_slo_monitor():
+    # Whichever process serves requests escalates, also under a WSGI server
+    start_slo_monitor()
+
+def start_slo_monitor():
+    global slo_monitor
+    if SLO_CHECK_INTERVAL_SECONDS > 0 and (slo_monitor is None or not slo_monitor.is_alive()):
+        slo_monitor = threading.Thread(target=run_slo_monitor, daemon=True)
+        slo_monitor.start()
+
+def run_slo_monitor():
+    while True:
+        time.sleep(SLO_CHECK_INTERVAL_SECONDS)
+        try:
+            escalate_overdue_actions()
+        except Exception as e:
+            print(f"Error checking pending actions against the SLO: {e}")
+
+def expire_pending_actions():
+    """
+    This function drops the pending actions whose seat holds have expired
+    (RESERVATION_TTL_SECONDS), so their buses are swept again instead of
+    waiting on seats nobody holds any more. Call it with admin_lock held.
+    """
+    expired = {pending_key(pending) for pending in pending_actions if allocator.seat_ledger.held(pending_key(pending)) is None}
+    if not expired:
+        return
+    for pending in pending_actions:
+        if pending_key(pending) in expired:
+            print(f"Warning: \"{pending['message']}\" expired without a decision")
+    pending_actions[:] = [pending for pending in pending_actions if pending_key(pending) not in expired]
+    slo_tracker.expired(expired)
+
+def process_buses(buses=None):
+    if buses is None:
+        buses = load_current_buses()
+    with admin_lock:
+        expire_pending_actions()
+        # Buses with a pending action, or whose students were already moved, get no new one
+        pending_bus_ids = {str(pending['current_bus_id']) for pending in pending_actions} | moved_bus_ids
+    if HISTORY_FILE:
+        from simulation import append_history
+        append_history(buses, HISTORY_FILE)
+    if ZONE_MODE:
+        from zones import sweep_zones
+        pending_actions.extend(sweep_zones(buses, mode=ZONE_MODE, allocator=allocator, pending_bus_ids=pending_bus_ids))
+    else:
+        allocator.sweep(buses, pending_actions, pending_bus_ids)
+    slo_tracker.created([pending_key(pending) for pending in pending_actions])
 
 if __name__ == '__main__':
     process_buses()  
-    app.run(debug=True)
+    # The debug reloader runs this file in a watcher process too, which only
+    # restarts the server; the process that serves requests escalates, so the
+    # admin is called once
+    if not USE_RELOADER or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_slo_monitor()
+    app.run(debug=True, use_reloader=USE_RELOADER)
@@ -0,0 +1,196 @@
+import asyncio
+import os
+
+import httpx
+from quart import Quart, jsonify, request, send_from_directory
+from quart.json.provider import DefaultJSONProvider
+
+from fleet import Bus
+from rate_limit import ADMIN, SWEEP, maps_limiter, twilio_limiter
+from app import DASHBOARD_API, ZONE_MODE, allocator, load_current_buses, start_slo_monitor
+from app import process_buses as sweep_buses
+from allocation import DistanceMatrixDistances
+from allocation.notifiers import TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER
+
+# ASGI variant of app.py. Run with `hypercorn async_app:app` (or `python async_app.py`).
+# All outbound Distance Matrix and Twilio calls share one pooled keep-alive client,
+# so a sweep overlaps its requests instead of blocking a worker per call.
+# Calls also go through the same per-provider rate limiters as app.py (rate_limit.py).
+# The sweep, the seat holds and the dashboard API are app.py's own: this app only
+# fetches the distances up front and runs the handlers off the event loop.
+
+class FleetJSONProvider(DefaultJSONProvider):
+    # Bus records serialize to the same shape as the spreadsheet rows
+    @staticmethod
+    def default(o):
+        if isinstance(o, Bus):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
+
+app = Quart(__name__)
+app.json = FleetJSONProvider(app)
+
+# Twilio REST endpoint (overridable so calls can go to fake_services.py)
+TWILIO_API_URL = os.getenv('TWILIO_API_URL', 'https://api.twilio.com')
+
+# Upper bounds on in-flight requests per provider
+MAPS_MAX_CONCURRENCY = int(os.getenv('MAPS_MAX_CONCURRENCY', '100'))
+TWILIO_MAX_CONCURRENCY = int(os.getenv('TWILIO_MAX_CONCURRENCY', '20'))
+
+http_client = None
+# The engine's own notifier, put back when the app stops serving
+default_notifier = None
+distance_matrix = DistanceMatrixDistances()
+maps_semaphore = asyncio.Semaphore(MAPS_MAX_CONCURRENCY)
+twilio_semaphore = asyncio.Semaphore(TWILIO_MAX_CONCURRENCY)
+
+def create_http_client():
+    limits = httpx.Limits(
+        max_connections=MAPS_MAX_CONCURRENCY + TWILIO_MAX_CONCURRENCY,
+        max_keepalive_connections=MAPS_MAX_CONCURRENCY + TWILIO_MAX_CONCURRENCY,
+        keepalive_expiry=30.0,
+    )
+    return httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(10.0))
+
+def get_http_client():
+    global http_client
+    if http_client is None:
+        http_client = create_http_client()
+    return http_client
+
+async def close_http_client():
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+
+async def call_driver(driver_phone, message, priority=ADMIN):
+    """
+    This function places a Twilio call through the shared async client, and
+    returns whether Twilio accepted it.
+    """
+    if not await twilio_limiter.acquire_async(priority):
+        print(f"Error making call to {driver_phone}: still waiting for the Twilio rate limit, giving up")
+        return False
+    url = f"{TWILIO_API_URL}/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}/Calls.json"
+    payload = {
+        'To': str(driver_phone),
+        'From': TWILIO_PHONE_NUMBER,
+        'Twiml': f'<Response><Say>{message}</Say></Response>',
+    }
+    try:
+        async with twilio_semaphore:
+            response = await get_http_client().post(url, data=payload, auth=(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN))
+        response.raise_for_status()
+        print(f"Call initiated to {driver_phone}. Call SID: {response.json().get('sid')}")
+        return True
+    except (httpx.HTTPError, ValueError) as e:
+        print(f"Error making call to {driver_phone}: {e}")
+        return False
+
+async def notify_driver(driver, driver_phone, message, priority=ADMIN):
+    """
+    This function sends a notification to the driver via phone call.
+    """
+    print(f"Initiating call to {driver}: {message}")
+    return await call_driver(driver_phone, f"Notification for {driver}. {message}", priority)
+
+async def fetch_distances(current_bus, buses, priority=SWEEP):
+    """
+    This function is DistanceMatrixDistances for the event loop: the same request
+    and response handling, sent through the shared async client.
+    """
+    if not distance_matrix.api_key:
+        print("Error: GOOGLE_MAPS_API_KEY not found in environment variables")
+        return None
+
+    try:
+        if not await maps_limiter.acquire_async(priority):
+            print("Error: still waiting for the Distance Matrix rate limit, giving up")
+            return None
+        async with maps_semaphore:
+            response = await get_http_client().get(distance_matrix.url, params=distance_matrix.params(current_bus, buses))
+        response.raise_for_status()
+        return distance_matrix.parse(response.json(), buses)
+    except httpx.HTTPError as e:
+        print(f"Error making API request: {e}")
+        return None
+    except (KeyError, ValueError) as e:
+        print(f"Error processing API response: {e}")
+        return None
+
+class AsyncTwilioNotifier:
+    """
+    The engine's notifier while this app serves: calls are placed through the
+    shared async client on the serving event loop. notify blocks until the call
+    is placed, so it must be called from a worker thread, which is where the
+    dashboard handlers, the notification worker and the SLO monitor run.
+    """
+    def __init__(self, loop):
+        self.loop = loop
+
+    def notify(self, driver, driver_phone, message, priority=ADMIN):
+        return asyncio.run_coroutine_threadsafe(notify_driver(driver, driver_phone, message, priority), self.loop).result()
+
+async def prefetch_ranking(current_bus, buses):
+    """
+    This function fetches the distances for one bus through the shared async
+    client and caches its ranking in the engine, so the sweep does not fetch it.
+    """
+    if allocator.neighbour_cache.get(current_bus.id) is not None:
+        return
+    distances = await fetch_distances(current_bus, buses)
+    if distances is not None:
+        allocator.cache_ranking(current_bus, buses, distances)
+
+async def process_buses(buses=None):
+    """
+    This function sweeps every bus. The Distance Matrix requests go out
+    concurrently, bounded by the per-provider semaphores and rate limiters, not
+    by the number of buses; the seats are then held by app.py's sweep, in the
+    same order and with the same rules as in the blocking app.
+    """
+    if buses is None:
+        buses = await asyncio.to_thread(load_current_buses)
+    if not ZONE_MODE:
+        # Zone workers run their own engines, so there is no cache to fill for them
+        plan = allocator.evaluate(buses)
+        await asyncio.gather(*(prefetch_ranking(bus, buses) for bus in plan.flagged()))
+    await asyncio.to_thread(sweep_buses, buses)
+
+@app.before_serving
+async def startup():
+    global default_notifier
+    get_http_client()
+    default_notifier = allocator.notifier
+    allocator.notifier = AsyncTwilioNotifier(asyncio.get_running_loop())
+    app.add_background_task(process_buses)  # Process buses on startup
+    start_slo_monitor()
+
+@app.after_serving
+async def shutdown():
+    allocator.notifier = default_notifier
+    await close_http_client()
+
+@app.route('/')
+async def serve_index():
+    return await send_from_directory(os.path.join(app.root_path, 'templates'), 'index.html')
+
+@app.route('/<path:path>')
+async def serve_static(path):
+    return await send_from_directory(os.path.join(app.root_path, 'static'), path)
+
+def quart_view(handler):
+    # Handlers read the fleet file and may place calls, so they run on a worker thread
+    async def view(**params):
+        body = await request.get_json(silent=True)
+        payload, status = await asyncio.to_thread(handler, request.args, body, **params)
+        return jsonify(payload), status
+    view.__name__ = handler.__name__
+    return view
+
+for rule, methods, handler in DASHBOARD_API:
+    app.add_url_rule(rule, view_func=quart_view(handler), methods=methods)
+
+if __name__ == '__main__':
+    app.run(debug=True)
@@ -0,0 +1,89 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_services import start_fake_server
+from fleet import Bus
+
+# Compares the blocking sweep in app.py against the pooled async sweep in
+# async_app.py, both pointed at the local fake Maps/Twilio server.
+
+def generate_buses(num_buses, seed=0):
+    rng = random.Random(seed)
+    buses = []
+    for i in range(1, num_buses + 1):
+        seating_capacity = rng.randint(30, 60)
+        lat = round(rng.uniform(12.9, 13.2), 6)
+        lng = round(rng.uniform(80.0, 80.3), 6)
+        buses.append(Bus.from_dict({
+            'id': i,
+            'driver': f"Driver {i}",
+            'seatingCapacity': seating_capacity,
+            'currentAttendance': rng.randint(0, seating_capacity + 10),
+            'location': f"{lat},{lng}",
+            'latitude': lat,
+            'longitude': lng,
+            'phone': 910000000000 + i,
+        }))
+    return buses
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the blocking and async sweeps against fake_services.py.')
+    parser.add_argument('--buses', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.1, help='Fake server latency per request in seconds')
+    args = parser.parse_args()
+
+    server, base_url = start_fake_server(latency=args.latency)
+    os.environ.update({
+        'GOOGLE_MAPS_API_KEY': 'fake-key',
+        'DISTANCE_MATRIX_URL': f"{base_url}/maps/api/distancematrix/json",
+        'TWILIO_API_URL': base_url,
+        'TWILIO_ACCOUNT_SID': 'ACfake',
+        'TWILIO_AUTH_TOKEN': 'fake-token',
+        'TWILIO_PHONE_NUMBER': '+10000000000',
+        # Measure the transport, not the provider rate limits
+        'MAPS_REQUESTS_PER_SECOND': '0',
+        'TWILIO_CALLS_PER_SECOND': '0',
+    })
+
+    import app
+    import async_app
+
+    buses = generate_buses(args.buses)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        app.allocator.sweep(buses, app.pending_actions)
+        sync_elapsed = time.perf_counter() - start
+        sync_actions = len(app.pending_actions)
+        # The async sweep starts from scratch too: no cached rankings, no held seats
+        app.pending_actions.clear()
+        app.allocator.neighbour_cache.clear()
+        app.allocator.seat_ledger.clear()
+
+        async def run_async_sweep():
+            try:
+                await async_app.process_buses(buses)
+            finally:
+                await async_app.close_http_client()
+
+        start = time.perf_counter()
+        asyncio.run(run_async_sweep())
+        async_elapsed = time.perf_counter() - start
+        async_actions = len(app.pending_actions)
+
+    server.shutdown()
+    print(f"buses={args.buses} latency={args.latency * 1000:.0f}ms")
+    print(f"blocking sweep: {sync_elapsed:.2f}s ({sync_actions} actions)")
+    print(f"async sweep:    {async_elapsed:.2f}s ({async_actions} actions)")
+    print(f"speedup:        {sync_elapsed / async_elapsed:.1f}x")
+
+if __name__ == '__main__':
+    main()
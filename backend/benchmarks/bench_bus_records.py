@@ -0,0 +1,98 @@
+import argparse
+import gc
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fleet import Bus, Fleet
+
+# Memory and field-access cost of per-bus dicts against Bus records and the
+# columnar Fleet, plus one pass of the candidate scan over each representation.
+
+def generate_dicts(num_buses, seed=0):
+    rng = random.Random(seed)
+    buses = []
+    for i in range(1, num_buses + 1):
+        capacity = rng.randint(30, 60)
+        buses.append({
+            'id': i,
+            'driver': f"Driver {i}",
+            'seatingCapacity': capacity,
+            'currentAttendance': rng.randint(0, capacity + 10),
+            'location': f"Stop {i % 500}",
+            'latitude': rng.uniform(12.5, 13.5),
+            'longitude': rng.uniform(79.8, 80.4),
+            'phone': 910000000000 + i,
+        })
+    return buses
+
+def measure_memory(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+def scan(current_bus, buses, distances):
+    # Same per-bus work as select_nearby_bus (allocation/engine.py) with find_empty=True
+    best = None
+    best_distance = float('inf')
+    for idx, bus in enumerate(buses):
+        if bus['seatingCapacity'] - bus['currentAttendance'] > 0 and distances[idx] < best_distance:
+            best_distance = distances[idx]
+            best = bus
+    return best
+
+def scan_attributes(current_bus, buses, distances):
+    # The same scan as select_nearby_bus now does it, with attribute access
+    best = None
+    best_distance = float('inf')
+    for idx, bus in enumerate(buses):
+        if bus.seatingCapacity - bus.currentAttendance > 0 and distances[idx] < best_distance:
+            best_distance = distances[idx]
+            best = bus
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-bus dicts with Bus records.')
+    parser.add_argument('--buses', type=int, default=100000)
+    args = parser.parse_args()
+
+    source = generate_dicts(args.buses)
+    # Build fresh copies inside the measurement so shared values are not double counted
+    dicts, dict_bytes = measure_memory(lambda: [dict(bus, driver=f"Driver {bus['id']}") for bus in source])
+    records, record_bytes = measure_memory(lambda: [Bus.from_dict(dict(bus, driver=f"Driver {bus['id']}")) for bus in source])
+
+    def build_fleet():
+        fleet = Fleet()
+        for bus in source:
+            fleet.append(dict(bus, driver=f"Driver {bus['id']}"))
+        return fleet
+    fleet, fleet_bytes = measure_memory(build_fleet)
+
+    print(f"{args.buses} buses")
+    print(f"  dict per bus:   {dict_bytes / 1e6:6.1f} MB ({dict_bytes / args.buses:.0f} bytes/bus)")
+    print(f"  Bus records:    {record_bytes / 1e6:6.1f} MB ({record_bytes / args.buses:.0f} bytes/bus)")
+    print(f"  Fleet columns:  {fleet_bytes / 1e6:6.1f} MB ({fleet_bytes / args.buses:.0f} bytes/bus)")
+
+    bus_dict = dicts[0]
+    bus_record = records[0]
+    number = 2_000_000
+    print("field access (ns per read)")
+    print(f"  dict['seatingCapacity']: {timeit.timeit(lambda: bus_dict['seatingCapacity'], number=number) / number * 1e9:6.1f}")
+    print(f"  Bus['seatingCapacity']:  {timeit.timeit(lambda: bus_record['seatingCapacity'], number=number) / number * 1e9:6.1f}")
+    print(f"  Bus.seatingCapacity:     {timeit.timeit(lambda: bus_record.seatingCapacity, number=number) / number * 1e9:6.1f}")
+
+    distances = [random.random() for _ in range(args.buses)]
+    print("candidate scan over the fleet (ms)")
+    print(f"  dicts:       {min(timeit.repeat(lambda: scan(dicts[0], dicts, distances), number=1, repeat=5)) * 1000:6.1f}")
+    print(f"  Bus['...']:  {min(timeit.repeat(lambda: scan(records[0], records, distances), number=1, repeat=5)) * 1000:6.1f}")
+    print(f"  Bus.attr:    {min(timeit.repeat(lambda: scan_attributes(records[0], records, distances), number=1, repeat=5)) * 1000:6.1f}")
+
+if __name__ == '__main__':
+    main()
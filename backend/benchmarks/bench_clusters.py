@@ -0,0 +1,59 @@
+import argparse
+import contextlib
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_async_sweep import generate_buses
+from fleet import FIELDS
+
+# Compares what the dashboard map downloads for a large fleet: every bus from
+# /api/bus-locations versus the grid clusters from /api/bus-clusters at a few
+# zoom levels (first request builds the cache, the second is served from it).
+
+def write_fleet(buses):
+    handle, file_path = tempfile.mkstemp(suffix='.csv')
+    with os.fdopen(handle, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDS)
+        for bus in buses:
+            writer.writerow([getattr(bus, name) for name in FIELDS])
+    return file_path
+
+def timed_get(client, url):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = client.get(url)
+    return (time.perf_counter() - start) * 1000, len(response.data), response.get_json()
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark map payloads with and without server-side clustering.')
+    parser.add_argument('--buses', type=int, default=10000)
+    args = parser.parse_args()
+
+    fleet_file = write_fleet(generate_buses(args.buses))
+    os.environ['BUS_DATA_FILE'] = fleet_file
+    try:
+        import app
+        client = app.app.test_client()
+
+        elapsed, size, data = timed_get(client, '/api/bus-locations')
+        print(f"buses={args.buses}")
+        print(f"/api/bus-locations: {len(data)} markers, {size / 1024:.0f} KiB, {elapsed:.0f} ms")
+        for zoom in (8, 10, 12, 14, 16):
+            url = f"/api/bus-clusters?zoom={zoom}"
+            cold, size, data = timed_get(client, url)
+            warm, _, _ = timed_get(client, url)
+            visible, _, view = timed_get(client, f"{url}&bounds=13.0,80.1,13.05,80.15")
+            print(f"/api/bus-clusters zoom {zoom:2d}: {len(data['clusters'])} markers, {size / 1024:.0f} KiB, "
+                  f"{cold:.0f} ms cold, {warm:.1f} ms cached, {len(view['clusters'])} markers in a small view ({visible:.1f} ms)")
+    finally:
+        os.remove(fleet_file)
+
+if __name__ == '__main__':
+    main()
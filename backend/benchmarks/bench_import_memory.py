@@ -0,0 +1,91 @@
+import argparse
+import csv
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+from fleet_import import import_fleet
+
+# Peak memory of loading a large fleet file: pandas read + to_dict (the old
+# load_bus_data) against the streaming importer building a Fleet directly, and
+# against app.load_bus_data as the app calls it (Bus records, no Fleet).
+
+HEADER = ['id', 'driver', 'seatingCapacity', 'currentAttendance', 'location', 'latitude', 'longitude', 'phone']
+
+def generate_rows(num_buses, seed=0):
+    rng = random.Random(seed)
+    for i in range(1, num_buses + 1):
+        capacity = rng.randint(30, 60)
+        lat = round(rng.uniform(12.5, 13.5), 6)
+        lng = round(rng.uniform(79.8, 80.4), 6)
+        yield [i, f"Driver {i}", capacity, rng.randint(0, capacity + 10), f"Stop {i % 500}", lat, lng, f"+91{9000000000 + i}"]
+
+def write_csv(path, num_buses):
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(HEADER)
+        writer.writerows(generate_rows(num_buses))
+
+def write_xlsx(path, num_buses):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(HEADER)
+    for row in generate_rows(num_buses):
+        sheet.append(row)
+    workbook.save(path)
+
+def measure(label, load):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<28} peak {peak / 1e6:7.1f} MB  held {current / 1e6:7.1f} MB  {elapsed:6.2f}s")
+    del result
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare peak memory of pandas and streaming fleet imports.')
+    parser.add_argument('--buses', type=int, default=100000)
+    parser.add_argument('--xlsx-buses', type=int, default=20000, help='Rows for the (slower) xlsx comparison')
+    args = parser.parse_args()
+
+    try:
+        import pandas as pd
+    except ImportError:
+        pd = None
+        print("pandas not installed; only measuring the streaming importer")
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'fleet.csv')
+        xlsx_path = os.path.join(directory, 'fleet.xlsx')
+        write_csv(csv_path, args.buses)
+        write_xlsx(xlsx_path, args.xlsx_buses)
+
+        print(f"CSV, {args.buses} buses")
+        if pd is not None:
+            measure('pandas read_csv + to_dict', lambda: pd.read_csv(csv_path).to_dict(orient='records'))
+        measure('import_fleet -> Fleet', lambda: import_fleet(csv_path))
+        measure('import_fleet -> records', lambda: import_fleet(csv_path)[0].to_records())
+        app.BUS_DATA_FILE = csv_path
+        measure('app.load_bus_data', app.load_bus_data)
+
+        print(f"XLSX, {args.xlsx_buses} buses")
+        if pd is not None:
+            measure('pandas read_excel + to_dict', lambda: pd.read_excel(xlsx_path).to_dict(orient='records'))
+        measure('import_fleet -> Fleet', lambda: import_fleet(xlsx_path))
+        app.BUS_DATA_FILE = xlsx_path
+        measure('app.load_bus_data', app.load_bus_data)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import policy
+from bench_async_sweep import generate_buses
+from policy import Policy
+
+# Times one policy evaluation over a large fleet: the config interpreted bus by
+# bus (what a sweep did per bus before the policy was compiled), the compiled
+# policy in pure Python, and the compiled policy vectorized with numpy.
+
+CONFIG = {
+    'defaults': {'full_threshold': 1.0, 'low_threshold': 0.5},
+    'compatible_bus_types': {'standard': ['standard', 'ac'], 'ac': ['ac']},
+    'rules': [
+        {'name': 'morning peak', 'routes': ['R1', 'R2', 'R3'], 'hours': ['07:00', '09:30'], 'full_threshold': 0.95, 'low_threshold': 0.3},
+        {'name': 'ac buses', 'bus_types': ['ac'], 'low_threshold': 0.4, 'max_detour_meters': 4000},
+        {'name': 'night', 'hours': ['22:00', '05:00'], 'low_threshold': 0.2},
+    ],
+}
+
+def assign_routes(buses, routes=40, seed=0):
+    rng = random.Random(seed)
+    for bus in buses:
+        bus.routeId = f"R{rng.randint(1, routes)}"
+        bus.busType = rng.choice(['standard', 'standard', 'ac'])
+    return buses
+
+def interpreted_actions(buses, config, now):
+    minute = now.hour * 60 + now.minute
+    actions = []
+    for bus in buses:
+        thresholds = dict(config['defaults'])
+        for rule in config['rules']:
+            if 'routes' in rule and bus.routeId not in rule['routes']:
+                continue
+            if 'bus_types' in rule and bus.busType not in rule['bus_types']:
+                continue
+            if 'hours' in rule:
+                start, end = (policy.parse_minutes(text) for text in rule['hours'])
+                inside = start <= minute < end if start <= end else minute >= start or minute < end
+                if not inside:
+                    continue
+            thresholds.update({name: rule[name] for name in ('full_threshold', 'low_threshold') if name in rule})
+            break
+        if bus.currentAttendance >= bus.seatingCapacity * thresholds['full_threshold']:
+            actions.append(policy.REALLOCATION)
+        elif bus.currentAttendance < bus.seatingCapacity * thresholds['low_threshold']:
+            actions.append(policy.COMBINATION)
+        else:
+            actions.append(None)
+    return actions
+
+def timed(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark evaluating the allocation policy over a fleet.')
+    parser.add_argument('--buses', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    buses = assign_routes(generate_buses(args.buses))
+    now = datetime.datetime(2024, 1, 8, 8, 15)
+    compiled = Policy(CONFIG)
+    compiled.evaluate(buses, now)  # fills the match cache, as after the first sweep
+
+    interpreted, expected = timed(lambda: interpreted_actions(buses, CONFIG, now), args.repeat)
+    vectorize_min_buses = policy.VECTORIZE_MIN_BUSES
+    policy.VECTORIZE_MIN_BUSES = float('inf')
+    python, python_plan = timed(lambda: compiled.evaluate(buses, now), args.repeat)
+    policy.VECTORIZE_MIN_BUSES = vectorize_min_buses
+    vectorized, vectorized_plan = timed(lambda: compiled.evaluate(buses, now), args.repeat)
+
+    print(f"buses={args.buses}, {len(python_plan.flagged())} flagged")
+    print(f"interpreted per bus: {interpreted:8.1f} ms")
+    print(f"compiled, Python:    {python:8.1f} ms  {'same actions' if python_plan.actions == expected else 'DIFFERENT ACTIONS'}")
+    vectorized_note = 'same actions' if vectorized_plan.actions == expected else 'DIFFERENT ACTIONS'
+    if policy.get_numpy() is None:
+        vectorized_note = 'numpy not installed, same as Python'
+    print(f"compiled, numpy:     {vectorized:8.1f} ms  {vectorized_note}")
+    return 0 if python_plan.actions == expected == vectorized_plan.actions else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seating import SeatMap
+
+# Memory footprint and operation cost of the seat map at fleet scale.
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark seat-level allocation.')
+    parser.add_argument('--students', type=int, default=100000)
+    parser.add_argument('--seats', type=int, default=50, help='Seats per bus')
+    args = parser.parse_args()
+
+    num_buses = args.students // args.seats + 1
+    rng = random.Random(0)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    seat_map = SeatMap()
+    for bus_id in range(num_buses):
+        seat_map.add_bus(bus_id, args.seats)
+    for student_id in range(args.students):
+        seat_map.board(student_id, student_id // args.seats)
+    board_elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    sample = rng.sample(range(args.students), 10000)
+    start = time.perf_counter()
+    for student_id in sample:
+        seat_map.alight(student_id)
+    for student_id in sample:
+        seat_map.board(student_id, student_id // args.seats)
+    cycle_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    moved = 0
+    for bus_id in range(0, num_buses - 1, 2):
+        moved += seat_map.move(bus_id, bus_id + 1, 5)
+    move_elapsed = time.perf_counter() - start
+
+    print(f"{args.students} students on {num_buses} buses of {args.seats} seats")
+    print(f"memory:        {current / 1e6:.1f} MB held, {peak / 1e6:.1f} MB peak ({current / args.students:.0f} bytes/student)")
+    print(f"initial board: {board_elapsed:.2f}s ({board_elapsed / args.students * 1e6:.2f} us/student)")
+    print(f"alight+board:  {cycle_elapsed / (2 * len(sample)) * 1e6:.2f} us/op")
+    print(f"bulk move:     {moved} students in {move_elapsed * 1000:.1f} ms")
+
+if __name__ == '__main__':
+    main()
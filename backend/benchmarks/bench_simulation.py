@@ -0,0 +1,71 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_async_sweep import generate_buses
+from simulation import append_history, load_history, run_scenarios
+
+# Replays a synthetic day (one snapshot every 15 minutes) for a generated fleet
+# through simulation.py and exits non-zero if a scenario takes longer than the budget.
+
+SCENARIOS = [
+    {'name': 'baseline'},
+    {'name': 'low 40%', 'low_threshold': 0.4},
+    {'name': 'retire 5', 'retire_lowest': 5},
+    {'name': 'max 5 km', 'policy': 'max-distance', 'max_distance': 5000},
+    {'name': 'near 1 km', 'rules': [{'name': 'short detours', 'max_detour_meters': 1000}]},
+]
+
+def generate_day(buses, ticks, seed=0):
+    """
+    This function writes a history CSV where every bus drifts a little and its
+    attendance takes a random walk between empty and slightly over capacity.
+    """
+    rng = random.Random(seed)
+    handle, file_path = tempfile.mkstemp(suffix='.csv')
+    os.close(handle)
+    os.remove(file_path)
+    for tick in range(ticks):
+        for bus in buses:
+            bus.latitude += rng.uniform(-0.002, 0.002)
+            bus.longitude += rng.uniform(-0.002, 0.002)
+            bus.currentAttendance = min(max(bus.currentAttendance + rng.randint(-3, 3), 0), bus.seatingCapacity + 10)
+        append_history(buses, file_path, timestamp=f"2024-01-01T{tick // 4:02d}:{tick % 4 * 15:02d}:00")
+    return file_path
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark simulation.py on a generated day.')
+    parser.add_argument('--buses', type=int, default=1000)
+    parser.add_argument('--ticks', type=int, default=96, help='Snapshots in the day (96 is every 15 minutes)')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--budget', type=float, default=10.0, help='Seconds allowed per scenario')
+    args = parser.parse_args()
+
+    fleet = generate_buses(args.buses)
+    history_file = generate_day(generate_buses(args.buses), args.ticks)
+    try:
+        ticks = load_history(history_file)
+    finally:
+        os.remove(history_file)
+
+    start = time.perf_counter()
+    reports = run_scenarios(fleet, ticks, SCENARIOS, args.workers)
+    elapsed = time.perf_counter() - start
+
+    print(f"buses={args.buses} ticks={args.ticks} scenarios={len(SCENARIOS)} wall={elapsed:.2f}s")
+    over_budget = False
+    for report in reports:
+        status = 'ok' if report['seconds'] <= args.budget else 'OVER BUDGET'
+        over_budget = over_budget or report['seconds'] > args.budget
+        print(f"{report['scenario']:>10}: {report['seconds']:6.2f}s  {report['actions']} actions, "
+              f"{report['approved']} approved, {report['students_moved']} moved, {report['distance_km']} km, "
+              f"{report['seat_utilization']:.1%} seats used, peak {report['peak_standing']} standing  {status}")
+    sys.exit(1 if over_budget else 0)
+
+if __name__ == '__main__':
+    main()
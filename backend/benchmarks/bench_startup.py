@@ -0,0 +1,74 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# Measures cold-start import time of the entry points with `python -X importtime`
+# and exits non-zero if any of them goes over its budget. Run from anywhere:
+#   python benchmarks/bench_startup.py --budget app=400 --budget main=150
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Default budgets in milliseconds. The app budget is mostly Flask itself; main.py
+# should only pay for dotenv now that openpyxl, pyttsx3 and twilio load on first use.
+DEFAULT_BUDGETS_MS = {
+    'app': 500,
+    'main': 150,
+}
+
+def measure_import(module, runs):
+    """
+    This function imports the module in a fresh interpreter and returns the best
+    total import time in milliseconds along with the slowest top-level imports.
+    """
+    best_total = None
+    best_entries = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+        entries = []
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            # Top-level imports are the ones without leading indentation in the name column
+            if not name.startswith('  '):
+                entries.append((int(cumulative_us) / 1000, name.strip()))
+
+        total = sum(ms for ms, _ in entries)
+        if best_total is None or total < best_total:
+            best_total = total
+            best_entries = sorted(entries, reverse=True)
+    return best_total, best_entries
+
+def main():
+    parser = argparse.ArgumentParser(description='Fail if the cold-start import time of an entry point exceeds its budget.')
+    parser.add_argument('--budget', action='append', default=[], metavar='MODULE=MS', help='Override or add a budget, e.g. app=400')
+    parser.add_argument('--runs', type=int, default=3, help='Best of N fresh interpreters per module')
+    args = parser.parse_args()
+
+    budgets = dict(DEFAULT_BUDGETS_MS)
+    for item in args.budget:
+        module, ms = item.split('=')
+        budgets[module] = float(ms)
+
+    failed = False
+    for module, budget in budgets.items():
+        total, entries = measure_import(module, args.runs)
+        status = 'ok' if total <= budget else 'OVER BUDGET'
+        failed = failed or total > budget
+        print(f"{module}: {total:.1f} ms (budget {budget:.0f} ms) {status}")
+        for ms, name in entries[:5]:
+            print(f"    {ms:8.1f} ms  {name}")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
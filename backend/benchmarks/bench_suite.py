@@ -0,0 +1,85 @@
+import contextlib
+import io
+
+from allocation import AllocationEngine, ManhattanDistances, StraightLineDistances, select_nearby_bus
+from bench_async_sweep import generate_buses
+from bench_policy import CONFIG, assign_routes
+from policy import Policy
+from reservations import SeatLedger, reserve_nearby_bus
+from slo import SloTracker
+
+# One benchmark per hot path of the allocation engine, on the same generated
+# fleet, so a change can be measured against all of them at once.
+
+def bench_policy_evaluate(benchmark, buses):
+    policy = Policy(CONFIG)
+    routed = assign_routes(generate_buses(len(buses)))
+    plan = benchmark(policy.evaluate, routed)
+    assert plan.flagged()
+
+def bench_manhattan_distances(benchmark, buses):
+    distances = benchmark(ManhattanDistances(), buses[0], buses)
+    assert len(distances) == len(buses) - 1
+
+def bench_straight_line_distances(benchmark, buses):
+    provider = StraightLineDistances()
+    provider.set_positions(buses)
+    distances = benchmark(provider, buses[0], buses)
+    assert len(distances) == len(buses) - 1
+
+def bench_select_nearby_bus(benchmark, buses):
+    distances = ManhattanDistances()(buses[0], buses)
+    nearby_bus, _ = benchmark(select_nearby_bus, buses[0], buses, distances, True)
+    assert nearby_bus is not None
+
+def bench_nearest_first(benchmark, buses):
+    provider = StraightLineDistances()
+    provider.set_positions(buses)
+
+    def first_ten():
+        ranked = provider.nearest_first(buses[0], buses)
+        return [next(ranked) for _ in range(10)]
+
+    assert len(benchmark(first_ten)) == 10
+
+def bench_reserve_nearby_bus(benchmark, buses):
+    provider = StraightLineDistances()
+    provider.set_positions(buses)
+    ranked = list(provider.nearest_first(buses[0], buses))
+
+    def reserve():
+        return reserve_nearby_bus(SeatLedger(), buses[0], ranked, 'Combination')
+
+    benchmark(reserve)
+
+def bench_sweep(benchmark, buses):
+    # A whole sweep with straight-line distances: policy, ranking and seat holds
+    def sweep():
+        allocator = AllocationEngine(distances=StraightLineDistances())
+        actions = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            allocator.sweep(buses, actions)
+        return actions
+
+    assert benchmark(sweep)
+
+def bench_cluster_buses(benchmark, buses):
+    from clusters import cluster_buses
+    assert benchmark(cluster_buses, buses, 12)
+
+def bench_import_fleet(benchmark, fleet_csv, buses):
+    from fleet_import import import_fleet
+    fleet, errors = benchmark(import_fleet, fleet_csv)
+    assert len(fleet) == len(buses) and not errors
+
+def bench_slo_summary(benchmark, buses):
+    # Every bus through the pending-action lifecycle, then the /api/slo percentiles
+    tracker = SloTracker()
+    keys = [(str(bus.id), str(buses[0].id), 'Combination') for bus in buses]
+    tracker.created(keys)
+    tracker.viewed(keys)
+    for key in keys:
+        tracker.decided(key, True)
+        tracker.notified(key)
+    summary = benchmark(tracker.summary)
+    assert summary['stages']['endToEnd']['count'] == len(buses)
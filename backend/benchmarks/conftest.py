@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_async_sweep import generate_buses
+
+# Fleet size for the shared suite (bench_suite.py)
+BENCH_BUSES = int(os.getenv('BENCH_BUSES', '2000'))
+
+@pytest.fixture(scope='session')
+def buses():
+    return generate_buses(BENCH_BUSES)
+
+@pytest.fixture(scope='session')
+def fleet_csv(buses):
+    from bench_clusters import write_fleet
+    file_path = write_fleet(buses)
+    yield file_path
+    os.remove(file_path)
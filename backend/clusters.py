@@ -0,0 +1,113 @@
+import math
+import os
+
+# Server-side marker clustering for the dashboard map. Buses are bucketed into a
+# lat/lng grid whose cell size follows the zoom level, so the browser draws one
+# marker per cell instead of one per bus. At CLUSTER_MAX_ZOOM and above every bus
+# gets its own marker.
+
+# Size of a grid cell on screen, in pixels
+CLUSTER_CELL_PIXELS = int(os.getenv('CLUSTER_CELL_PIXELS', '64'))
+
+# Zoom level from which buses are no longer clustered
+CLUSTER_MAX_ZOOM = int(os.getenv('CLUSTER_MAX_ZOOM', '16'))
+
+# Google Maps tiles are 256 pixels wide and cover 360 degrees at zoom 0
+TILE_PIXELS = 256
+MAX_ZOOM = 22
+
+def cell_degrees(zoom):
+    return 360 / 2 ** zoom * CLUSTER_CELL_PIXELS / TILE_PIXELS
+
+def parse_zoom(text):
+    """
+    This function reads the zoom level sent by the map, which is fractional while
+    it animates, floored and clamped to 0..MAX_ZOOM.
+    """
+    zoom = float(text)
+    if not math.isfinite(zoom):
+        raise ValueError(f"zoom must be a number, got {text}")
+    return min(max(math.floor(zoom), 0), MAX_ZOOM)
+
+def parse_bounds(text):
+    """
+    This function parses "south,west,north,east" as sent by the map, or returns
+    None for an empty value.
+    """
+    if not text:
+        return None
+    parts = text.split(',')
+    if len(parts) != 4:
+        raise ValueError("bounds must be south,west,north,east")
+    return tuple(float(part) for part in parts)
+
+def in_bounds(lat, lng, bounds):
+    south, west, north, east = bounds
+    if not south <= lat <= north:
+        return False
+    # The visible area can cross the antimeridian, in which case west > east
+    return west <= lng <= east if west <= east else lng >= west or lng <= east
+
+def visible_markers(markers, bounds, zoom):
+    """
+    This function keeps the markers to draw for a view. A cluster's centroid can
+    lie just outside the view while some of its buses are inside, so clusters are
+    kept if they are within one grid cell of the bounds; single buses only if
+    they are inside.
+    """
+    south, west, north, east = bounds
+    margin = cell_degrees(zoom)
+    if (east - west) % 360 + 2 * margin >= 360:
+        padded = (south - margin, -180, north + margin, 180)
+    else:
+        padded = (south - margin, (west - margin + 180) % 360 - 180, north + margin, (east + margin + 180) % 360 - 180)
+    return [
+        marker for marker in markers
+        if in_bounds(marker['lat'], marker['lng'], bounds if marker['count'] == 1 else padded)
+    ]
+
+def bus_marker(bus):
+    return {
+        'key': f"bus:{bus.id}",
+        'lat': bus.latitude,
+        'lng': bus.longitude,
+        'count': 1,
+        'seatingCapacity': bus.seatingCapacity,
+        'currentAttendance': bus.currentAttendance,
+        'busId': bus.id,
+    }
+
+def cluster_buses(buses, zoom):
+    """
+    This function groups buses into grid cells for a zoom level and returns one
+    marker per cell: its centroid, bus count and seat totals. Cells holding a
+    single bus come back as that bus, keyed by bus ID so the marker survives
+    zooming.
+    """
+    if zoom >= CLUSTER_MAX_ZOOM:
+        return [bus_marker(bus) for bus in buses]
+
+    size = cell_degrees(zoom)
+    cells = {}
+    for bus in buses:
+        cell = (math.floor(bus.latitude / size), math.floor(bus.longitude / size))
+        members = cells.get(cell)
+        if members is None:
+            cells[cell] = [bus]
+        else:
+            members.append(bus)
+
+    markers = []
+    for (row, col), members in cells.items():
+        if len(members) == 1:
+            markers.append(bus_marker(members[0]))
+            continue
+        markers.append({
+            'key': f"{zoom}:{row}:{col}",
+            'lat': sum(bus.latitude for bus in members) / len(members),
+            'lng': sum(bus.longitude for bus in members) / len(members),
+            'count': len(members),
+            'seatingCapacity': sum(bus.seatingCapacity for bus in members),
+            'currentAttendance': sum(bus.currentAttendance for bus in members),
+        })
+    return markers
@@ -0,0 +1,103 @@
+import argparse
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Local stand-in for the Google Distance Matrix and Twilio Calls APIs.
+# Point DISTANCE_MATRIX_URL and TWILIO_API_URL at it to exercise sweeps without
+# spending quota or ringing real phones.
+
+EARTH_RADIUS_M = 6371000
+
+def haversine_meters(origin, destination):
+    lat1, lng1 = map(math.radians, origin)
+    lat2, lng2 = map(math.radians, destination)
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return int(2 * EARTH_RADIUS_M * math.asin(math.sqrt(a)))
+
+def parse_point(text):
+    lat, lng = text.split(',')
+    return float(lat), float(lng)
+
+class FakeServiceHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive between requests
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency = 0.0
+    calls_made = 0
+    calls_lock = threading.Lock()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if not url.path.endswith('/distancematrix/json'):
+            self.send_json(404, {'error': 'not found'})
+            return
+
+        time.sleep(self.latency)
+        params = parse_qs(url.query)
+        origin = parse_point(params['origins'][0])
+        destinations = params.get('destinations', [''])[0]
+        elements = []
+        for destination in filter(None, destinations.split('|')):
+            meters = haversine_meters(origin, parse_point(destination))
+            elements.append({'distance': {'text': f"{meters / 1000:.1f} km", 'value': meters}, 'status': 'OK'})
+        self.send_json(200, {'rows': [{'elements': elements}], 'status': 'OK'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        if not self.path.endswith('/Calls.json'):
+            self.send_json(404, {'error': 'not found'})
+            return
+
+        time.sleep(self.latency)
+        with FakeServiceHandler.calls_lock:
+            FakeServiceHandler.calls_made += 1
+            sid = f"CAfake{FakeServiceHandler.calls_made:026d}"
+        self.send_json(201, {'sid': sid, 'status': 'queued'})
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class FakeServiceServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 drops connections under a concurrent sweep
+    request_queue_size = 1024
+    daemon_threads = True
+
+def start_fake_server(host='127.0.0.1', port=0, latency=0.0):
+    """
+    This function starts the fake Maps/Twilio server on a background thread and
+    returns the server together with its base URL.
+    """
+    handler = type('ConfiguredFakeServiceHandler', (FakeServiceHandler,), {'latency': latency})
+    server = FakeServiceServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fake Distance Matrix and Twilio server for local testing.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to sleep before each response')
+    args = parser.parse_args()
+
+    server, base_url = start_fake_server(args.host, args.port, args.latency)
+    print(f"Fake services listening on {base_url}")
+    print(f"  DISTANCE_MATRIX_URL={base_url}/maps/api/distancematrix/json")
+    print(f"  TWILIO_API_URL={base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
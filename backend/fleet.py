@@ -0,0 +1,121 @@
+from array import array
+
+# Column-oriented fleet: one typed array (or list) per field instead of one dict
+# per bus. Numeric columns are array.array, so a bus costs a few dozen bytes of
+# numbers plus its strings. Bus is the per-bus record handed to the allocation
+# code; it uses __slots__ and the spreadsheet's column names as attributes.
+
+# Columns every bus has, in the order of the spreadsheet
+FIELDS = ['id', 'driver', 'seatingCapacity', 'currentAttendance', 'location', 'latitude', 'longitude', 'phone']
+
+# Optional columns with their own slot because rules look them up per bus
+OPTIONAL_FIELDS = ['routeId', 'busType']
+
+class Bus:
+    __slots__ = FIELDS + OPTIONAL_FIELDS + ['extra']
+
+    def __init__(self, id, driver, seatingCapacity, currentAttendance, location, latitude, longitude, phone,
+                 routeId=None, busType=None, extra=None):
+        self.id = id
+        self.driver = driver
+        self.seatingCapacity = seatingCapacity
+        self.currentAttendance = currentAttendance
+        self.location = location
+        self.latitude = latitude
+        self.longitude = longitude
+        self.phone = phone
+        self.routeId = routeId
+        self.busType = busType
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, bus):
+        extra = {name: value for name, value in bus.items() if name not in cls.__slots__}
+        return cls(
+            bus['id'], bus.get('driver', ''), bus['seatingCapacity'], bus['currentAttendance'],
+            bus.get('location', ''), bus['latitude'], bus['longitude'], bus.get('phone'),
+            bus.get('routeId'), bus.get('busType'), extra or None,
+        )
+
+    def __getitem__(self, name):
+        # Lets code written for the spreadsheet dicts keep using bus['seatingCapacity'];
+        # hot paths use attributes, which are faster than either
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            if self.extra and name in self.extra:
+                return self.extra[name]
+            raise KeyError(name) from None
+
+    def get(self, name, default=None):
+        if name in Bus.__slots__ and name != 'extra':
+            value = getattr(self, name)
+            return default if value is None else value
+        return (self.extra or {}).get(name, default)
+
+    def to_dict(self):
+        """
+        This function returns the bus in the same JSON shape as the spreadsheet rows.
+        """
+        bus = {name: getattr(self, name) for name in FIELDS}
+        for name in OPTIONAL_FIELDS:
+            if getattr(self, name) is not None:
+                bus[name] = getattr(self, name)
+        if self.extra:
+            bus.update(self.extra)
+        return bus
+
+    def __repr__(self):
+        return f"Bus(id={self.id!r}, seatingCapacity={self.seatingCapacity}, currentAttendance={self.currentAttendance})"
+
+class Fleet:
+    def __init__(self, extra_fields=()):
+        self.id = []
+        self.driver = []
+        self.seatingCapacity = array('i')
+        self.currentAttendance = array('i')
+        self.location = []
+        self.latitude = array('d')
+        self.longitude = array('d')
+        self.phone = []
+        # Any other spreadsheet columns (e.g. routeId), kept as plain lists
+        self.extra = {name: [] for name in extra_fields}
+
+    def __len__(self):
+        return len(self.id)
+
+    def append(self, bus):
+        """
+        This function adds one bus from a dict with already-coerced values.
+        """
+        self.id.append(bus['id'])
+        self.driver.append(bus.get('driver', ''))
+        self.seatingCapacity.append(bus['seatingCapacity'])
+        self.currentAttendance.append(bus['currentAttendance'])
+        self.location.append(bus.get('location', ''))
+        self.latitude.append(bus['latitude'])
+        self.longitude.append(bus['longitude'])
+        self.phone.append(bus.get('phone'))
+        for name, values in self.extra.items():
+            values.append(bus.get(name))
+
+    def record(self, i):
+        """
+        This function returns bus i in the same dict shape as the spreadsheet rows.
+        """
+        bus = {
+            'id': self.id[i],
+            'driver': self.driver[i],
+            'seatingCapacity': self.seatingCapacity[i],
+            'currentAttendance': self.currentAttendance[i],
+            'location': self.location[i],
+            'latitude': self.latitude[i],
+            'longitude': self.longitude[i],
+            'phone': self.phone[i],
+        }
+        for name, values in self.extra.items():
+            bus[name] = values[i]
+        return bus
+
+    def to_records(self):
+        return [self.record(i) for i in range(len(self))]
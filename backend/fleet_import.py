@@ -0,0 +1,156 @@
+import csv
+import math
+import sys
+
+from fleet import FIELDS, Bus, Fleet
+
+# Streaming fleet import. Rows are read one at a time (openpyxl read-only mode
+# for .xlsx, csv.reader for .csv), validated and coerced, and appended straight
+# into a Fleet, or turned straight into Bus records, so there is never a
+# DataFrame or a second copy of the data. Bad rows are reported and skipped
+# instead of aborting the import.
+
+REQUIRED_FIELDS = ['id', 'seatingCapacity', 'currentAttendance', 'latitude', 'longitude']
+
+# Largest values the typed columns hold: seat numbers are unsigned 16-bit in
+# seating.py, attendance is a signed 32-bit array('i') column in fleet.py
+MAX_SEATING_CAPACITY = 65535
+MAX_ATTENDANCE = 2 ** 31 - 1
+
+def is_blank(value):
+    return value is None or (isinstance(value, str) and not value.strip()) or (isinstance(value, float) and math.isnan(value))
+
+def to_int(value, name):
+    if isinstance(value, bool):
+        raise ValueError(f"{name} must be a number, got {value!r}")
+    if isinstance(value, int):
+        return value
+    number = float(value)
+    if not number.is_integer():
+        raise ValueError(f"{name} must be a whole number, got {value!r}")
+    return int(number)
+
+def to_code(value):
+    # IDs and phone numbers: numeric ones become ints like pandas would make them,
+    # anything else (route codes like R1, "+91...") stays a string
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        value = value.strip()
+        if value.isdigit():
+            return int(value)
+    return value
+
+def coerce_row(row):
+    """
+    This function turns one raw row (header -> cell) into a bus dict, raising
+    ValueError with a readable message if the row is unusable.
+    """
+    for name in REQUIRED_FIELDS:
+        if is_blank(row.get(name)):
+            raise ValueError(f"missing {name}")
+
+    bus = {
+        'id': to_code(row['id']),
+        'driver': '' if is_blank(row.get('driver')) else str(row['driver']).strip(),
+        'seatingCapacity': to_int(row['seatingCapacity'], 'seatingCapacity'),
+        'currentAttendance': to_int(row['currentAttendance'], 'currentAttendance'),
+        # Many buses share a stop name, so keep one copy of each
+        'location': '' if is_blank(row.get('location')) else sys.intern(str(row['location']).strip()),
+        'latitude': float(row['latitude']),
+        'longitude': float(row['longitude']),
+        'phone': None if is_blank(row.get('phone')) else to_code(row['phone']),
+    }
+    if not 0 < bus['seatingCapacity'] <= MAX_SEATING_CAPACITY:
+        raise ValueError(f"seatingCapacity must be between 1 and {MAX_SEATING_CAPACITY}, got {bus['seatingCapacity']}")
+    if not 0 <= bus['currentAttendance'] <= MAX_ATTENDANCE:
+        raise ValueError(f"currentAttendance must be between 0 and {MAX_ATTENDANCE}, got {bus['currentAttendance']}")
+    if not -90 <= bus['latitude'] <= 90:
+        raise ValueError(f"latitude out of range: {bus['latitude']}")
+    if not -180 <= bus['longitude'] <= 180:
+        raise ValueError(f"longitude out of range: {bus['longitude']}")
+
+    for name, value in row.items():
+        if name not in bus:
+            bus[name] = None if is_blank(value) else value
+    return bus
+
+def iter_xlsx_rows(file_path):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+def iter_csv_rows(file_path):
+    with open(file_path, newline='') as file:
+        yield from csv.reader(file)
+
+def iter_rows(file_path):
+    if file_path.endswith('.csv'):
+        return iter_csv_rows(file_path)
+    return iter_xlsx_rows(file_path)
+
+def read_buses(file_path, errors, max_errors=1000):
+    """
+    This function checks the header of a fleet file and returns its extra column
+    names and an iterator over the good rows as coerced bus dicts, in file order.
+    Skipped rows are added to errors as (row number, message); at most max_errors
+    are kept, the rest are only counted in the last entry.
+    """
+    rows = iter_rows(file_path)
+    header = next(rows, None)
+    if header is None:
+        return [], iter(())
+
+    header = [str(name).strip() if name is not None else '' for name in header]
+    missing = [name for name in REQUIRED_FIELDS if name not in header]
+    if missing:
+        raise ValueError(f"{file_path} is missing required columns: {', '.join(missing)}")
+    return [name for name in header if name and name not in FIELDS], coerce_rows(rows, header, errors, max_errors)
+
+def coerce_rows(rows, header, errors, max_errors):
+    seen = set()
+    skipped = 0
+    for row_number, values in enumerate(rows, start=2):
+        if all(is_blank(value) for value in values):
+            continue
+        try:
+            bus = coerce_row({name: value for name, value in zip(header, values) if name})
+            if bus['id'] in seen:
+                raise ValueError(f"duplicate id {bus['id']}")
+        except (TypeError, ValueError) as e:
+            skipped += 1
+            if len(errors) < max_errors:
+                errors.append((row_number, str(e)))
+            continue
+        seen.add(bus['id'])
+        yield bus
+
+    if skipped > len(errors):
+        errors.append((None, f"{skipped - len(errors)} more bad rows not listed"))
+
+def import_fleet(file_path, max_errors=1000):
+    """
+    This function reads a fleet spreadsheet or CSV in one pass into a columnar
+    Fleet. It returns the Fleet and a list of (row number, message) for the rows
+    it skipped.
+    """
+    errors = []
+    extra_fields, buses = read_buses(file_path, errors, max_errors)
+    fleet = Fleet(extra_fields=extra_fields)
+    for bus in buses:
+        fleet.append(bus)
+    return fleet, errors
+
+def import_buses(file_path, max_errors=1000):
+    """
+    This function reads a fleet file in one pass straight into Bus records, for
+    the app and the CLI, which work on records; no Fleet is built alongside them.
+    It returns the records and the skipped rows like import_fleet.
+    """
+    errors = []
+    _, buses = read_buses(file_path, errors, max_errors)
+    return [Bus.from_dict(bus) for bus in buses], errors
@@ -1,195 +1,173 @@
 import os
+import csv
+import sys
 import json
-import requests
-import pandas as pd
-import pyttsx3
+import time
+import argparse
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from twilio.rest import Client
+
+# requests, openpyxl and twilio are imported on first use so the CLI starts quickly
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Load API key from environment variable
-GOOGLE_MAPS_API_KEY = os.getenv('GOOGLE_MAPS_API_KEY')
-
-# Initialize the text-to-speech engine
-engine = pyttsx3.init()
-
-# Set the voice (optional)
-voices = engine.getProperty('voices')
-if len(voices) > 1:
-    engine.setProperty('voice', voices[1].id)  # Use second voice if available
-else:
-    engine.setProperty('voice', voices[0].id)
+# The allocation engine reads its API keys from the environment when imported
+from allocation import AllocationEngine, get_approval_policy, prompt_admin
+from rate_limit import SWEEP
+from reservations import action_key
 
-# Twilio credentials
-TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID')
-TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')
-TWILIO_PHONE_NUMBER = os.getenv('TWILIO_PHONE_NUMBER')
+# Distance Matrix searches and Twilio calls; the admin is asked at the console
+# unless --batch picks an approval policy
+allocator = AllocationEngine(approve=prompt_admin)
 
-# Initialize Twilio client
-twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+# Actions of the allocation policy (policy.py) under the names the CLI prints
+POLICY_ACTIONS = {'Reallocation': "reallocate", 'Combination': "combine"}
 
-def load_bus_data(filepath):
-    # Get the directory of the current script
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    full_path = os.path.join(current_dir, filepath)
-    
-    with open(full_path, 'r') as file:
-        buses = json.load(file)
+def load_fleet(file_path):
+    """
+    This function loads Bus records from an .xlsx, .csv or .json file.
+    """
+    from fleet import Bus
+    if file_path.endswith('.json'):
+        with open(file_path, 'r') as file:
+            return [Bus.from_dict(bus) for bus in json.load(file)]
+
+    from fleet_import import import_buses
+    buses, errors = import_buses(file_path)
+    for row_number, message in errors:
+        print(f"Warning: skipped row {row_number} of {file_path}: {message}")
     return buses
 
-def speak(text):
+BATCH_FIELDS = ['bus_id', 'action', 'nearby_bus_id', 'distance', 'approved', 'notified', 'search_ms', 'notify_ms']
+
+def rank_candidates(current_bus, buses):
     """
-    This function converts text to speech using pyttsx3.
+    This function fetches and caches the nearest-first ranking for one bus and
+    times it. It only reads the fleet snapshot, so it is safe to run on a worker
+    thread.
     """
-    engine.say(text)
-    engine.runAndWait()
+    start = time.perf_counter()
+    allocator.rank_nearby_buses(current_bus, buses)
+    return (time.perf_counter() - start) * 1000
 
-def notify_driver(driver, driver_phone, message):
+def run_batch(buses, approve, workers=8, dry_run=False):
     """
-    This function sends a notification to the driver via phone call.
+    This function processes every flagged bus without prompting. Distances are
+    fetched in parallel, but seats are held, decided on and notified in input
+    order, the way the web app's sweep holds them, so two approvals never fill
+    the same seats and the output only depends on the input file.
     """
-    print(f"Initiating call to {driver}: {message}")
-    call_driver(driver_phone, f"Notification for {driver}. {message}")
-
-def request_admin_approval(current_bus, nearby_bus, action):
-    if action == "reallocate":
-        print(f"Requesting admin approval to reallocate students from Bus {current_bus['id']} to Bus {nearby_bus['id']}.")
-    elif action == "combine":
-        print(f"Requesting admin approval to combine Bus {current_bus['id']} with Bus {nearby_bus['id']}.")
-    
-    admin_approval = input(f"Does the admin approve the {action} action? (yes/no): ").lower()
-    return admin_approval == "yes"
-
-def find_nearby_bus(current_bus, buses, find_empty=True):
-    if not GOOGLE_MAPS_API_KEY:
-        print("Error: GOOGLE_MAPS_API_KEY not found in environment variables")
-        return None, float('inf')
-
-    try:
-        origins = f"{current_bus['latitude']},{current_bus['longitude']}"
-        destinations = "|".join([f"{bus['latitude']},{bus['longitude']}" for bus in buses if bus['id'] != current_bus['id']])
-        url = f"https://maps.googleapis.com/maps/api/distancematrix/json?origins={origins}&destinations={destinations}&key={GOOGLE_MAPS_API_KEY}"
-
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-
-        if 'rows' in data and data['rows']:
-            elements = data['rows'][0]['elements']
-            if len(elements) != len(buses) - 1:
-                print("Error: Mismatch between number of buses in Excel and distance elements")
-                return None, float('inf')
-
-            distances = [element['distance']['value'] for element in elements]
-            return process_excel_distances(current_bus, buses, distances, find_empty)
-        else:
-            print("Error: 'rows' not found in API response")
-            return None, float('inf')
-    except requests.exceptions.RequestException as e:
-        print(f"Error making API request: {e}")
-        return None, float('inf')
-    except ValueError as e:
-        print(f"Error processing API response: {e}")
-        return None, float('inf')
-
-def process_excel_distances(current_bus, buses, distances, find_empty):
-    min_distance = float('inf')
-    selected_bus = None
-
-    # Create a list of buses excluding the current bus
-    other_buses = [bus for bus in buses if bus['id'] != current_bus['id']]
-
-    for idx, bus in enumerate(other_buses):
-        if idx >= len(distances):
-            print("Warning: Distance data is missing for some buses in Excel.")
-            continue
-
-        if find_empty:
-            available_seats = bus['seatingCapacity'] - bus['currentAttendance']
-            if available_seats > 0 and distances[idx] < min_distance:
-                min_distance = distances[idx]
-                selected_bus = bus
-        else:
-            combined_attendance = current_bus['currentAttendance'] + bus['currentAttendance']
-            if combined_attendance <= max(current_bus['seatingCapacity'], bus['seatingCapacity']) and distances[idx] < min_distance:
-                min_distance = distances[idx]
-                selected_bus = bus
-
-    return selected_bus, min_distance
-
-def check_attendance_and_notify(current_bus, buses):
-    if current_bus['currentAttendance'] >= current_bus['seatingCapacity']:
-        handle_full_bus(current_bus, buses)
-    elif current_bus['currentAttendance'] < current_bus['seatingCapacity'] * 0.5:
-        handle_low_attendance_bus(current_bus, buses)
-
-def handle_full_bus(current_bus, buses):
-    print(f"Bus {current_bus['id']} is full. Looking for nearby bus...")
-    nearby_bus, distance = find_nearby_bus(current_bus, buses, find_empty=True)
-    if nearby_bus:
-        approved = request_admin_approval(current_bus, nearby_bus, "reallocate")
-        if approved:
-            print(f"Request approved. Notifying drivers {current_bus['driver']} and {nearby_bus['driver']}.")
-            notify_driver(current_bus['driver'], current_bus['phone'], f"Your bus is full. Students will be allocated to Bus {nearby_bus['id']}.")
-            notify_driver(nearby_bus['driver'], nearby_bus['phone'], f"Please pick up additional students from Bus {current_bus['id']}.")
-        else:
-            print("Request denied by admin.")
-    else:
-        print("No nearby bus with available seats found or unable to fetch nearby bus information.")
-
-def handle_low_attendance_bus(current_bus, buses):
-    print(f"Bus {current_bus['id']} has low attendance. Looking for nearby bus to combine...")
-    nearby_bus, distance = find_nearby_bus(current_bus, buses, find_empty=False)
-    if nearby_bus:
-        approved = request_admin_approval(current_bus, nearby_bus, "combine")
-        if approved:
-            print(f"Request approved. Notifying drivers {current_bus['driver']} and {nearby_bus['driver']}.")
-            notify_driver(current_bus['driver'], current_bus['phone'], f"Your bus will be combined with Bus {nearby_bus['id']}. Please proceed to the designated meeting point.")
-            notify_driver(nearby_bus['driver'], nearby_bus['phone'], f"Your bus will be combined with Bus {current_bus['id']}. Please proceed to the designated meeting point.")
-        else:
-            print("Request denied by admin.")
+    plan = allocator.evaluate(buses)
+    flagged = plan.flagged()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        ranking_ms = list(executor.map(lambda bus: rank_candidates(bus, buses), flagged))
+
+    suggestions = []
+    pending_bus_ids = set()
+    decisions = []
+    for current_bus, search_ms in zip(flagged, ranking_ms):
+        action = plan.action(current_bus)
+        start = time.perf_counter()
+        suggestion = allocator.suggest(current_bus, buses, suggestions, pending_bus_ids, plan)
+        search_ms += (time.perf_counter() - start) * 1000
+        nearby_bus = suggestion['nearby_bus_details'] if suggestion else None
+        distance = suggestion['distance'] if suggestion else float('inf')
+
+        approved = bool(nearby_bus) and approve(current_bus, nearby_bus, action, distance)
+        if nearby_bus and not approved:
+            # Denied seats are free again for the buses after this one
+            allocator.seat_ledger.release(action_key(current_bus.id, nearby_bus.id, action))
+        notified = False
+        notify_ms = 0.0
+        if approved and not dry_run:
+            start = time.perf_counter()
+            # Nobody is waiting on a batch run, so its calls yield to interactive ones
+            notified = allocator.notify(action, current_bus, nearby_bus, priority=SWEEP)
+            notify_ms = (time.perf_counter() - start) * 1000
+
+        decisions.append({
+            'bus_id': current_bus.id,
+            'action': POLICY_ACTIONS[action],
+            'nearby_bus_id': nearby_bus.id if nearby_bus else None,
+            'distance': distance if nearby_bus else None,
+            'approved': approved,
+            'notified': notified,
+            'search_ms': round(search_ms, 3),
+            'notify_ms': round(notify_ms, 3),
+        })
+    return decisions
+
+def write_decisions(decisions, output, output_format, include_timings=True):
+    fields = BATCH_FIELDS if include_timings else [field for field in BATCH_FIELDS if not field.endswith('_ms')]
+    if output_format == 'csv':
+        writer = csv.DictWriter(output, fieldnames=fields, extrasaction='ignore', lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(decisions)
     else:
-        print("No suitable nearby bus found for combining or unable to fetch nearby bus information.")
+        for decision in decisions:
+            output.write(json.dumps({field: decision[field] for field in fields}) + '\n')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Check bus attendance and suggest reallocations or combinations.')
+    parser.add_argument('--input', default='buses.xlsx', help='Bus data file (.xlsx, .csv or .json), relative to this script')
+    parser.add_argument('--batch', action='store_true', help='Run without prompting and decide with --policy')
+    parser.add_argument('--policy', choices=['all', 'none', 'max-distance'], default='none', help='Approval policy for --batch')
+    parser.add_argument('--max-distance', type=float, help='Largest distance in meters approved by --policy max-distance')
+    parser.add_argument('--workers', type=int, default=8, help='Parallel candidate searches in --batch')
+    parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson', help='Output format for --batch')
+    parser.add_argument('--output', default='-', help='Output file for --batch decisions ("-" for stdout)')
+    parser.add_argument('--dry-run', action='store_true', help='Record decisions without calling drivers')
+    parser.add_argument('--no-timings', action='store_true', help='Leave timings out so runs can be diffed')
+    parser.add_argument('--policy-file', help='Allocation policy JSON (thresholds and rules, see policy.py) instead of POLICY_FILE')
+    args = parser.parse_args(argv)
+    if args.policy == 'max-distance' and args.max_distance is None:
+        parser.error("--max-distance is required with --policy max-distance")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
 
-def call_driver(driver_phone, message):
-    """
-    This function makes a phone call to the driver and plays the message.
-    """
-    try:
-        call = twilio_client.calls.create(
-            to=driver_phone,
-            from_=TWILIO_PHONE_NUMBER,
-            twiml=f'<Response><Say>{message}</Say></Response>'
-        )
-        print(f"Call initiated to {driver_phone}. Call SID: {call.sid}")
-    except Exception as e:
-        print(f"Error making call to {driver_phone}: {e}")
-
-def main():
     # Get the directory of the current script
     current_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path = os.path.join(current_dir, 'buses.xlsx')  # Excel file path
+    file_path = os.path.join(current_dir, args.input)
 
     # Load bus data from the spreadsheet
     try:
-        buses_df = pd.read_excel(file_path)  # Read Excel file
+        buses = load_fleet(file_path)
     except FileNotFoundError:
         print(f"Error: The file {file_path} was not found.")
-        return
+        return 1
 
-    if buses_df.empty:
+    if not buses:
         print(f"Error: No bus data loaded. Check the {file_path} file.")
-        return
-
-    # Convert DataFrame to a list of dictionaries for easier processing
-    buses = buses_df.to_dict(orient='records')
+        return 1
+
+    if args.policy_file:
+        from policy import load_policy, set_policy
+        try:
+            set_policy(load_policy(args.policy_file))
+        except (OSError, ValueError) as e:
+            print(f"Error: could not load policy {args.policy_file}: {e}")
+            return 1
+
+    if args.batch:
+        approve = get_approval_policy(args.policy, args.max_distance)
+        # Progress messages go to stderr so stdout only carries the decisions
+        with contextlib.redirect_stdout(sys.stderr):
+            decisions = run_batch(buses, approve, workers=args.workers, dry_run=args.dry_run)
+        if args.output == '-':
+            write_decisions(decisions, sys.stdout, args.format, include_timings=not args.no_timings)
+        else:
+            with open(args.output, 'w', newline='') as output:
+                write_decisions(decisions, output, args.format, include_timings=not args.no_timings)
+        return 0
 
-    # Process all buses
-    for bus in buses:
-        # Call the function to check attendance and send notifications based on the bus data
-        check_attendance_and_notify(bus, buses)
+    # Process all buses the allocation policy flags, asking the admin about each
+    plan = allocator.evaluate(buses)
+    for bus in plan.flagged():
+        allocator.allocate(bus, buses, plan)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,313 @@
+import datetime
+import json
+import os
+import threading
+
+# Allocation rules from config. A policy file sets the default full and low
+# attendance thresholds and a list of rules that override them for some routes,
+# bus types or times of day, with an optional maximum detour and the bus types
+# students may be moved to. The file is compiled once into lookup tables; each
+# sweep evaluates the whole fleet in one pass (vectorized with numpy for large
+# fleets), and the file is recompiled only when it changes on disk.
+#
+# {
+#     "defaults": {"full_threshold": 1.0, "low_threshold": 0.5, "max_detour_meters": null},
+#     "compatible_bus_types": {"standard": ["standard", "ac"], "ac": ["ac"]},
+#     "rules": [
+#         {"name": "morning peak", "routes": ["R1", "R2"], "hours": ["07:00", "09:30"],
+#          "full_threshold": 0.95, "low_threshold": 0.3, "max_detour_meters": 4000}
+#     ]
+# }
+#
+# The first rule whose routes, bus types and hours all match a bus applies to it;
+# a rule without one of those keys matches any value. Hours may wrap past midnight.
+
+# Policy file, reloaded when its modification time changes (missing file: defaults only)
+POLICY_FILE = os.getenv('POLICY_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'policy.json'))
+
+# Thresholds used when the policy file does not set them, as fractions of seating capacity
+FULL_ATTENDANCE_THRESHOLD = float(os.getenv('FULL_ATTENDANCE_THRESHOLD', '1.0'))
+LOW_ATTENDANCE_THRESHOLD = float(os.getenv('LOW_ATTENDANCE_THRESHOLD', '0.5'))
+
+# Fleets at least this large are evaluated with numpy when it is installed
+VECTORIZE_MIN_BUSES = 256
+
+REALLOCATION = 'Reallocation'
+COMBINATION = 'Combination'
+ACTIONS = (None, REALLOCATION, COMBINATION)
+
+RULE_KEYS = {'name', 'routes', 'bus_types', 'hours', 'full_threshold', 'low_threshold', 'max_detour_meters'}
+
+# Compiled policy in use, the file modification time it was built from, and a
+# policy pinned by set_policy (simulation scenarios) that overrides the file
+active_policy = None
+active_modified = None
+pinned_policy = None
+policy_lock = threading.Lock()
+
+def parse_minutes(text):
+    if not isinstance(text, str) or text.count(':') != 1:
+        raise ValueError(f"time must be a \"HH:MM\" string, got {text!r}")
+    hours, minutes = (int(part) for part in text.split(':'))
+    value = hours * 60 + minutes
+    if not 0 <= minutes <= 59 or not 0 <= value <= 24 * 60:
+        raise ValueError(f"time out of range: {text}")
+    return value
+
+def parse_fraction(value, name):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise ValueError(f"{name} must be a non-negative number, got {value!r}")
+    return float(value)
+
+def parse_detour(value):
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise ValueError(f"max_detour_meters must be a positive number or null, got {value!r}")
+    return float(value)
+
+def parse_codes(value, name):
+    # Route and bus type codes are compared as strings, so 1 and "1" match
+    if value is None:
+        return None
+    if not isinstance(value, list):
+        raise ValueError(f"{name} must be a list")
+    return frozenset(str(code) for code in value)
+
+class BusRule:
+    """
+    The settings that apply to one bus in a sweep: its thresholds, how far a
+    candidate bus may be, and which bus types its students may move to.
+    """
+    __slots__ = ['name', 'full_threshold', 'low_threshold', 'max_detour_meters', 'compatible']
+
+    def __init__(self, name, full_threshold, low_threshold, max_detour_meters, compatible):
+        self.name = name
+        self.full_threshold = full_threshold
+        self.low_threshold = low_threshold
+        self.max_detour_meters = max_detour_meters
+        self.compatible = compatible
+
+    def accepts(self, candidate, distance):
+        if self.max_detour_meters is not None and distance > self.max_detour_meters:
+            return False
+        return self.compatible is None or str(candidate.busType) in self.compatible
+
+    def candidates(self, ranked):
+        """
+        This function filters a nearest-first ranking of (distance, bus) lazily,
+        stopping at the first bus beyond the maximum detour.
+        """
+        for distance, bus in ranked:
+            if self.max_detour_meters is not None and distance > self.max_detour_meters:
+                return
+            if self.compatible is None or str(bus.busType) in self.compatible:
+                yield distance, bus
+
+class CompiledRule:
+    __slots__ = ['name', 'routes', 'bus_types', 'start', 'end', 'full_threshold', 'low_threshold', 'max_detour_meters']
+
+    def active_at(self, minute):
+        if self.start is None:
+            return True
+        if self.start <= self.end:
+            return self.start <= minute < self.end
+        return minute >= self.start or minute < self.end
+
+    def matches(self, route, bus_type):
+        return (self.routes is None or route in self.routes) and (self.bus_types is None or bus_type in self.bus_types)
+
+def compile_rule(config, defaults, position):
+    unknown = set(config) - RULE_KEYS
+    if unknown:
+        raise ValueError(f"rule {position}: unknown keys {', '.join(sorted(unknown))}")
+    rule = CompiledRule()
+    rule.name = config.get('name', f"rule {position}")
+    rule.routes = parse_codes(config.get('routes'), 'routes')
+    rule.bus_types = parse_codes(config.get('bus_types'), 'bus_types')
+    rule.start = rule.end = None
+    if config.get('hours') is not None:
+        if not isinstance(config['hours'], list) or len(config['hours']) != 2:
+            raise ValueError(f"rule {position}: hours must be [\"HH:MM\", \"HH:MM\"]")
+        rule.start, rule.end = (parse_minutes(text) for text in config['hours'])
+    rule.full_threshold = parse_fraction(config.get('full_threshold', defaults.full_threshold), 'full_threshold')
+    rule.low_threshold = parse_fraction(config.get('low_threshold', defaults.low_threshold), 'low_threshold')
+    rule.max_detour_meters = parse_detour(config.get('max_detour_meters', defaults.max_detour_meters))
+    return rule
+
+class Policy:
+    def __init__(self, config=None):
+        """
+        This function compiles a policy config (the parsed policy file), raising
+        ValueError if any part of it is invalid.
+        """
+        config = config or {}
+        if not isinstance(config, dict):
+            raise ValueError("policy must be a JSON object")
+        defaults_config = config.get('defaults', {})
+        rules = config.get('rules', [])
+        compatible = config.get('compatible_bus_types', {})
+        if not isinstance(defaults_config, dict) or not isinstance(compatible, dict):
+            raise ValueError("defaults and compatible_bus_types must be objects")
+        if not isinstance(rules, list) or not all(isinstance(rule, dict) for rule in rules):
+            raise ValueError("rules must be a list of objects")
+        self.defaults = CompiledRule()
+        self.defaults.name = 'defaults'
+        self.defaults.routes = self.defaults.bus_types = self.defaults.start = self.defaults.end = None
+        self.defaults.full_threshold = parse_fraction(defaults_config.get('full_threshold', FULL_ATTENDANCE_THRESHOLD), 'full_threshold')
+        self.defaults.low_threshold = parse_fraction(defaults_config.get('low_threshold', LOW_ATTENDANCE_THRESHOLD), 'low_threshold')
+        self.defaults.max_detour_meters = parse_detour(defaults_config.get('max_detour_meters'))
+
+        self.rules = [compile_rule(rule, self.defaults, position) for position, rule in enumerate(rules, start=1)]
+        self.compatible_bus_types = {
+            str(bus_type): parse_codes(targets, f"compatible_bus_types[{bus_type}]")
+            for bus_type, targets in compatible.items()
+        }
+
+        # (active rule numbers, route, bus type) -> index into bus_rules; filled as fleets are evaluated
+        self.match_cache = {}
+        self.bus_rules = []
+        self.bus_rule_index = {}
+        self.lock = threading.Lock()
+
+    def bus_rule(self, rule_number, bus_type):
+        """
+        This function returns the index of the BusRule for a rule (None for the
+        defaults) applied to a bus type, creating it the first time.
+        """
+        key = (rule_number, bus_type)
+        with self.lock:
+            index = self.bus_rule_index.get(key)
+            if index is None:
+                rule = self.defaults if rule_number is None else self.rules[rule_number]
+                self.bus_rules.append(BusRule(
+                    rule.name, rule.full_threshold, rule.low_threshold, rule.max_detour_meters,
+                    self.compatible_bus_types.get(bus_type),
+                ))
+                index = self.bus_rule_index[key] = len(self.bus_rules) - 1
+            return index
+
+    def match(self, active, route, bus_type):
+        for rule_number in active:
+            if self.rules[rule_number].matches(route, bus_type):
+                return self.bus_rule(rule_number, bus_type)
+        return self.bus_rule(None, bus_type)
+
+    def evaluate(self, buses, now=None):
+        """
+        This function decides the action for every bus in one pass and returns a
+        SweepPlan. Rules are matched once per distinct route and bus type, then
+        the thresholds are compared for the whole fleet at once.
+        """
+        now = now or datetime.datetime.now()
+        minute = now.hour * 60 + now.minute
+        active = tuple(number for number, rule in enumerate(self.rules) if rule.active_at(minute))
+        matches = self.match_cache.get(active)
+        if matches is None:
+            matches = self.match_cache[active] = {}
+
+        # Keyed by the raw column values; they are only converted to str (as in the
+        # policy file) for the first bus with each route and bus type
+        rule_indexes = []
+        for bus in buses:
+            key = (bus.routeId, bus.busType)
+            index = matches.get(key)
+            if index is None:
+                index = matches[key] = self.match(active, *(None if value is None else str(value) for value in key))
+            rule_indexes.append(index)
+
+        np = get_numpy() if len(buses) >= VECTORIZE_MIN_BUSES else None
+        if np is not None:
+            capacity = np.fromiter((bus.seatingCapacity for bus in buses), dtype=float, count=len(buses))
+            attendance = np.fromiter((bus.currentAttendance for bus in buses), dtype=float, count=len(buses))
+            rule_array = np.array(rule_indexes, dtype=np.intp)
+            full_thresholds = np.array([rule.full_threshold for rule in self.bus_rules])[rule_array]
+            low_thresholds = np.array([rule.low_threshold for rule in self.bus_rules])[rule_array]
+            codes = np.where(attendance >= capacity * full_thresholds, 1, np.where(attendance < capacity * low_thresholds, 2, 0))
+            actions = [ACTIONS[code] for code in codes.tolist()]
+        else:
+            actions = []
+            for bus, index in zip(buses, rule_indexes):
+                rule = self.bus_rules[index]
+                if bus.currentAttendance >= bus.seatingCapacity * rule.full_threshold:
+                    actions.append(REALLOCATION)
+                elif bus.currentAttendance < bus.seatingCapacity * rule.low_threshold:
+                    actions.append(COMBINATION)
+                else:
+                    actions.append(None)
+        return SweepPlan(buses, actions, [self.bus_rules[index] for index in rule_indexes])
+
+class SweepPlan:
+    """
+    The result of evaluating a policy over a fleet: the action (Reallocation,
+    Combination or None) and the BusRule for every bus, looked up by bus ID.
+    """
+    def __init__(self, buses, actions, rules):
+        self.buses = buses
+        self.actions = actions
+        self.rules = rules
+        self.index = {bus.id: i for i, bus in enumerate(buses)}
+
+    def action(self, bus):
+        return self.actions[self.index[bus.id]]
+
+    def rule(self, bus):
+        return self.rules[self.index[bus.id]]
+
+    def flagged(self):
+        """
+        This function returns the buses that need an action, in fleet order.
+        """
+        return [bus for bus, action in zip(self.buses, self.actions) if action]
+
+numpy_module = None
+
+def get_numpy():
+    # numpy is optional and slow to import, so it is only loaded for large fleets
+    global numpy_module
+    if numpy_module is None:
+        try:
+            import numpy
+            numpy_module = numpy
+        except ImportError:
+            numpy_module = False
+    return numpy_module or None
+
+def load_policy(file_path=POLICY_FILE):
+    with open(file_path, 'r') as file:
+        return Policy(json.load(file))
+
+def get_policy(file_path=POLICY_FILE):
+    """
+    This function returns the compiled policy. The file is only stat-ed here and
+    recompiled when it has changed; if the new version is invalid, the previous
+    policy stays in use.
+    """
+    global active_policy, active_modified
+    if pinned_policy is not None:
+        return pinned_policy
+    try:
+        modified = os.path.getmtime(file_path)
+    except OSError:
+        modified = None
+
+    with policy_lock:
+        if active_policy is None or modified != active_modified:
+            try:
+                active_policy = load_policy(file_path) if modified is not None else Policy()
+                if modified is not None:
+                    print(f"Loaded allocation policy from {file_path} ({len(active_policy.rules)} rules)")
+            except (OSError, ValueError) as e:
+                print(f"Error loading policy {file_path}: {e}")
+                if active_policy is None:
+                    active_policy = Policy()
+            active_modified = modified
+        return active_policy
+
+def set_policy(policy):
+    """
+    This function pins a policy for this process in place of the policy file,
+    or goes back to the file when given None.
+    """
+    global pinned_policy
+    pinned_policy = policy
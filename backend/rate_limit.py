@@ -0,0 +1,253 @@
+import datetime
+import heapq
+import itertools
+import os
+import threading
+import time
+
+# Outbound call scheduling per provider (Distance Matrix, Twilio). Each provider
+# has one token bucket shared by every thread in the process: calls that find the
+# bucket empty wait in a priority queue instead of failing, so admin-triggered
+# calls go out before background sweep calls. A daily quota is counted on top of
+# the rate, with a warning once most of it is used. A call that would have to wait
+# longer than its timeout (such as for tomorrow's quota) fails at once instead of
+# sleeping out the timeout first. The quota count is kept in a
+# SQLite file, so the app, the CLI and zone workers draw on one count, and it
+# survives restarts.
+
+# Priority classes, lowest number first
+ADMIN = 0
+SWEEP = 1
+
+# Fraction of the daily quota after which a warning is printed
+QUOTA_WARNING_FRACTION = float(os.getenv('QUOTA_WARNING_FRACTION', '0.8'))
+
+# SQLite file holding the daily quota counts (empty keeps them in this process only)
+QUOTA_STATE_FILE = os.getenv('QUOTA_STATE_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'quota_usage.sqlite3'))
+
+# Longest a call waits for the rate limit or quota before giving up
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv('RATE_LIMIT_MAX_WAIT_SECONDS', '60'))
+
+# Distance Matrix requests per second, burst size and requests per day (0 means unlimited)
+MAPS_REQUESTS_PER_SECOND = float(os.getenv('MAPS_REQUESTS_PER_SECOND', '50'))
+MAPS_BURST = int(os.getenv('MAPS_BURST', '50'))
+MAPS_DAILY_QUOTA = int(os.getenv('MAPS_DAILY_QUOTA', '0'))
+
+# Twilio calls per second (Twilio's default is 1 call per second), burst size and calls per day
+TWILIO_CALLS_PER_SECOND = float(os.getenv('TWILIO_CALLS_PER_SECOND', '1'))
+TWILIO_BURST = int(os.getenv('TWILIO_BURST', '1'))
+TWILIO_DAILY_QUOTA = int(os.getenv('TWILIO_DAILY_QUOTA', '0'))
+
+# How often an async waiter re-checks the bucket while a higher-priority call is ahead of it
+ASYNC_POLL_SECONDS = 0.01
+
+class QuotaStore:
+    """
+    Calls per provider and day in a SQLite file. Every call takes one in its own
+    transaction, so processes sharing the file never go past the quota together.
+    The connection is opened on first use in each process.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.connection = None
+        self.pid = None
+
+    def get_connection(self):
+        if self.connection is None or self.pid != os.getpid():
+            import sqlite3
+            self.connection = sqlite3.connect(self.file_path, timeout=30, isolation_level=None, check_same_thread=False)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS quota_usage (provider TEXT, day TEXT, used INTEGER NOT NULL, PRIMARY KEY (provider, day))'
+            )
+            self.pid = os.getpid()
+        return self.connection
+
+    def used(self, provider, day):
+        row = self.get_connection().execute(
+            'SELECT used FROM quota_usage WHERE provider = ? AND day = ?', (provider, day.isoformat())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def take(self, provider, day, quota):
+        """
+        This function counts one call and returns the calls used today, or None
+        without counting if the quota is used up.
+        """
+        connection = self.get_connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            used = self.used(provider, day)
+            if used >= quota:
+                connection.execute('ROLLBACK')
+                return None
+            connection.execute(
+                'INSERT INTO quota_usage VALUES (?, ?, 1) ON CONFLICT (provider, day) DO UPDATE SET used = used + 1',
+                (provider, day.isoformat()),
+            )
+            connection.execute('COMMIT')
+            return used + 1
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+class RateLimiter:
+    def __init__(self, name, rate, burst, daily_quota=0, warning_fraction=QUOTA_WARNING_FRACTION, quota_file=QUOTA_STATE_FILE):
+        self.name = name
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.daily_quota = daily_quota
+        self.warning_fraction = warning_fraction
+        self.condition = threading.Condition()
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+        self.waiting = []  # heap of (priority, ticket number)
+        self.tickets = itertools.count()
+        self.day = datetime.date.today()
+        self.used_today = 0
+        self.warned = False
+        # Only a quota needs a count shared with other processes
+        self.quota_store = QuotaStore(quota_file) if daily_quota and quota_file else None
+
+    def _refill(self, now):
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def _roll_day(self):
+        today = datetime.date.today()
+        if today != self.day:
+            self.day = today
+            self.used_today = 0
+            self.warned = False
+
+    def _seconds_until_tomorrow(self):
+        now = datetime.datetime.now()
+        tomorrow = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time())
+        return (tomorrow - now).total_seconds()
+
+    def _poll(self, ticket):
+        """
+        This function grants the call if it is first in line and both the bucket
+        and the daily quota allow it. Returns 0 when granted, otherwise a guess of
+        how long to wait before trying again (None if another call is ahead).
+        """
+        if self.waiting[0] != ticket:
+            return None
+        self._roll_day()
+        if self.daily_quota and self.used_today >= self.daily_quota:
+            return self._seconds_until_tomorrow()
+
+        now = time.monotonic()
+        self._refill(now)
+        if self.rate > 0 and self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+
+        if self.quota_store is not None:
+            used = self.quota_store.take(self.name, self.day, self.daily_quota)
+            if used is None:
+                self.used_today = self.daily_quota
+                return self._seconds_until_tomorrow()
+            self.used_today = used
+        else:
+            self.used_today += 1
+        if self.rate > 0:
+            self.tokens -= 1
+        if self.daily_quota and not self.warned and self.used_today >= self.daily_quota * self.warning_fraction:
+            self.warned = True
+            print(f"Warning: {self.name} has used {self.used_today} of its {self.daily_quota} calls for today")
+        return 0
+
+    def _enter(self, priority):
+        ticket = (priority, next(self.tickets))
+        heapq.heappush(self.waiting, ticket)
+        return ticket
+
+    def _leave(self, ticket):
+        self.waiting.remove(ticket)
+        heapq.heapify(self.waiting)
+        self.condition.notify_all()
+
+    def acquire(self, priority=SWEEP, timeout=RATE_LIMIT_MAX_WAIT_SECONDS):
+        """
+        This function blocks until the call may go out and returns True, or returns
+        False if it is still queued after timeout seconds (None waits forever). It
+        returns False at once if the bucket or quota cannot allow the call in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            ticket = self._enter(priority)
+            try:
+                while True:
+                    wait = self._poll(ticket)
+                    if wait == 0:
+                        return True
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0 or (wait is not None and wait > remaining):
+                            return False
+                        wait = remaining if wait is None else wait
+                    self.condition.wait(wait)
+            finally:
+                self._leave(ticket)
+
+    async def acquire_async(self, priority=SWEEP, timeout=RATE_LIMIT_MAX_WAIT_SECONDS):
+        """
+        This function is acquire() for coroutines: it sleeps on the event loop
+        instead of blocking a thread while it waits.
+        """
+        import asyncio
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            ticket = self._enter(priority)
+        try:
+            while True:
+                with self.condition:
+                    wait = self._poll(ticket)
+                if wait == 0:
+                    return True
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or (wait is not None and wait > remaining):
+                        return False
+                wait = ASYNC_POLL_SECONDS if wait is None else wait
+                if deadline is not None:
+                    wait = min(wait, remaining)
+                await asyncio.sleep(wait)
+        finally:
+            with self.condition:
+                self._leave(ticket)
+
+    def usage(self):
+        with self.condition:
+            self._roll_day()
+            self._refill(time.monotonic())
+            if self.quota_store is not None:
+                self.used_today = self.quota_store.used(self.name, self.day)
+            return {
+                'provider': self.name,
+                'ratePerSecond': self.rate,
+                'usedToday': self.used_today,
+                'dailyQuota': self.daily_quota or None,
+                'remainingToday': max(self.daily_quota - self.used_today, 0) if self.daily_quota else None,
+                'queued': len(self.waiting),
+            }
+
+maps_limiter = RateLimiter('Distance Matrix API', MAPS_REQUESTS_PER_SECOND, MAPS_BURST, MAPS_DAILY_QUOTA)
+twilio_limiter = RateLimiter('Twilio', TWILIO_CALLS_PER_SECOND, TWILIO_BURST, TWILIO_DAILY_QUOTA)
+
+def share_between_processes(process_count):
+    """
+    This function gives a worker process its share of each provider's rate, so a
+    pool of zone sweep workers stays within the overall limit. Without a quota
+    file, the daily quota is shared out the same way; with one, every process
+    counts against the whole quota in the file.
+    """
+    for limiter in (maps_limiter, twilio_limiter):
+        with limiter.condition:
+            limiter.rate /= process_count
+            limiter.burst = max(limiter.burst // process_count, 1)
+            limiter.tokens = min(limiter.tokens, limiter.burst)
+            if limiter.daily_quota and limiter.quota_store is None:
+                limiter.daily_quota = max(limiter.daily_quota // process_count, 1)
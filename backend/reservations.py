@@ -0,0 +1,158 @@
+import os
+import threading
+import time
+
+# Tentative seat holds for suggested actions. When a sweep suggests moving
+# students onto a bus, those seats are held until the admin decides or the hold
+# expires, so two full buses are not both sent to the same last free seat.
+# Ranked neighbour lists are cached per bus so a re-route only walks further down
+# the list instead of asking the Distance Matrix API again.
+
+# How long a suggestion keeps its seats if nobody approves or denies it
+RESERVATION_TTL_SECONDS = float(os.getenv('RESERVATION_TTL_SECONDS', '900'))
+
+# How long ranked neighbour lists stay valid (buses move, so distances go stale)
+NEIGHBOUR_CACHE_TTL_SECONDS = float(os.getenv('NEIGHBOUR_CACHE_TTL_SECONDS', '300'))
+
+def action_key(current_bus_id, nearby_bus_id, action):
+    return str(current_bus_id), str(nearby_bus_id), action
+
+class SeatLedger:
+    def __init__(self, ttl_seconds=RESERVATION_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.holds = {}     # action key -> (bus id, seats, expires at)
+        self.reserved = {}  # bus id -> seats held across all actions
+
+    def _expire(self, now):
+        # Every hold gets the same TTL and is re-inserted when replaced, so holds
+        # are in expiry order and only the expired ones at the front are visited
+        expired = []
+        for key, (_, _, expires_at) in self.holds.items():
+            if expires_at > now:
+                break
+            expired.append(key)
+        for key in expired:
+            self._drop(key)
+
+    def _drop(self, key):
+        bus_id, seats, _ = self.holds.pop(key)
+        self.reserved[bus_id] -= seats
+        if not self.reserved[bus_id]:
+            del self.reserved[bus_id]
+
+    def reserved_seats(self, bus_id):
+        with self.lock:
+            self._expire(time.monotonic())
+            return self.reserved.get(str(bus_id), 0)
+
+    def try_reserve(self, key, bus_id, seats, free_seats):
+        """
+        This function holds seats on a bus if enough of its free seats are not
+        already held by other actions. Returns False without holding anything
+        otherwise.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self._expire(now)
+            if key in self.holds:
+                self._drop(key)
+            bus_id = str(bus_id)
+            if free_seats - self.reserved.get(bus_id, 0) < seats:
+                return False
+            self.holds[key] = (bus_id, seats, now + self.ttl_seconds)
+            self.reserved[bus_id] = self.reserved.get(bus_id, 0) + seats
+            return True
+
+    def held(self, key):
+        """
+        This function returns the seats an action holds, or None if it holds none.
+        """
+        with self.lock:
+            self._expire(time.monotonic())
+            hold = self.holds.get(key)
+            return None if hold is None else hold[1]
+
+    def release(self, key):
+        with self.lock:
+            if key in self.holds:
+                self._drop(key)
+
+    def clear(self):
+        with self.lock:
+            self.holds.clear()
+            self.reserved.clear()
+
+class NeighbourCache:
+    def __init__(self, ttl_seconds=NEIGHBOUR_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.ranked = {}  # bus id -> (computed at, [(distance, bus id), ...] nearest first)
+
+    def get(self, bus_id):
+        with self.lock:
+            entry = self.ranked.get(bus_id)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                return None
+            return entry[1]
+
+    def put(self, bus_id, ranked):
+        with self.lock:
+            self.ranked[bus_id] = (time.monotonic(), ranked)
+
+    def clear(self):
+        with self.lock:
+            self.ranked.clear()
+
+def seats_needed(action, current_bus):
+    """
+    This function returns how many seats an action needs on the nearby bus: the
+    overflow (at least one seat) for Reallocation, everyone for Combination.
+    """
+    if action == 'Reallocation':
+        return max(current_bus.currentAttendance - current_bus.seatingCapacity, 1)
+    return current_bus.currentAttendance
+
+def free_seats(action, current_bus, nearby_bus):
+    """
+    This function returns the seats an action can use on the nearby bus. A
+    combined bus runs with the larger of the two buses' capacity.
+    """
+    if action == 'Combination':
+        return max(current_bus.seatingCapacity, nearby_bus.seatingCapacity) - nearby_bus.currentAttendance
+    return nearby_bus.seatingCapacity - nearby_bus.currentAttendance
+
+def reserve_nearby_bus(ledger, current_bus, ranked, action):
+    """
+    This function walks the ranked neighbours nearest first and holds seats on the
+    first one that can take them. Returns (bus, distance, seats held), or
+    (None, inf, 0) if no neighbour has room left. ranked can be any iterable of
+    (distance, bus); it is walked once, so a lazy ranking stops early.
+
+    Reallocation needs the overflow (at least one seat) on a bus with free seats;
+    if no bus can take all of it, the nearest bus with any unheld seat takes what
+    it can. Combination needs the nearby bus to fit both buses' students plus
+    whatever is already held on it.
+    """
+    needed = seats_needed(action, current_bus)
+    if action == 'Reallocation':
+        partial = []  # nearer buses that can only take part of the overflow
+        for distance, bus in ranked:
+            free = free_seats(action, current_bus, bus)
+            seats = min(needed, free - ledger.reserved_seats(bus.id))
+            if seats < 1:
+                continue
+            if seats < needed:
+                partial.append((distance, bus, free))
+            elif ledger.try_reserve(action_key(current_bus.id, bus.id, action), bus.id, seats, free):
+                return bus, distance, seats
+        for distance, bus, free in partial:
+            seats = min(needed, free - ledger.reserved_seats(bus.id))
+            if seats >= 1 and ledger.try_reserve(action_key(current_bus.id, bus.id, action), bus.id, seats, free):
+                return bus, distance, seats
+    elif action == 'Combination':
+        for distance, bus in ranked:
+            key = action_key(current_bus.id, bus.id, action)
+            if ledger.try_reserve(key, bus.id, needed, free_seats(action, current_bus, bus)):
+                return bus, distance, needed
+    return None, float('inf'), 0
@@ -0,0 +1,215 @@
+import csv
+import os
+import threading
+from array import array
+
+# Seat-level allocation: which student sits in which seat of which bus.
+# Per-student state lives in flat arrays indexed by a dense student number, and
+# each bus keeps a bit-per-seat occupancy bitmap plus a stack of free seats, so
+# boarding and alighting are O(1) and 100k students fit in a few megabytes.
+
+# Optional student roster: CSV with student_id,bus_id columns
+STUDENTS_FILE = os.getenv('STUDENTS_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'students.csv'))
+
+NO_BUS = -1
+STANDING = -1
+
+class SeatMap:
+    def __init__(self):
+        self.lock = threading.RLock()
+
+        # Per bus, indexed by bus number
+        self.bus_index = {}
+        self.bus_ids = []
+        self.capacity = array('H')
+        self.occupied = []      # bytearray, one bit per seat
+        self.free_seats = []    # array('H') stack of free seat numbers
+        self.seat_student = []  # array('i'), student number per seat or -1
+        self.standing = []      # dict used as an ordered set of student numbers without a seat
+
+        # Per student, indexed by student number
+        self.student_index = {}
+        self.student_ids = []
+        self.student_bus = array('i')
+        self.student_seat = array('i')
+
+    @classmethod
+    def from_buses(cls, buses, students=None):
+        """
+        This function builds a seat map for the fleet. Students come from an
+        iterable of (student_id, bus_id) pairs; without one, each bus is filled with
+        numbered placeholder students up to its current attendance. Students of a
+        bus that is not in the fleet are skipped with a warning.
+        """
+        seat_map = cls()
+        for bus in buses:
+            seat_map.add_bus(bus.id, int(bus.seatingCapacity))
+
+        if students is None:
+            next_student = 0
+            for bus in buses:
+                for _ in range(int(bus.currentAttendance)):
+                    seat_map.board(next_student, bus.id)
+                    next_student += 1
+        else:
+            unknown = 0
+            for student_id, bus_id in students:
+                if bus_id not in seat_map.bus_index:
+                    unknown += 1
+                    continue
+                seat_map.board(student_id, bus_id)
+            if unknown:
+                print(f"Warning: skipped {unknown} roster rows whose bus_id is not in the fleet")
+        return seat_map
+
+    def add_bus(self, bus_id, capacity):
+        self.bus_index[bus_id] = len(self.bus_ids)
+        self.bus_ids.append(bus_id)
+        self.capacity.append(capacity)
+        self.occupied.append(bytearray((capacity + 7) // 8))
+        # Highest seat at the bottom so seat 0 is handed out first
+        self.free_seats.append(array('H', range(capacity - 1, -1, -1)))
+        self.seat_student.append(array('i', [NO_BUS]) * capacity)
+        self.standing.append({})
+
+    def _student(self, student_id):
+        number = self.student_index.get(student_id)
+        if number is None:
+            number = len(self.student_ids)
+            self.student_index[student_id] = number
+            self.student_ids.append(student_id)
+            self.student_bus.append(NO_BUS)
+            self.student_seat.append(STANDING)
+        return number
+
+    def _seat(self, student, bus):
+        if self.free_seats[bus]:
+            seat = self.free_seats[bus].pop()
+            self.occupied[bus][seat >> 3] |= 1 << (seat & 7)
+            self.seat_student[bus][seat] = student
+        else:
+            seat = STANDING
+            self.standing[bus][student] = None
+        self.student_bus[student] = bus
+        self.student_seat[student] = seat
+        return seat
+
+    def _unseat(self, student):
+        bus = self.student_bus[student]
+        seat = self.student_seat[student]
+        if seat == STANDING:
+            del self.standing[bus][student]
+        else:
+            self.occupied[bus][seat >> 3] &= ~(1 << (seat & 7)) & 0xFF
+            self.seat_student[bus][seat] = NO_BUS
+            self.free_seats[bus].append(seat)
+        self.student_bus[student] = NO_BUS
+        self.student_seat[student] = STANDING
+        return bus
+
+    def board(self, student_id, bus_id):
+        """
+        This function puts a student on a bus and returns the seat number, or -1
+        if the bus is full and the student has to stand.
+        """
+        with self.lock:
+            student = self._student(student_id)
+            if self.student_bus[student] != NO_BUS:
+                self._unseat(student)
+            return self._seat(student, self.bus_index[bus_id])
+
+    def alight(self, student_id):
+        with self.lock:
+            student = self.student_index[student_id]
+            if self.student_bus[student] == NO_BUS:
+                return None
+            return self.bus_ids[self._unseat(student)]
+
+    def locate(self, student_id):
+        """
+        This function returns (bus_id, seat) for a student, or None if they are
+        not on a bus. Standing students have seat -1.
+        """
+        student = self.student_index.get(student_id)
+        if student is None or self.student_bus[student] == NO_BUS:
+            return None
+        return self.bus_ids[self.student_bus[student]], self.student_seat[student]
+
+    def is_occupied(self, bus_id, seat):
+        return bool(self.occupied[self.bus_index[bus_id]][seat >> 3] & (1 << (seat & 7)))
+
+    def occupancy(self, bus_id):
+        bus = self.bus_index[bus_id]
+        free = len(self.free_seats[bus])
+        return {
+            'bus_id': bus_id,
+            'seatingCapacity': self.capacity[bus],
+            'seated': self.capacity[bus] - free,
+            'standing': len(self.standing[bus]),
+            'freeSeats': free,
+        }
+
+    def attendance(self, bus_id):
+        # Seated and standing students, the seat map's currentAttendance
+        bus = self.bus_index[bus_id]
+        return self.capacity[bus] - len(self.free_seats[bus]) + len(self.standing[bus])
+
+    def overflow_count(self, action, current_bus_id, nearby_bus_id):
+        """
+        This function returns how many students an action moves. Reallocation moves
+        the standing students of the current bus, up to the free seats on the nearby
+        bus. Combination moves everyone on the current bus.
+        """
+        current = self.bus_index[current_bus_id]
+        nearby = self.bus_index[nearby_bus_id]
+        if action == 'Reallocation':
+            return min(len(self.standing[current]), len(self.free_seats[nearby]))
+        if action == 'Combination':
+            return self.capacity[current] - len(self.free_seats[current]) + len(self.standing[current])
+        raise ValueError(f"Unknown action: {action}")
+
+    def move(self, current_bus_id, nearby_bus_id, count):
+        """
+        This function moves count students from one bus to another, standing
+        students first. Both buses change under one lock, so other requests see the
+        fleet either before or after the move.
+        """
+        with self.lock:
+            current = self.bus_index[current_bus_id]
+            nearby = self.bus_index[nearby_bus_id]
+            on_board = self.capacity[current] - len(self.free_seats[current]) + len(self.standing[current])
+            if count > on_board:
+                raise ValueError(f"Bus {current_bus_id} has only {on_board} students, cannot move {count}.")
+
+            moving = list(self.standing[current])[:count]
+            if len(moving) < count:
+                seats = self.seat_student[current]
+                for seat in range(self.capacity[current] - 1, -1, -1):
+                    if seats[seat] != NO_BUS:
+                        moving.append(seats[seat])
+                        if len(moving) == count:
+                            break
+
+            for student in moving:
+                self._unseat(student)
+                self._seat(student, nearby)
+            return len(moving)
+
+    def apply_action(self, action, current_bus_id, nearby_bus_id):
+        """
+        This function carries out an approved Reallocation or Combination and
+        returns the number of students moved.
+        """
+        with self.lock:
+            count = self.overflow_count(action, current_bus_id, nearby_bus_id)
+            return self.move(current_bus_id, nearby_bus_id, count)
+
+def load_students(file_path=STUDENTS_FILE):
+    """
+    This function yields (student_id, bus_id) pairs from the roster CSV. Bus IDs
+    that look like numbers are converted so they match the spreadsheet IDs.
+    """
+    with open(file_path, newline='') as file:
+        for row in csv.DictReader(file):
+            bus_id = row['bus_id']
+            yield row['student_id'], int(bus_id) if bus_id.isdigit() else bus_id
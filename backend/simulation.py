@@ -0,0 +1,269 @@
+import contextlib
+import csv
+import datetime
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from allocation import AllocationEngine, StraightLineDistances, get_approval_policy
+from fleet_import import is_blank, to_code, to_int
+
+# What-if simulation for capacity planning. A day of attendance and position
+# snapshots is replayed through the allocation engine (allocation/), once per
+# scenario, with straight-line distances instead of the Distance Matrix API.
+# Scenarios change the thresholds, the approval policy or retire buses, and run
+# in parallel worker processes; nothing touches the live pending actions.
+
+HISTORY_FIELDS = ['timestamp', 'bus_id', 'currentAttendance', 'latitude', 'longitude']
+
+# Worker processes for scenarios (defaults to the number of cores)
+SIMULATION_WORKERS = int(os.getenv('SIMULATION_WORKERS', '0')) or None
+
+# Fleet and history for the scenarios run in this process (set by load_day)
+day_fleet = None
+day_ticks = None
+
+def append_history(buses, file_path, timestamp=None):
+    """
+    This function appends one snapshot of every bus to the history CSV.
+    """
+    timestamp = timestamp or datetime.datetime.now().isoformat(timespec='seconds')
+    write_header = not os.path.exists(file_path)
+    with open(file_path, 'a', newline='') as file:
+        writer = csv.writer(file)
+        if write_header:
+            writer.writerow(HISTORY_FIELDS)
+        for bus in buses:
+            writer.writerow([timestamp, bus.id, bus.currentAttendance, bus.latitude, bus.longitude])
+
+def load_history(file_path):
+    """
+    This function reads a history CSV into ticks: [(timestamp, [(bus_id,
+    attendance, latitude, longitude), ...]), ...] in time order. Latitude and
+    longitude are None when a row has no position.
+    """
+    ticks = {}
+    with open(file_path, newline='') as file:
+        for row in csv.DictReader(file):
+            position = (None, None)
+            if not is_blank(row.get('latitude')) and not is_blank(row.get('longitude')):
+                position = (float(row['latitude']), float(row['longitude']))
+            ticks.setdefault(row['timestamp'], []).append(
+                (to_code(row['bus_id']), to_int(row['currentAttendance'], 'currentAttendance'), *position)
+            )
+    return sorted(ticks.items())
+
+def load_day(fleet, ticks):
+    global day_fleet, day_ticks
+    day_fleet = fleet
+    day_ticks = ticks
+
+def lowest_attendance(fleet, ticks, count):
+    """
+    This function returns the IDs of the count buses with the lowest average
+    attendance as a share of their seats over the day.
+    """
+    capacity = {bus.id: bus.seatingCapacity for bus in fleet}
+    totals = {bus.id: 0 for bus in fleet}
+    for _, rows in ticks:
+        for bus_id, attendance, _, _ in rows:
+            if bus_id in totals:
+                totals[bus_id] += attendance
+    return sorted(totals, key=lambda bus_id: (totals[bus_id] / capacity[bus_id], str(bus_id)))[:count]
+
+def run_scenario(scenario):
+    """
+    This function replays the loaded day for one scenario and returns its report.
+
+    Scenario keys (all optional): name; allocation rules as in the policy file
+    (see policy.py), either inline under "rules" or as a "policy_file", with
+    low_threshold and full_threshold overriding its defaults; policy ("all",
+    "none" or "max-distance") with max_distance in meters for approvals; retire
+    (list of bus IDs) and retire_lowest (retire that many of the least used
+    buses). Students of retired buses board the nearest bus still in service;
+    with none left, they count as standing. Raises ValueError if retire names a
+    bus that is not in the fleet.
+    """
+    from fleet import Bus
+
+    start = time.perf_counter()
+    allocation_policy = scenario_policy(scenario)
+    distances = StraightLineDistances()
+    # Suggestions are approved below, after each tick's sweep
+    allocator = AllocationEngine(distances=distances, policy=allocation_policy)
+    approve = get_approval_policy(scenario.get('policy', 'all'), scenario.get('max_distance'))
+
+    retired = {str(bus_id) for bus_id in scenario.get('retire', [])}
+    unknown = retired - {str(bus.id) for bus in day_fleet}
+    if unknown:
+        raise ValueError(f"Scenario {scenario.get('name', 'unnamed')} retires buses not in the fleet: {', '.join(sorted(unknown))}")
+    if scenario.get('retire_lowest'):
+        retired.update(str(bus_id) for bus_id in lowest_attendance(day_fleet, day_ticks, scenario['retire_lowest']))
+    # Copies, so attendance changes stay inside this scenario
+    buses = [Bus.from_dict(bus.to_dict()) for bus in day_fleet if str(bus.id) not in retired]
+    by_id = {bus.id: bus for bus in buses}
+    reported = {bus.id: bus.currentAttendance for bus in buses}
+    retired_positions = {str(bus.id): (bus.latitude, bus.longitude) for bus in day_fleet if str(bus.id) in retired}
+
+    report = {
+        'scenario': scenario.get('name', 'unnamed'),
+        'buses': len(buses),
+        'retired': len(day_fleet) - len(buses),
+        'ticks': len(day_ticks),
+        'actions': 0,
+        'reallocations': 0,
+        'combinations': 0,
+        'approved': 0,
+        'students_moved': 0,
+        'distance_km': 0.0,
+        'seat_utilization': 0.0,
+        'peak_standing': 0,
+    }
+    utilization_total = 0.0
+    for timestamp, rows in day_ticks:
+        displaced = []
+        for bus_id, attendance, latitude, longitude in rows:
+            bus = by_id.get(bus_id)
+            if bus is None:
+                if str(bus_id) in retired:
+                    if latitude is not None:
+                        retired_positions[str(bus_id)] = (latitude, longitude)
+                    displaced.append((attendance, *retired_positions[str(bus_id)]))
+                continue
+            reported[bus_id] = attendance
+            if latitude is not None:
+                bus.latitude, bus.longitude = latitude, longitude
+        for bus in buses:
+            bus.currentAttendance = reported[bus.id]
+
+        distances.set_positions(buses)
+        stranded = 0
+        for attendance, latitude, longitude in displaced:
+            if buses:
+                distances.nearest(latitude, longitude).currentAttendance += attendance
+            else:
+                stranded += attendance
+
+        allocator.seat_ledger.clear()
+        allocator.neighbour_cache.clear()
+        actions = []
+        pending_bus_ids = set()
+        plan = allocator.evaluate(buses, tick_time(timestamp))
+        with contextlib.redirect_stdout(io.StringIO()):
+            for bus in plan.flagged():
+                allocator.suggest(bus, buses, actions, pending_bus_ids, plan)
+
+        combined = set()
+        for action in actions:
+            report['actions'] += 1
+            report['reallocations' if action['action'] == 'Reallocation' else 'combinations'] += 1
+            current_bus = by_id[action['current_bus_id']]
+            nearby_bus = by_id[action['nearby_bus_id']]
+            if not approve(current_bus, nearby_bus, action['action'], action['distance']):
+                continue
+            if action['action'] == 'Reallocation':
+                moved = min(action['reserved_seats'], current_bus.currentAttendance)
+            else:
+                moved = current_bus.currentAttendance
+                combined.add(current_bus.id)
+            current_bus.currentAttendance -= moved
+            nearby_bus.currentAttendance += moved
+            report['approved'] += 1
+            report['students_moved'] += moved
+            report['distance_km'] += action['distance'] / 1000
+
+        in_service = [bus for bus in buses if bus.id not in combined]
+        seats = sum(bus.seatingCapacity for bus in in_service)
+        seated = sum(min(bus.currentAttendance, bus.seatingCapacity) for bus in in_service)
+        standing = stranded + sum(max(bus.currentAttendance - bus.seatingCapacity, 0) for bus in in_service)
+        utilization_total += seated / seats if seats else 0.0
+        report['peak_standing'] = max(report['peak_standing'], standing)
+
+    report['distance_km'] = round(report['distance_km'], 3)
+    report['seat_utilization'] = round(utilization_total / len(day_ticks), 4) if day_ticks else 0.0
+    report['seconds'] = round(time.perf_counter() - start, 3)
+    return report
+
+def scenario_policy(scenario):
+    """
+    This function compiles the allocation policy for a scenario.
+    """
+    from policy import Policy
+
+    config = {}
+    if scenario.get('policy_file'):
+        with open(scenario['policy_file'], 'r') as file:
+            config = json.load(file)
+    if 'rules' in scenario:
+        config['rules'] = scenario['rules']
+    defaults = dict(config.get('defaults', {}))
+    for name in ('full_threshold', 'low_threshold'):
+        if name in scenario:
+            defaults[name] = scenario[name]
+    config['defaults'] = defaults
+    return Policy(config)
+
+def tick_time(timestamp):
+    # Time-of-day rules follow the recorded time, not the time the simulation runs
+    try:
+        return datetime.datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+
+def run_scenarios(fleet, ticks, scenarios, workers=SIMULATION_WORKERS):
+    """
+    This function runs every scenario against the same day, in parallel when
+    there is more than one, and returns the reports in scenario order.
+    """
+    if len(scenarios) <= 1:
+        load_day(fleet, ticks)
+        return [run_scenario(scenario) for scenario in scenarios]
+
+    process_count = min(workers or os.cpu_count() or 1, len(scenarios))
+    with ProcessPoolExecutor(max_workers=process_count, initializer=load_day, initargs=(fleet, ticks)) as executor:
+        return list(executor.map(run_scenario, scenarios))
+
+REPORT_FIELDS = ['scenario', 'buses', 'retired', 'ticks', 'actions', 'reallocations', 'combinations', 'approved',
+                 'students_moved', 'distance_km', 'seat_utilization', 'peak_standing', 'seconds']
+
+def load_scenarios(file_path):
+    """
+    This function reads a JSON list of scenarios and puts a baseline (current
+    settings) first if the file does not define one.
+    """
+    scenarios = []
+    if file_path:
+        with open(file_path, 'r') as file:
+            scenarios = json.load(file)
+    if not any(scenario.get('name') == 'baseline' for scenario in scenarios):
+        scenarios.insert(0, {'name': 'baseline'})
+    return scenarios
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+    from main import load_fleet
+
+    parser = argparse.ArgumentParser(description='Replay a day of bus history under what-if scenarios.')
+    parser.add_argument('--history', required=True, help='History CSV (timestamp,bus_id,currentAttendance,latitude,longitude)')
+    parser.add_argument('--fleet', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'buses.xlsx'),
+                        help='Fleet file (.xlsx, .csv or .json)')
+    parser.add_argument('--scenarios', help='JSON list of scenarios; a baseline is always included')
+    parser.add_argument('--workers', type=int, default=SIMULATION_WORKERS)
+    parser.add_argument('--format', choices=['table', 'csv'], default='table')
+    args = parser.parse_args()
+
+    reports = run_scenarios(load_fleet(args.fleet), load_history(args.history), load_scenarios(args.scenarios), args.workers)
+    if args.format == 'csv':
+        writer = csv.DictWriter(sys.stdout, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(reports)
+    else:
+        for report in reports:
+            print(f"{report['scenario']}: {report['actions']} actions ({report['reallocations']} reallocations, "
+                  f"{report['combinations']} combinations), {report['approved']} approved, "
+                  f"{report['students_moved']} students moved, {report['distance_km']} km, "
+                  f"{report['seat_utilization']:.1%} of seats used, peak {report['peak_standing']} standing "
+                  f"[{report['buses']} buses, {report['retired']} retired, {report['seconds']}s]")
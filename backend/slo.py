@@ -0,0 +1,259 @@
+import math
+import os
+import threading
+import time
+from array import array
+
+# Pending-action lifecycle timing. Every suggested action is timed from when it is
+# created to when an admin first views it, decides on it, and its driver calls go
+# out. Each stage keeps rolling percentiles in fixed-size log-bucket sketches, so
+# memory stays the same however many actions go through. Actions still waiting
+# after the decision SLO are escalated by the web app (see app.py).
+
+# Seconds an action may wait for an admin decision (0 turns escalation off)
+SLO_DECISION_SECONDS = float(os.getenv('SLO_DECISION_SECONDS', '300'))
+
+# What happens to an action past the SLO: 'renotify' calls the admin again,
+# 'auto-approve' approves it if the auto-approval policy agrees (and calls the
+# admin otherwise), 'none' only prints a warning
+SLO_ESCALATION = os.getenv('SLO_ESCALATION', 'renotify')
+
+# Approval strategy used by 'auto-approve' (see allocation/approval.py)
+SLO_AUTO_APPROVE_POLICY = os.getenv('SLO_AUTO_APPROVE_POLICY', 'all')
+SLO_AUTO_APPROVE_MAX_DISTANCE = float(os.environ['SLO_AUTO_APPROVE_MAX_DISTANCE']) if os.getenv('SLO_AUTO_APPROVE_MAX_DISTANCE') else None
+
+# Phone number called about overdue actions
+ADMIN_PHONE = os.getenv('ADMIN_PHONE')
+
+# How often pending actions are checked against the SLO
+SLO_CHECK_INTERVAL_SECONDS = float(os.getenv('SLO_CHECK_INTERVAL_SECONDS', '15'))
+
+# Percentiles cover the last SLO_WINDOWS windows of SLO_WINDOW_SECONDS each
+SLO_WINDOW_SECONDS = float(os.getenv('SLO_WINDOW_SECONDS', '300'))
+SLO_WINDOWS = int(os.getenv('SLO_WINDOWS', '12'))
+
+# Relative error of the reported percentiles, and the range of latencies the sketches resolve
+SKETCH_RELATIVE_ACCURACY = 0.02
+SKETCH_MIN_SECONDS = 0.01
+SKETCH_MAX_SECONDS = 7 * 24 * 3600
+
+# Actions with no decision or delivery for this long are no longer tracked
+SLO_FORGET_AFTER_SECONDS = float(os.getenv('SLO_FORGET_AFTER_SECONDS', '86400'))
+
+# Reported stages: name -> (start event, end event)
+STAGES = {
+    'firstView': ('created', 'viewed'),
+    'decision': ('created', 'decided'),
+    'notification': ('decided', 'notified'),
+    'endToEnd': ('created', 'notified'),
+}
+
+PERCENTILES = {'p50': 0.5, 'p90': 0.9, 'p99': 0.99}
+
+class LatencySketch:
+    """
+    Counts latencies in buckets whose bounds grow by a constant factor, so any
+    quantile is within SKETCH_RELATIVE_ACCURACY of the true value and the size
+    depends only on the range covered, not on how many values were added.
+    """
+    def __init__(self, relative_accuracy=SKETCH_RELATIVE_ACCURACY, min_value=SKETCH_MIN_SECONDS, max_value=SKETCH_MAX_SECONDS):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.offset = math.ceil(math.log(min_value) / self.log_gamma)
+        size = math.ceil(math.log(max_value) / self.log_gamma) - self.offset + 1
+        self.buckets = array('I', bytes(4 * size))
+        self.count = 0
+        self.max = 0.0
+
+    def bucket(self, value):
+        if value <= 0:
+            return 0
+        index = math.ceil(math.log(value) / self.log_gamma) - self.offset
+        return min(max(index, 0), len(self.buckets) - 1)
+
+    def add(self, value):
+        self.buckets[self.bucket(value)] += 1
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        for i, count in enumerate(other.buckets):
+            if count:
+                self.buckets[i] += count
+        self.count += other.count
+        self.max = max(self.max, other.max)
+
+    def clear(self):
+        for i in range(len(self.buckets)):
+            self.buckets[i] = 0
+        self.count = 0
+        self.max = 0.0
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen > rank:
+                # Midpoint of the bucket (in relative terms), capped at the largest value seen
+                return min(2 * self.gamma ** (i + self.offset) / (self.gamma + 1), self.max)
+        return self.max
+
+    def fraction_at_most(self, value):
+        if not self.count:
+            return None
+        return sum(self.buckets[:self.bucket(value) + 1]) / self.count
+
+class RollingSketch:
+    """
+    A ring of sketches, one per window; a window is cleared when time comes back
+    around to its slot, so merged() covers the last windows * window_seconds.
+    """
+    def __init__(self, window_seconds=SLO_WINDOW_SECONDS, windows=SLO_WINDOWS):
+        self.window_seconds = window_seconds
+        self.sketches = [LatencySketch() for _ in range(max(windows, 1))]
+        self.epochs = [None] * len(self.sketches)
+
+    def add(self, value, now):
+        epoch = int(now // self.window_seconds)
+        slot = epoch % len(self.sketches)
+        if self.epochs[slot] != epoch:
+            self.sketches[slot].clear()
+            self.epochs[slot] = epoch
+        self.sketches[slot].add(value)
+
+    def merged(self, now):
+        epoch = int(now // self.window_seconds)
+        merged = LatencySketch()
+        for sketch, sketch_epoch in zip(self.sketches, self.epochs):
+            if sketch_epoch is not None and epoch - sketch_epoch < len(self.sketches):
+                merged.merge(sketch)
+        return merged
+
+class SloTracker:
+    """
+    Keeps a timeline per pending action, keyed like the seat holds
+    (reservations.action_key), and the rolling latency of every stage. Safe to
+    call from request handlers and the notification and escalation threads.
+    """
+    def __init__(self, slo_seconds=SLO_DECISION_SECONDS, clock=time.monotonic):
+        self.slo_seconds = slo_seconds
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.timelines = {}
+        self.stages = {stage: RollingSketch() for stage in STAGES}
+        self.outcomes = {'approved': 0, 'denied': 0, 'autoApproved': 0, 'expired': 0, 'escalations': 0, 'notifyFailed': 0}
+
+    def _record(self, timeline, event, now):
+        timeline[event] = now
+        for stage, (start, end) in STAGES.items():
+            if end == event and timeline.get(start) is not None:
+                self.stages[stage].add(now - timeline[start], now)
+
+    def created(self, keys):
+        now = self.clock()
+        with self.lock:
+            for key in keys:
+                if key not in self.timelines:
+                    self.timelines[key] = {'created': now, 'escalated': 0}
+
+    def viewed(self, keys):
+        now = self.clock()
+        with self.lock:
+            for key in keys:
+                timeline = self.timelines.get(key)
+                if timeline is not None and 'viewed' not in timeline:
+                    self._record(timeline, 'viewed', now)
+
+    def decided(self, key, approved, automatic=False):
+        """
+        This function records the decision on an action. A denied action is done;
+        an approved one stays until its driver calls have gone out.
+        """
+        now = self.clock()
+        with self.lock:
+            if automatic:
+                self.outcomes['autoApproved'] += 1
+            else:
+                self.outcomes['approved' if approved else 'denied'] += 1
+            timeline = self.timelines.get(key) if approved else self.timelines.pop(key, None)
+            if timeline is not None and 'decided' not in timeline:
+                self._record(timeline, 'decided', now)
+
+    def expired(self, keys):
+        # Actions whose seat holds ran out before a decision; they are not timed
+        with self.lock:
+            for key in keys:
+                if self.timelines.pop(key, None) is not None:
+                    self.outcomes['expired'] += 1
+
+    def notified(self, key, delivered=True):
+        now = self.clock()
+        with self.lock:
+            timeline = self.timelines.pop(key, None)
+            if not delivered:
+                self.outcomes['notifyFailed'] += 1
+            elif timeline is not None:
+                self._record(timeline, 'notified', now)
+
+    def age(self, key):
+        with self.lock:
+            timeline = self.timelines.get(key)
+            return None if timeline is None else self.clock() - timeline['created']
+
+    def overdue(self):
+        """
+        This function returns [(key, age in seconds), ...] for the actions still
+        waiting for a decision that have just passed the SLO, or another multiple
+        of it, so each is escalated once per SLO period. Timelines older than
+        SLO_FORGET_AFTER_SECONDS are dropped here.
+        """
+        now = self.clock()
+        overdue = []
+        with self.lock:
+            for key, timeline in list(self.timelines.items()):
+                age = now - timeline['created']
+                if age > SLO_FORGET_AFTER_SECONDS:
+                    del self.timelines[key]
+                    continue
+                if self.slo_seconds <= 0 or 'decided' in timeline:
+                    continue
+                periods = int(age // self.slo_seconds)
+                if periods > timeline['escalated']:
+                    timeline['escalated'] = periods
+                    self.outcomes['escalations'] += 1
+                    overdue.append((key, age))
+        return overdue
+
+    def summary(self):
+        """
+        This function returns the rolling percentiles of every stage in seconds,
+        the actions still waiting for a decision and the outcome counts, for the
+        /api/slo endpoint.
+        """
+        now = self.clock()
+        with self.lock:
+            stages = {}
+            for stage, rolling in self.stages.items():
+                sketch = rolling.merged(now)
+                stages[stage] = {'count': sketch.count, 'max': sketch.max if sketch.count else None}
+                for name, q in PERCENTILES.items():
+                    stages[stage][name] = sketch.quantile(q)
+                if stage == 'decision' and self.slo_seconds > 0:
+                    stages[stage]['withinSlo'] = sketch.fraction_at_most(self.slo_seconds)
+
+            waiting = [now - timeline['created'] for timeline in self.timelines.values() if 'decided' not in timeline]
+            return {
+                'sloSeconds': self.slo_seconds,
+                'escalation': SLO_ESCALATION,
+                'windowSeconds': SLO_WINDOW_SECONDS * SLO_WINDOWS,
+                'stages': stages,
+                'open': {
+                    'count': len(waiting),
+                    'oldestSeconds': max(waiting, default=None),
+                    'overSlo': sum(1 for age in waiting if self.slo_seconds > 0 and age > self.slo_seconds),
+                },
+                'outcomes': dict(self.outcomes),
+            }
@@ -13,6 +13,17 @@ function loadGoogleMaps(apiKey) {
     document.head.appendChild(script);
 }
 
+// College position, used for the map centre and as the route destination
+const collegePosition = { lat: 13.0382, lng: 80.0454 };
+
+// Markers on the map, keyed like the clusters from /api/bus-clusters
+const mapMarkers = new Map();
+let clusterRequestId = 0;
+
+// One renderer for the route of the bus that was clicked last
+let directionsService = null;
+let routeRenderer = null;
+
 // Initialize and add the map
 function initMap() {
     const collegeIcon = {
@@ -28,11 +39,10 @@ function initMap() {
 
     const map = new google.maps.Map(document.getElementById("map"), {
         zoom: 10,
-        center: { lat: 13.0382, lng: 80.0454 },
+        center: collegePosition,
     });
 
     // College marker
-    const collegePosition = { lat: 13.0382, lng: 80.0454 };
     new google.maps.Marker({
         position: collegePosition,
         map: map,
@@ -40,86 +50,104 @@ function initMap() {
         title: 'RIT Chennai'
     });
 
-    // Create a DirectionsService object
-    const directionsService = new google.maps.DirectionsService();
-    
-    fetch('/api/bus-locations')
-        .then(response => response.json())
-        .then(data => {
-            data.forEach(bus => {
-                const marker = new google.maps.Marker({
-                    position: { lat: bus.latitude, lng: bus.longitude },
-                    map: map,
-                    icon: busIcon,
-                    title: `Bus ID: ${bus.id}`
-                });
-
-                // Create a unique DirectionsRenderer for each bus
-                const directionsRenderer = new google.maps.DirectionsRenderer({
-                    map: map,
-                    suppressMarkers: true, // Don't show default markers
-                    polylineOptions: {
-                        strokeColor: "#0000FF",
-                        strokeOpacity: 0.8,
-                        strokeWeight: 3
-                    }
-                });
-
-                // Calculate and display route to college
-                const request = {
-                    origin: { lat: bus.latitude, lng: bus.longitude },
-                    destination: collegePosition,
-                    travelMode: google.maps.TravelMode.DRIVING
-                };
-
-                directionsService.route(request, (result, status) => {
-                    if (status === google.maps.DirectionsStatus.OK) {
-                        directionsRenderer.setDirections(result);
-                    }
-                });
-
-                // Add click event to show detailed route
-                marker.addListener('click', () => {
-                    showRoute(bus.id, map);
-                });
-            });
-        });
+    directionsService = new google.maps.DirectionsService();
+    routeRenderer = new google.maps.DirectionsRenderer({
+        map: map,
+        suppressMarkers: true, // Don't show default markers
+        polylineOptions: {
+            strokeColor: "#0000FF",
+            strokeOpacity: 0.8,
+            strokeWeight: 3
+        }
+    });
+
+    // Fetch the clusters for the visible area whenever the map stops moving
+    map.addListener('idle', () => loadBusClusters(map, busIcon));
 }
 
-// Function to show route from bus to center
-function showRoute(busId, map) {
-    fetch(`/api/route?bus_id=${busId}`)
+function loadBusClusters(map, busIcon) {
+    const bounds = map.getBounds();
+    if (!bounds) {
+        return;
+    }
+    const southWest = bounds.getSouthWest();
+    const northEast = bounds.getNorthEast();
+    const view = `${southWest.lat()},${southWest.lng()},${northEast.lat()},${northEast.lng()}`;
+    const requestId = ++clusterRequestId;
+    fetch(`/api/bus-clusters?zoom=${map.getZoom()}&bounds=${view}`)
         .then(response => response.json())
         .then(data => {
-            console.log('Route data:', data); // Debugging line
-            if (data.routes && data.routes.length > 0) {
-                const directionsService = new google.maps.DirectionsService();
-                const directionsRenderer = new google.maps.DirectionsRenderer();
-                directionsRenderer.setMap(map);
-
-                const route = data.routes[0];
-                const start = route.legs[0].start_location;
-                const end = route.legs[0].end_location;
-
-                const request = {
-                    origin: start,
-                    destination: end,
-                    travelMode: google.maps.TravelMode.DRIVING
-                };
-
-                directionsService.route(request, (result, status) => {
-                    if (status === google.maps.DirectionsStatus.OK) {
-                        directionsRenderer.setDirections(result);
-                    } else {
-                        console.error('Directions request failed due to:', status); // Debugging line
-                        alert('Could not display directions due to: ' + status);
-                    }
-                });
-            } else {
-                console.error('No route found'); // Debugging line
-                alert('No route found');
+            if (requestId !== clusterRequestId) {
+                return; // The map moved again while this request was in flight
             }
-        });
+            updateMarkers(map, busIcon, data.clusters);
+        })
+        .catch(error => console.error('Error:', error));
+}
+
+// Keyed update: markers whose key is still present are updated in place, the rest are removed
+function updateMarkers(map, busIcon, clusters) {
+    const seen = new Set();
+    clusters.forEach(cluster => {
+        seen.add(cluster.key);
+        let marker = mapMarkers.get(cluster.key);
+        if (!marker) {
+            marker = createMarker(map, busIcon, cluster);
+            mapMarkers.set(cluster.key, marker);
+        } else {
+            marker.setPosition({ lat: cluster.lat, lng: cluster.lng });
+        }
+        marker.set('cluster', cluster);
+        if (cluster.count > 1) {
+            marker.setLabel(String(cluster.count));
+            marker.setTitle(`${cluster.count} buses, ${cluster.currentAttendance} of ${cluster.seatingCapacity} seats used`);
+        } else {
+            marker.setTitle(`Bus ID: ${cluster.busId}`);
+        }
+    });
+    mapMarkers.forEach((marker, key) => {
+        if (!seen.has(key)) {
+            marker.setMap(null);
+            mapMarkers.delete(key);
+        }
+    });
+}
+
+function createMarker(map, busIcon, cluster) {
+    const marker = new google.maps.Marker({
+        position: { lat: cluster.lat, lng: cluster.lng },
+        map: map,
+        icon: cluster.count > 1 ? undefined : busIcon
+    });
+    marker.addListener('click', () => {
+        const current = marker.get('cluster');
+        if (current.count > 1) {
+            // Zoom in on the cluster to split it up
+            map.setCenter(marker.getPosition());
+            map.setZoom(map.getZoom() + 2);
+        } else {
+            showRoute(current);
+        }
+    });
+    return marker;
+}
+
+// Function to show the route from a bus to the college
+function showRoute(bus) {
+    const request = {
+        origin: { lat: bus.lat, lng: bus.lng },
+        destination: collegePosition,
+        travelMode: google.maps.TravelMode.DRIVING
+    };
+
+    directionsService.route(request, (result, status) => {
+        if (status === google.maps.DirectionsStatus.OK) {
+            routeRenderer.setDirections(result);
+        } else {
+            console.error('Directions request failed due to:', status); // Debugging line
+            alert('Could not display directions due to: ' + status);
+        }
+    });
 }
 
 // Load bus details into the table
@@ -168,61 +196,242 @@ window.onload = function() {
     loadBusDetails();
 };
 
-// Load pending actions into the table
+// Decisions staged in the table, keyed by action, until they are submitted together
+const stagedDecisions = new Map();
+
+function actionKey(action) {
+    return `${action.current_bus_id}:${action.nearby_bus_id}:${action.action}`;
+}
+
+// Pending actions in server order, and the rows built for them so far, keyed by actionKey
+let pendingActionList = [];
+const actionRows = new Map();
+
+// Actions the server was told have been on screen, so it can time when an admin first saw them
+const viewedActions = new Set();
+
+// Rows have a fixed height so only the slice in view has to be in the table
+const ACTION_ROW_HEIGHT = 40;
+const ACTION_ROW_OVERSCAN = 10;
+const PENDING_REFRESH_MS = 15000;
+
+const topSpacer = createSpacerRow();
+const bottomSpacer = createSpacerRow();
+let renderScheduled = false;
+
+// Load pending actions, updating only the rows whose action changed
 function loadPendingActions() {
     fetch('/api/pending-actions')
         .then(response => response.json())
         .then(data => {
-            const tableBody = document.getElementById('busTable').getElementsByTagName('tbody')[0];
-            tableBody.innerHTML = ''; // Clear existing rows
+            const keys = new Set();
             data.forEach(action => {
-                const row = tableBody.insertRow();
-                row.insertCell(0).textContent = action.current_bus_id;
-                row.insertCell(1).textContent = action.current_bus_details.seatingCapacity;
-                row.insertCell(2).textContent = action.current_bus_details.currentAttendance;
-                row.insertCell(3).textContent = action.nearby_bus_id;
-                row.insertCell(4).textContent = action.nearby_bus_details.seatingCapacity;
-                row.insertCell(5).textContent = action.nearby_bus_details.currentAttendance;
-                row.insertCell(6).textContent = action.action;
-                row.insertCell(7).textContent = action.message;
-                row.insertCell(8).textContent = `Current Bus: ${action.current_bus_details.location}, Nearby Bus: ${action.nearby_bus_details.location}`;
-                const actionCell = row.insertCell(9);
-                const acceptButton = document.createElement('button');
-                acceptButton.textContent = 'Accept';
-                acceptButton.onclick = () => handleAdminAction(action, true);
-                const denyButton = document.createElement('button');
-                denyButton.textContent = 'Deny';
-                denyButton.onclick = () => handleAdminAction(action, false);
-                actionCell.appendChild(acceptButton);
-                actionCell.appendChild(denyButton);
+                const key = actionKey(action);
+                keys.add(key);
+                const entry = actionRows.get(key);
+                if (entry && entry.signature !== actionSignature(action)) {
+                    fillActionRow(entry.row, action);
+                    entry.signature = actionSignature(action);
+                }
             });
-        });
+            actionRows.forEach((entry, key) => {
+                if (!keys.has(key)) {
+                    entry.row.remove();
+                    actionRows.delete(key);
+                }
+            });
+            viewedActions.forEach(key => {
+                if (!keys.has(key)) {
+                    viewedActions.delete(key);
+                }
+            });
+
+            // Decisions for actions that are no longer pending cannot be submitted
+            const stagedCount = stagedDecisions.size;
+            stagedDecisions.forEach((decision, key) => {
+                if (!keys.has(key)) {
+                    stagedDecisions.delete(key);
+                }
+            });
+            if (stagedDecisions.size !== stagedCount) {
+                updateDecisionStatus();
+            }
+
+            pendingActionList = data;
+            renderVisibleActions();
+        })
+        .catch(error => console.error('Error:', error));
+}
+
+function actionSignature(action) {
+    return JSON.stringify([
+        action.current_bus_details.seatingCapacity,
+        action.current_bus_details.currentAttendance,
+        action.nearby_bus_details.seatingCapacity,
+        action.nearby_bus_details.currentAttendance,
+        action.message,
+        action.current_bus_details.location,
+        action.nearby_bus_details.location
+    ]);
+}
+
+function createSpacerRow() {
+    const row = document.createElement('tr');
+    row.className = 'spacer';
+    row.insertCell(0).colSpan = 10;
+    return row;
+}
+
+function getActionRow(action) {
+    const key = actionKey(action);
+    let entry = actionRows.get(key);
+    if (!entry) {
+        const row = document.createElement('tr');
+        row.className = 'action-row';
+        fillActionRow(row, action);
+        entry = { row: row, signature: actionSignature(action) };
+        actionRows.set(key, entry);
+    }
+    return entry.row;
+}
+
+function fillActionRow(row, action) {
+    row.replaceChildren();
+    row.insertCell(0).textContent = action.current_bus_id;
+    row.insertCell(1).textContent = action.current_bus_details.seatingCapacity;
+    row.insertCell(2).textContent = action.current_bus_details.currentAttendance;
+    row.insertCell(3).textContent = action.nearby_bus_id;
+    row.insertCell(4).textContent = action.nearby_bus_details.seatingCapacity;
+    row.insertCell(5).textContent = action.nearby_bus_details.currentAttendance;
+    row.insertCell(6).textContent = action.action;
+    row.insertCell(7).textContent = action.message;
+    row.insertCell(8).textContent = `Current Bus: ${action.current_bus_details.location}, Nearby Bus: ${action.nearby_bus_details.location}`;
+    const actionCell = row.insertCell(9);
+    const acceptButton = document.createElement('button');
+    acceptButton.textContent = 'Accept';
+    acceptButton.onclick = () => handleAdminAction(action, true, row);
+    const denyButton = document.createElement('button');
+    denyButton.textContent = 'Deny';
+    denyButton.onclick = () => handleAdminAction(action, false, row);
+    actionCell.appendChild(acceptButton);
+    actionCell.appendChild(denyButton);
+    markRow(row, stagedDecisions.get(actionKey(action)));
+}
+
+// Put the rows in view (plus some overscan) between two spacers that stand in for the rest
+function renderVisibleActions() {
+    renderScheduled = false;
+    const container = document.getElementById('actionTableContainer');
+    const tableBody = document.getElementById('busTable').getElementsByTagName('tbody')[0];
+    const first = Math.max(0, Math.floor(container.scrollTop / ACTION_ROW_HEIGHT) - ACTION_ROW_OVERSCAN);
+    const last = Math.min(pendingActionList.length, Math.ceil((container.scrollTop + container.clientHeight) / ACTION_ROW_HEIGHT) + ACTION_ROW_OVERSCAN);
+
+    const rows = [];
+    for (let i = first; i < last; i++) {
+        rows.push(getActionRow(pendingActionList[i]));
+    }
+    topSpacer.style.height = `${first * ACTION_ROW_HEIGHT}px`;
+    bottomSpacer.style.height = `${(pendingActionList.length - last) * ACTION_ROW_HEIGHT}px`;
+    tableBody.replaceChildren(topSpacer, ...rows, bottomSpacer);
+
+    const firstVisible = Math.floor(container.scrollTop / ACTION_ROW_HEIGHT);
+    const lastVisible = Math.ceil((container.scrollTop + container.clientHeight) / ACTION_ROW_HEIGHT);
+    reportViewedActions(pendingActionList.slice(firstVisible, lastVisible));
 }
 
-// Handle admin action
-function handleAdminAction(action, approved) {
-    fetch('/api/admin-action', {
+// Tell the server which actions are on screen for the first time (overscan rows do not count)
+function reportViewedActions(actions) {
+    if (document.visibilityState !== 'visible') {
+        return;
+    }
+    const seen = actions.filter(action => !viewedActions.has(actionKey(action)));
+    if (seen.length === 0) {
+        return;
+    }
+    seen.forEach(action => viewedActions.add(actionKey(action)));
+    fetch('/api/pending-actions/viewed', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
         },
         body: JSON.stringify({
+            actions: seen.map(action => ({
+                current_bus_id: action.current_bus_id,
+                nearby_bus_id: action.nearby_bus_id,
+                action: action.action
+            }))
+        }),
+    })
+    .catch(error => console.error('Error:', error));
+}
+
+function scheduleRender() {
+    if (!renderScheduled) {
+        renderScheduled = true;
+        requestAnimationFrame(renderVisibleActions);
+    }
+}
+
+function markRow(row, decision) {
+    row.classList.toggle('staged-approved', Boolean(decision && decision.approved));
+    row.classList.toggle('staged-denied', Boolean(decision && !decision.approved));
+}
+
+// Stage an admin decision; clicking the same choice again clears it
+function handleAdminAction(action, approved, row) {
+    const key = actionKey(action);
+    const existing = stagedDecisions.get(key);
+    if (existing && existing.approved === approved) {
+        stagedDecisions.delete(key);
+    } else {
+        stagedDecisions.set(key, {
             current_bus_id: action.current_bus_id,
             nearby_bus_id: action.nearby_bus_id,
             action: action.action,
             approved: approved
-        }),
+        });
+    }
+    markRow(row, stagedDecisions.get(key));
+    updateDecisionStatus();
+}
+
+function updateDecisionStatus(message) {
+    const status = document.getElementById('decisionStatus');
+    status.textContent = message || `${stagedDecisions.size} decision(s) staged`;
+    document.getElementById('submitDecisions').disabled = stagedDecisions.size === 0;
+}
+
+// Send all staged decisions in one request
+function submitDecisions() {
+    fetch('/api/admin-actions', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ decisions: Array.from(stagedDecisions.values()) }),
     })
     .then(response => response.json())
     .then(data => {
-        alert(data.message);
-        loadPendingActions(); // Refresh the list of pending actions
+        if (data.success) {
+            stagedDecisions.clear();
+            actionRows.forEach(entry => markRow(entry.row, undefined));
+            updateDecisionStatus(data.message);
+            loadPendingActions(); // Refresh the list of pending actions
+        } else {
+            const details = (data.errors || []).map(error => error.message).join(' ');
+            updateDecisionStatus(`${data.message} ${details}`);
+        }
     })
     .catch(error => console.error('Error:', error));
 }
 
-// Load pending actions on page load
+// Load pending actions on page load and keep them fresh
 window.onload = function() {
+    document.getElementById('submitDecisions').onclick = submitDecisions;
+    document.getElementById('actionTableContainer').addEventListener('scroll', scheduleRender);
+    document.addEventListener('visibilitychange', scheduleRender);
+    updateDecisionStatus();
     loadPendingActions();
+    setInterval(loadPendingActions, PENDING_REFRESH_MS);
 };
 
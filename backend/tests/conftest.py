@@ -0,0 +1,91 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_services import start_fake_server
+
+# Behaviour tests for the sweep, seat holds, admin decisions, policy reloads and
+# SLO escalation. Distances come from fake_services.py. Everything the modules
+# read from the environment when imported is set here first, so no test reaches
+# Google or Twilio or touches the fleet, policy and quota files next to the app.
+
+server, base_url = start_fake_server()
+state_dir = tempfile.mkdtemp(prefix='bus-tests-')
+os.environ.update({
+    'GOOGLE_MAPS_API_KEY': 'fake-key',
+    'DISTANCE_MATRIX_URL': f"{base_url}/maps/api/distancematrix/json",
+    'TWILIO_API_URL': base_url,
+    'MAPS_REQUESTS_PER_SECOND': '0',
+    'TWILIO_CALLS_PER_SECOND': '0',
+    'SLO_CHECK_INTERVAL_SECONDS': '0',
+    'BUS_DATA_FILE': os.path.join(state_dir, 'buses.csv'),
+    'STUDENTS_FILE': os.path.join(state_dir, 'students.csv'),
+    'POLICY_FILE': os.path.join(state_dir, 'policy.json'),
+    'QUOTA_STATE_FILE': os.path.join(state_dir, 'quota_usage.sqlite3'),
+})
+for name in ('HISTORY_FILE', 'ZONE_MODE', 'ADMIN_PHONE'):
+    os.environ.pop(name, None)
+
+# Buses 1 and 3 are over capacity, bus 2 has one free seat, bus 4 is flagged for
+# Combination and bus 5, about a kilometre north, has 15 free seats
+FLEET_CSV = """id,driver,seatingCapacity,currentAttendance,location,latitude,longitude,phone
+1,Driver 1,40,45,A,13.000,80.0,+911
+2,Driver 2,40,39,B,13.001,80.0,+912
+3,Driver 3,40,45,C,13.002,80.0,+913
+4,Driver 4,40,15,D,13.003,80.0,+914
+5,Driver 5,40,25,E,13.010,80.0,+915
+"""
+
+class RecordingNotifier:
+    def __init__(self):
+        self.calls = []
+
+    def notify(self, driver, driver_phone, message, priority):
+        self.calls.append((driver, message, priority))
+        return True
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+@pytest.fixture
+def notifier():
+    return RecordingNotifier()
+
+@pytest.fixture
+def web_app(monkeypatch, clock, notifier):
+    """
+    The app module with the test fleet, no pending actions or holds, calls
+    recorded instead of placed, and an SLO of 60 seconds on the test clock.
+    """
+    import app
+    from slo import SloTracker
+
+    with open(os.environ['BUS_DATA_FILE'], 'w', newline='') as file:
+        file.write(FLEET_CSV)
+    monkeypatch.setattr(app.allocator, 'notifier', notifier)
+    monkeypatch.setattr(app, 'slo_tracker', SloTracker(60, clock=clock))
+    monkeypatch.setattr(app, 'seat_map', None)
+    monkeypatch.setattr(app, 'moved_bus_ids', set())
+    app.pending_actions.clear()
+    app.allocator.seat_ledger.clear()
+    app.allocator.neighbour_cache.clear()
+    yield app
+    app.notification_queue.join()
+    app.pending_actions.clear()
+    app.allocator.seat_ledger.clear()
+
+@pytest.fixture
+def client(web_app):
+    return web_app.app.test_client()
@@ -0,0 +1,15 @@
+from allocation import suggested_action
+
+def suggestions(pending_actions):
+    # (current bus, nearby bus, action) of every pending action, in order
+    return [(pending['current_bus_id'], pending['nearby_bus_id'], pending['action']) for pending in pending_actions]
+
+def add_pending(web_app, actions):
+    """
+    Lists [(current bus id, nearby bus id, action), ...] as pending actions
+    without holding any seats, as if their holds had expired.
+    """
+    buses = {bus.id: bus for bus in web_app.load_bus_data()}
+    for current_bus_id, nearby_bus_id, action in actions:
+        web_app.pending_actions.append(suggested_action(action, buses[current_bus_id], buses[nearby_bus_id], 100))
+    web_app.slo_tracker.created([web_app.pending_key(pending) for pending in web_app.pending_actions])
@@ -0,0 +1,95 @@
+import threading
+
+from rate_limit import ADMIN
+
+from helpers import add_pending, suggestions
+
+def decision(current_bus_id, nearby_bus_id, action='Reallocation', approved=True):
+    return {'current_bus_id': current_bus_id, 'nearby_bus_id': nearby_bus_id, 'action': action, 'approved': approved}
+
+def free_seats(client, bus_id):
+    return client.get(f'/api/bus-seating/{bus_id}').get_json()['freeSeats']
+
+def test_batch_applies_every_decision_together(web_app, client, notifier):
+    web_app.process_buses()
+
+    response = client.post('/api/admin-actions', json={'decisions': [decision(1, 5), decision(3, 5, approved=False)]})
+    web_app.notification_queue.join()
+
+    assert response.status_code == 200
+    assert [result['students_moved'] for result in response.get_json()['results']] == [5, 0]
+    assert web_app.pending_actions == []
+    assert web_app.allocator.seat_ledger.reserved_seats(5) == 0
+    assert free_seats(client, 5) == 10
+    assert [(driver, priority) for driver, _, priority in notifier.calls] == [('Driver 1', ADMIN), ('Driver 5', ADMIN)]
+
+def test_conflicting_batch_applies_nothing(web_app, client, notifier):
+    web_app.process_buses()
+    add_pending(web_app, [(1, 2, 'Reallocation')])
+
+    response = client.post('/api/admin-actions', json={'decisions': [decision(1, 5), decision(1, 2)]})
+
+    assert response.status_code == 409
+    assert response.get_json()['errors'][0]['index'] == 1
+    assert suggestions(web_app.pending_actions) == [(1, 5, 'Reallocation'), (3, 5, 'Reallocation'), (1, 2, 'Reallocation')]
+    assert free_seats(client, 5) == 15
+    assert notifier.calls == []
+
+def test_batch_rejects_decisions_that_overfill_a_bus(web_app, client):
+    # Bus 2 has one free seat, so the second reallocation onto it cannot fit
+    add_pending(web_app, [(1, 2, 'Reallocation'), (3, 2, 'Reallocation')])
+
+    response = client.post('/api/admin-actions', json={'decisions': [decision(1, 2), decision(3, 2)]})
+
+    assert response.status_code == 409
+    assert free_seats(client, 2) == 1
+
+def test_lone_decision_is_checked_for_room(web_app, client):
+    # Combining bus 2 (39 students) into bus 5 (15 free seats) cannot fit
+    add_pending(web_app, [(2, 5, 'Combination')])
+
+    response = client.post('/api/admin-actions', json={'decisions': [decision(2, 5, 'Combination')]})
+
+    assert response.status_code == 409
+    assert free_seats(client, 5) == 15
+
+def test_only_pending_actions_can_be_decided(web_app, client, notifier):
+    web_app.process_buses()
+
+    assert client.post('/api/admin-actions', json={'decisions': [decision(1, 5)]}).status_code == 200
+    assert client.post('/api/admin-actions', json={'decisions': [decision(1, 5)]}).status_code == 409
+    assert client.post('/api/admin-actions', json={'decisions': [decision(2, 5, 'Combination')]}).status_code == 409
+    web_app.notification_queue.join()
+
+    assert free_seats(client, 5) == 10
+    assert len(notifier.calls) == 2
+
+def test_concurrent_batches_apply_a_decision_once(web_app, notifier):
+    web_app.process_buses()
+    statuses = []
+
+    def post():
+        statuses.append(web_app.app.test_client().post('/api/admin-actions', json={'decisions': [decision(1, 5)]}).status_code)
+
+    threads = [threading.Thread(target=post) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    web_app.notification_queue.join()
+
+    assert sorted(statuses) == [200, 409, 409, 409]
+    assert len(notifier.calls) == 2
+
+def test_malformed_requests_are_rejected(web_app, client):
+    web_app.process_buses()
+    bodies = [
+        [],
+        {'decisions': 'all'},
+        {'decisions': [1]},
+        {'decisions': [decision(1, 5, approved='false')]},
+        {'decisions': [decision(1, 5), decision(1, 5, approved=False)]},
+    ]
+    for body in bodies:
+        assert client.post('/api/admin-actions', json=body).status_code == 400
+    assert client.post('/api/admin-action', json=[decision(1, 5)]).status_code == 400
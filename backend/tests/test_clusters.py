@@ -0,0 +1,45 @@
+import pytest
+
+from clusters import MAX_ZOOM, cell_degrees, parse_zoom, visible_markers
+
+def marker(lat, lng, count):
+    return {'key': f"{lat},{lng},{count}", 'lat': lat, 'lng': lng, 'count': count}
+
+@pytest.mark.parametrize('text, zoom', [('10', 10), ('10.7', 10), ('-3', 0), ('99', MAX_ZOOM), (12.2, 12)])
+def test_zoom_is_floored_and_clamped(text, zoom):
+    assert parse_zoom(text) == zoom
+
+@pytest.mark.parametrize('text', ['nan', 'inf', '-inf', 'ten'])
+def test_zoom_must_be_a_finite_number(text):
+    with pytest.raises(ValueError):
+        parse_zoom(text)
+
+def test_clusters_within_one_cell_of_the_view_are_kept():
+    margin = cell_degrees(10)
+    bounds = (13.0, 80.0, 13.2, 80.2)
+    markers = [
+        marker(13.1, 80.1, 1),
+        marker(13.1, 80.2 + margin / 2, 5),
+        marker(13.1, 80.2 + margin / 2, 1),
+        marker(13.1, 80.2 + margin * 2, 5),
+    ]
+
+    assert visible_markers(markers, bounds, 10) == markers[:2]
+
+def test_view_across_the_antimeridian():
+    margin = cell_degrees(10)
+    bounds = (-10.0, 179.0, 10.0, -179.0)
+    markers = [
+        marker(0.0, 179.5, 1),
+        marker(0.0, -179.5, 1),
+        marker(0.0, -179.0 + margin / 2, 3),
+        marker(0.0, 179.0 - margin / 2, 3),
+        marker(0.0, 0.0, 3),
+    ]
+
+    assert visible_markers(markers, bounds, 10) == markers[:4]
+
+def test_padding_past_a_full_turn_keeps_every_longitude():
+    markers = [marker(0.0, lng, 2) for lng in (-180.0, -90.0, 0.0, 90.0, 180.0)]
+
+    assert visible_markers(markers, (-10.0, -179.0, 10.0, 179.0), 0) == markers
@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+from helpers import suggestions
+
+def test_cli_batch_holds_seats_between_approvals(web_app):
+    import main
+    from allocation import approve_all
+
+    main.allocator.seat_ledger.clear()
+    decisions = main.run_batch(web_app.load_bus_data(), approve_all, dry_run=True)
+
+    approved = [(decision['bus_id'], decision['nearby_bus_id']) for decision in decisions if decision['approved']]
+    assert approved == [(1, 5), (3, 5)]
+    assert main.allocator.seat_ledger.reserved_seats(5) == 10
+    main.allocator.seat_ledger.clear()
+
+def test_async_sweep_matches_the_blocking_sweep(web_app):
+    pytest.importorskip('quart')
+    import async_app
+
+    async def sweep():
+        try:
+            await async_app.process_buses()
+        finally:
+            await async_app.close_http_client()
+
+    asyncio.run(sweep())
+    assert suggestions(web_app.pending_actions) == [(1, 5, 'Reallocation'), (3, 5, 'Reallocation')]
+    assert web_app.allocator.seat_ledger.reserved_seats(5) == 10
@@ -0,0 +1,65 @@
+import pytest
+
+from fleet_import import MAX_ATTENDANCE, MAX_SEATING_CAPACITY, import_buses, import_fleet
+
+HEADER = 'id,driver,seatingCapacity,currentAttendance,location,latitude,longitude,phone,routeId\n'
+
+def write_fleet(tmp_path, rows):
+    path = tmp_path / 'fleet.csv'
+    path.write_text(HEADER + ''.join(row + '\n' for row in rows))
+    return str(path)
+
+def test_bad_rows_are_reported_and_skipped(tmp_path):
+    path = write_fleet(tmp_path, [
+        '1,D1,40,45,A,13.0,80.0,+1,R1',
+        '2,D2,,10,B,13.0,80.0,+2,R1',
+        '3,D3,40.5,10,C,13.0,80.0,+3,R1',
+        '1,D4,40,10,D,13.0,80.0,+4,R2',
+        ',,,,,,,,',
+        '5,D5,40,10,E,91,80.0,+5,R2',
+        '6,,40,12,,13.0,80.0,,',
+    ])
+
+    buses, errors = import_buses(path)
+
+    assert [bus.id for bus in buses] == [1, 6]
+    assert (buses[0].routeId, buses[1].driver, buses[1].phone) == ('R1', '', None)
+    assert [row for row, _ in errors] == [3, 4, 5, 7]
+    assert 'duplicate id 1' in errors[2][1]
+
+@pytest.mark.parametrize('capacity, attendance', [
+    (MAX_SEATING_CAPACITY + 1, 10),
+    (0, 10),
+    (40, MAX_ATTENDANCE + 1),
+    (40, -1),
+])
+def test_values_too_large_for_the_columns_are_rejected(tmp_path, capacity, attendance):
+    path = write_fleet(tmp_path, [f'1,D1,{capacity},{attendance},A,13.0,80.0,+1,R1'])
+
+    # These used to raise OverflowError from the typed columns and abort the import
+    fleet, errors = import_fleet(path)
+
+    assert len(fleet) == 0
+    assert len(errors) == 1
+
+def test_largest_values_fit_the_columns(tmp_path):
+    path = write_fleet(tmp_path, [f'1,D1,{MAX_SEATING_CAPACITY},{MAX_ATTENDANCE},A,13.0,80.0,+1,R1'])
+
+    fleet, errors = import_fleet(path)
+
+    assert errors == []
+    assert fleet.record(0)['currentAttendance'] == MAX_ATTENDANCE
+
+def test_errors_past_the_limit_are_counted(tmp_path):
+    path = write_fleet(tmp_path, [f'{bus_id},D,,10,A,13.0,80.0,+1,R1' for bus_id in range(5)])
+
+    _, errors = import_buses(path, max_errors=2)
+
+    assert errors[-1] == (None, '3 more bad rows not listed')
+
+def test_missing_required_column_aborts(tmp_path):
+    path = tmp_path / 'fleet.csv'
+    path.write_text('id,driver,seatingCapacity\n1,D1,40\n')
+
+    with pytest.raises(ValueError, match='currentAttendance'):
+        import_buses(str(path))
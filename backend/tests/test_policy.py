@@ -0,0 +1,49 @@
+import json
+import os
+
+import pytest
+
+from policy import Policy, parse_minutes
+
+@pytest.fixture
+def policy_file():
+    path = os.environ['POLICY_FILE']
+    yield path
+    if os.path.exists(path):
+        os.remove(path)
+
+def write_policy(path, text, modified):
+    with open(path, 'w') as file:
+        file.write(text)
+    os.utime(path, (modified, modified))
+
+def flagged(web_app):
+    plan = web_app.allocator.evaluate(web_app.load_bus_data())
+    return [(bus.id, plan.action(bus)) for bus in plan.flagged()]
+
+def test_policy_file_is_reloaded_when_it_changes(web_app, policy_file):
+    assert (2, 'Reallocation') not in flagged(web_app)
+
+    write_policy(policy_file, json.dumps({'defaults': {'full_threshold': 0.95}}), 1_000_000)
+    assert (2, 'Reallocation') in flagged(web_app)
+
+    write_policy(policy_file, json.dumps({'defaults': {'full_threshold': 1.0, 'low_threshold': 0.7}}), 1_000_100)
+    assert flagged(web_app) == [(1, 'Reallocation'), (3, 'Reallocation'), (4, 'Combination'), (5, 'Combination')]
+
+def test_invalid_policy_keeps_the_previous_one(web_app, policy_file):
+    write_policy(policy_file, json.dumps({'defaults': {'full_threshold': 0.95}}), 1_000_000)
+    assert (2, 'Reallocation') in flagged(web_app)
+
+    write_policy(policy_file, json.dumps({'rules': [{'hours': [7, 9]}]}), 1_000_100)
+    assert (2, 'Reallocation') in flagged(web_app)
+
+def test_times_must_be_clock_times():
+    assert parse_minutes('07:30') == 450
+    assert parse_minutes('24:00') == 1440
+    for text in ('07:75', '07:-5', '24:30', '-1:00', '7', '07:00:00', 7):
+        with pytest.raises(ValueError):
+            parse_minutes(text)
+
+def test_rule_hours_must_be_strings():
+    with pytest.raises(ValueError):
+        Policy({'rules': [{'hours': [7, 9]}]})
@@ -0,0 +1,65 @@
+import asyncio
+import datetime
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import rate_limit
+from rate_limit import ADMIN, SWEEP, QuotaStore, RateLimiter
+
+def test_admin_calls_go_out_before_queued_sweep_calls():
+    limiter = RateLimiter('Test', 20, 1, quota_file='')
+    assert limiter.acquire()
+    order = []
+
+    def call(name, priority):
+        assert limiter.acquire(priority, timeout=5)
+        order.append(name)
+
+    threads = [threading.Thread(target=call, args=('sweep', SWEEP))]
+    threads[0].start()
+    time.sleep(0.01)
+    threads.append(threading.Thread(target=call, args=('admin', ADMIN)))
+    threads[1].start()
+    for thread in threads:
+        thread.join()
+
+    assert order == ['admin', 'sweep']
+
+def test_used_up_quota_fails_at_once():
+    limiter = RateLimiter('Test', 0, 1, daily_quota=1, quota_file='')
+    assert limiter.acquire()
+
+    started = time.monotonic()
+    assert not limiter.acquire(timeout=30)
+    assert not asyncio.run(limiter.acquire_async(timeout=30))
+    assert time.monotonic() - started < 1
+    assert limiter.usage()['remainingToday'] == 0
+
+def test_quota_file_is_shared_between_limiters(tmp_path):
+    quota_file = str(tmp_path / 'quota.sqlite3')
+    first = RateLimiter('Test', 0, 1, daily_quota=3, quota_file=quota_file)
+    second = RateLimiter('Test', 0, 1, daily_quota=3, quota_file=quota_file)
+
+    assert first.acquire()
+    assert second.acquire()
+    assert first.acquire()
+    assert not second.acquire(timeout=1)
+    assert second.usage()['usedToday'] == 3
+
+def test_quota_file_is_shared_between_processes(tmp_path):
+    quota_file = str(tmp_path / 'quota.sqlite3')
+    script = (
+        'from rate_limit import QuotaStore\n'
+        'import datetime, sys\n'
+        'store = QuotaStore(sys.argv[1])\n'
+        'for _ in range(5):\n'
+        '    store.take("Test", datetime.date.today(), 8)\n'
+    )
+    workers = [subprocess.Popen([sys.executable, '-c', script, quota_file], cwd=os.path.dirname(rate_limit.__file__)) for _ in range(3)]
+    for worker in workers:
+        assert worker.wait() == 0
+
+    assert QuotaStore(quota_file).used('Test', datetime.date.today()) == 8
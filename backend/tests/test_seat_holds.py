@@ -0,0 +1,54 @@
+from fleet import Bus
+from reservations import SeatLedger, action_key, reserve_nearby_bus
+
+def bus(bus_id, capacity, attendance):
+    return Bus.from_dict({
+        'id': bus_id, 'driver': f"Driver {bus_id}", 'seatingCapacity': capacity, 'currentAttendance': attendance,
+        'location': '', 'latitude': 13.0, 'longitude': 80.0, 'phone': '',
+    })
+
+def test_holds_never_exceed_free_seats():
+    ledger = SeatLedger()
+
+    assert ledger.try_reserve('a', 5, 10, 15)
+    assert not ledger.try_reserve('b', 5, 6, 15)
+    assert ledger.try_reserve('b', 5, 5, 15)
+    assert ledger.reserved_seats(5) == 15
+
+def test_released_and_expired_holds_free_their_seats():
+    ledger = SeatLedger()
+    ledger.try_reserve('a', 5, 10, 15)
+    ledger.release('a')
+    assert ledger.reserved_seats(5) == 0
+    assert ledger.held('a') is None
+
+    expiring = SeatLedger(ttl_seconds=0)
+    expiring.try_reserve('a', 5, 10, 15)
+    assert expiring.reserved_seats(5) == 0
+
+def test_reallocation_skips_buses_without_room_for_the_overflow():
+    ledger = SeatLedger()
+    full = bus(1, 40, 45)
+    one_seat, roomy = bus(2, 40, 39), bus(5, 40, 25)
+
+    nearby_bus, distance, seats = reserve_nearby_bus(ledger, full, [(100, one_seat), (1000, roomy)], 'Reallocation')
+
+    assert (nearby_bus.id, distance, seats) == (5, 1000, 5)
+    assert ledger.held(action_key(1, 5, 'Reallocation')) == 5
+
+def test_reallocation_falls_back_to_a_partial_hold():
+    ledger = SeatLedger()
+    full = bus(1, 40, 45)
+
+    nearby_bus, _, seats = reserve_nearby_bus(ledger, full, [(100, bus(2, 40, 39))], 'Reallocation')
+
+    assert (nearby_bus.id, seats) == (2, 1)
+
+def test_combination_counts_seats_held_by_others():
+    ledger = SeatLedger()
+    quiet, target = bus(4, 40, 15), bus(5, 40, 25)
+    ledger.try_reserve('other', 5, 1, 15)
+
+    nearby_bus, _, seats = reserve_nearby_bus(ledger, quiet, [(100, target)], 'Combination')
+
+    assert nearby_bus is None and seats == 0
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from fleet import Bus
+from seating import SeatMap
+
+from helpers import suggestions
+
+def bus(bus_id, capacity, attendance):
+    return Bus.from_dict({
+        'id': bus_id, 'driver': f"Driver {bus_id}", 'seatingCapacity': capacity, 'currentAttendance': attendance,
+        'location': '', 'latitude': 13.0, 'longitude': 80.0, 'phone': '',
+    })
+
+def test_board_and_alight_track_seats():
+    seats = SeatMap.from_buses([bus(1, 2, 0)])
+
+    assert seats.board('a', 1) == 0
+    assert seats.board('b', 1) == 1
+    assert seats.board('c', 1) == -1
+    assert seats.occupancy(1) == {'bus_id': 1, 'seatingCapacity': 2, 'seated': 2, 'standing': 1, 'freeSeats': 0}
+
+    assert seats.alight('a') == 1
+    assert not seats.is_occupied(1, 0)
+    assert seats.locate('a') is None
+    assert seats.board('a', 1) == 0
+    assert seats.attendance(1) == 3
+
+def test_reallocation_moves_standing_students_into_free_seats():
+    seats = SeatMap.from_buses([bus(1, 40, 45), bus(5, 40, 25)])
+
+    assert seats.apply_action('Reallocation', 1, 5) == 5
+    assert (seats.attendance(1), seats.attendance(5)) == (40, 30)
+    assert seats.occupancy(1)['standing'] == 0
+
+def test_combination_moves_everyone():
+    seats = SeatMap.from_buses([bus(4, 40, 15), bus(5, 40, 25)])
+
+    assert seats.apply_action('Combination', 4, 5) == 15
+    assert (seats.attendance(4), seats.attendance(5)) == (0, 40)
+
+def test_move_cannot_take_more_students_than_on_board():
+    seats = SeatMap.from_buses([bus(1, 40, 3), bus(2, 40, 0)])
+
+    with pytest.raises(ValueError):
+        seats.move(1, 2, 4)
+    assert seats.attendance(1) == 3
+
+def test_roster_rows_for_unknown_buses_are_skipped():
+    seats = SeatMap.from_buses([bus(1, 40, 0)], [('a', 1), ('b', 99)])
+
+    assert seats.locate('a') == (1, 0)
+    assert seats.locate('b') is None
+
+def test_sweeps_see_approved_moves(web_app, client, notifier):
+    web_app.process_buses()
+    client.post('/api/admin-actions', json={'decisions': [
+        {'current_bus_id': bus_id, 'nearby_bus_id': 5, 'action': 'Reallocation', 'approved': True} for bus_id in (1, 3)
+    ]})
+    web_app.notification_queue.join()
+
+    web_app.process_buses()
+
+    # Bus 5 now has 35 students, and buses 1 and 3 were already handled
+    assert suggestions(web_app.pending_actions) == []
+    assert {bus.id: bus.currentAttendance for bus in web_app.load_current_buses()} == {1: 40, 2: 39, 3: 40, 4: 15, 5: 35}
+    assert len(notifier.calls) == 4
+
+def test_new_fleet_file_replaces_the_moves(web_app, client):
+    web_app.process_buses()
+    client.post('/api/admin-action', json={'current_bus_id': 1, 'nearby_bus_id': 5, 'action': 'Reallocation', 'approved': True})
+    assert client.get('/api/bus-seating/5').get_json()['freeSeats'] == 10
+
+    modified = os.path.getmtime(os.environ['BUS_DATA_FILE']) + 10
+    os.utime(os.environ['BUS_DATA_FILE'], (modified, modified))
+
+    assert client.get('/api/bus-seating/5').get_json()['freeSeats'] == 15
+    assert web_app.moved_bus_ids == set()
@@ -0,0 +1,57 @@
+import pytest
+
+from fleet import Bus
+from simulation import load_history, run_scenarios
+
+def bus(bus_id, capacity, attendance, latitude):
+    return Bus.from_dict({
+        'id': bus_id, 'driver': f"Driver {bus_id}", 'seatingCapacity': capacity, 'currentAttendance': attendance,
+        'location': '', 'latitude': latitude, 'longitude': 80.0, 'phone': '',
+    })
+
+FLEET = [bus(1, 40, 45, 13.000), bus(2, 40, 39, 13.001), bus(5, 40, 25, 13.010)]
+
+TICKS = [
+    ('2024-01-08T08:00:00', [(1, 45, 13.000, 80.0), (2, 39, 13.001, 80.0), (5, 25, 13.010, 80.0)]),
+    ('2024-01-08T08:05:00', [(1, 44, None, None), (2, 30, None, None), (5, 25, None, None)]),
+]
+
+def test_baseline_moves_standing_students():
+    [report] = run_scenarios(FLEET, TICKS, [{'name': 'baseline'}])
+
+    assert (report['buses'], report['retired'], report['ticks']) == (3, 0, 2)
+    assert report['approved'] == report['actions'] > 0
+    assert report['peak_standing'] == 0
+    # The scenario works on copies of the fleet
+    assert FLEET[0].currentAttendance == 45
+
+def test_nobody_approves_under_the_none_policy():
+    [report] = run_scenarios(FLEET, TICKS, [{'name': 'none', 'policy': 'none'}])
+
+    assert report['actions'] > 0
+    assert (report['approved'], report['students_moved']) == (0, 0)
+    assert report['peak_standing'] == 5
+
+def test_students_of_retired_buses_board_the_nearest_bus():
+    [report] = run_scenarios(FLEET, TICKS, [{'name': 'retire', 'retire': [2], 'policy': 'none'}])
+
+    # Bus 2's 39 students board bus 1, the nearest
+    assert (report['buses'], report['retired']) == (2, 1)
+    assert report['peak_standing'] == 45 + 39 - 40
+
+def test_retiring_every_bus_leaves_the_students_standing():
+    [report] = run_scenarios(FLEET, TICKS, [{'name': 'all', 'retire': [1, 2, 5]}])
+
+    assert (report['buses'], report['actions'], report['seat_utilization']) == (0, 0, 0.0)
+    assert report['peak_standing'] == 45 + 39 + 25
+
+def test_retiring_a_bus_not_in_the_fleet_is_rejected():
+    with pytest.raises(ValueError, match='not in the fleet: 9'):
+        run_scenarios(FLEET, TICKS, [{'name': 'typo', 'retire': [9]}])
+
+def test_history_rows_without_a_position(tmp_path):
+    path = tmp_path / 'history.csv'
+    path.write_text('timestamp,bus_id,currentAttendance,latitude,longitude\n'
+                    't2,1,30,,\nt1,1,20,13.0,80.0\nt1,2,10,13.1,80.0\n')
+
+    assert load_history(str(path)) == [('t1', [(1, 20, 13.0, 80.0), (2, 10, 13.1, 80.0)]), ('t2', [(1, 30, None, None)])]
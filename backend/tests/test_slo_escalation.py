@@ -0,0 +1,81 @@
+import threading
+
+from rate_limit import SWEEP
+from slo import SloTracker
+
+from helpers import add_pending, suggestions
+
+def test_overdue_actions_are_reported_once_per_slo_period(clock):
+    tracker = SloTracker(60, clock=clock)
+    tracker.created(['a'])
+
+    clock.now = 61
+    assert [key for key, _ in tracker.overdue()] == ['a']
+    assert tracker.overdue() == []
+    clock.now = 121
+    assert [key for key, _ in tracker.overdue()] == ['a']
+
+def test_auto_approve_skips_actions_that_conflict(web_app, clock, monkeypatch):
+    monkeypatch.setattr(web_app, 'SLO_ESCALATION', 'auto-approve')
+    add_pending(web_app, [(1, 4, 'Reallocation'), (3, 4, 'Reallocation'), (4, 5, 'Combination')])
+    clock.now = 61
+
+    web_app.escalate_overdue_actions()
+
+    # Bus 4 takes students from buses 1 and 3, so it is not combined into bus 5 as well
+    assert suggestions(web_app.pending_actions) == [(4, 5, 'Combination')]
+    assert web_app.get_seat_map().occupancy(4)['freeSeats'] == 15
+    assert web_app.get_seat_map().occupancy(5)['freeSeats'] == 15
+    assert web_app.slo_tracker.summary()['outcomes']['autoApproved'] == 2
+
+def test_auto_approve_and_admin_decide_an_action_once(web_app, client, clock, notifier, monkeypatch):
+    monkeypatch.setattr(web_app, 'SLO_ESCALATION', 'auto-approve')
+    web_app.process_buses()
+    clock.now = 61
+    decision = {'current_bus_id': 1, 'nearby_bus_id': 5, 'action': 'Reallocation', 'approved': True}
+
+    threads = [
+        threading.Thread(target=web_app.escalate_overdue_actions),
+        threading.Thread(target=lambda: client.post('/api/admin-actions', json={'decisions': [decision]})),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    web_app.notification_queue.join()
+
+    assert web_app.pending_actions == []
+    assert web_app.get_seat_map().occupancy(5)['freeSeats'] == 5
+    assert sorted(driver for driver, _, _ in notifier.calls) == ['Driver 1', 'Driver 3', 'Driver 5', 'Driver 5']
+
+def test_renotify_calls_the_admin_and_keeps_the_action(web_app, clock, notifier, monkeypatch):
+    monkeypatch.setattr(web_app, 'ADMIN_PHONE', '+910')
+    add_pending(web_app, [(1, 5, 'Reallocation')])
+    clock.now = 61
+
+    web_app.escalate_overdue_actions()
+
+    assert [(driver, priority) for driver, _, priority in notifier.calls] == [('Admin', SWEEP)]
+    assert suggestions(web_app.pending_actions) == [(1, 5, 'Reallocation')]
+
+def test_only_rows_shown_on_screen_count_as_viewed(web_app, client, clock):
+    web_app.process_buses()
+    clock.now = 5
+
+    client.get('/api/pending-actions')
+    assert web_app.slo_tracker.summary()['stages']['firstView']['count'] == 0
+
+    response = client.post('/api/pending-actions/viewed', json={'actions': [{'current_bus_id': 1, 'nearby_bus_id': 5, 'action': 'Reallocation'}]})
+    assert response.status_code == 200
+    assert web_app.slo_tracker.summary()['stages']['firstView']['count'] == 1
+    assert client.post('/api/pending-actions/viewed', json={'actions': 'all'}).status_code == 400
+
+def test_serving_a_request_starts_the_monitor(web_app, client, monkeypatch):
+    started = threading.Event()
+    monkeypatch.setattr(web_app, 'SLO_CHECK_INTERVAL_SECONDS', 1)
+    monkeypatch.setattr(web_app, 'slo_monitor', None)
+    monkeypatch.setattr(web_app, 'run_slo_monitor', started.set)
+
+    client.get('/api/slo')
+
+    assert started.wait(1)
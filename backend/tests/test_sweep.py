@@ -0,0 +1,73 @@
+from helpers import suggestions
+
+def test_sweep_suggests_and_holds_seats(web_app):
+    web_app.process_buses()
+
+    assert suggestions(web_app.pending_actions) == [(1, 5, 'Reallocation'), (3, 5, 'Reallocation')]
+    assert [pending['reserved_seats'] for pending in web_app.pending_actions] == [5, 5]
+    assert web_app.allocator.seat_ledger.reserved_seats(5) == 10
+    assert web_app.slo_tracker.summary()['open']['count'] == 2
+
+def test_sweep_never_targets_a_bus_flagged_for_combination(web_app):
+    # Bus 4 is nearer to buses 1 and 3 than bus 5, but it is about to be combined away
+    web_app.process_buses()
+
+    assert all(pending['nearby_bus_id'] != 4 for pending in web_app.pending_actions)
+
+def test_bus_with_held_seats_is_not_combined_away(web_app):
+    buses = web_app.load_bus_data()
+    plan = web_app.allocator.evaluate(buses)
+    bus_4 = buses[3]
+    suggestion = web_app.allocator.suggest(bus_4, buses, [], set(), plan)
+    assert (suggestion['nearby_bus_id'], suggestion['action']) == (5, 'Combination')
+    web_app.allocator.seat_ledger.clear()
+
+    # Once students of another bus are held on bus 4, it keeps running
+    web_app.allocator.seat_ledger.try_reserve('students of bus 2', 4, 1, 25)
+    assert web_app.allocator.suggest(bus_4, buses, [], set(), plan) is None
+
+def test_repeated_sweeps_keep_one_suggestion_per_bus(web_app):
+    web_app.process_buses()
+    web_app.process_buses()
+
+    assert suggestions(web_app.pending_actions) == [(1, 5, 'Reallocation'), (3, 5, 'Reallocation')]
+    assert web_app.allocator.seat_ledger.reserved_seats(5) == 10
+
+def test_decided_action_leaves_the_pending_list(web_app, client):
+    web_app.process_buses()
+
+    response = client.post('/api/admin-action', json={'current_bus_id': 1, 'nearby_bus_id': 5, 'action': 'Reallocation', 'approved': False})
+    assert response.status_code == 200
+    assert suggestions(web_app.pending_actions) == [(3, 5, 'Reallocation')]
+    assert web_app.allocator.seat_ledger.reserved_seats(5) == 5
+
+    # Denied, so the next sweep suggests it again
+    web_app.process_buses()
+    assert suggestions(web_app.pending_actions) == [(3, 5, 'Reallocation'), (1, 5, 'Reallocation')]
+
+def test_single_approval_moves_students(web_app, client, notifier):
+    web_app.process_buses()
+
+    response = client.post('/api/admin-action', json={'current_bus_id': 1, 'nearby_bus_id': 5, 'action': 'Reallocation', 'approved': True})
+    web_app.notification_queue.join()
+
+    assert response.get_json()['students_moved'] == 5
+    assert suggestions(web_app.pending_actions) == [(3, 5, 'Reallocation')]
+    assert len(notifier.calls) == 2
+    assert client.post('/api/admin-action', json={'current_bus_id': 1, 'nearby_bus_id': 5, 'action': 'Reallocation', 'approved': True}).status_code == 409
+
+def test_action_expires_with_its_hold(web_app, client, monkeypatch):
+    import reservations
+
+    web_app.process_buses()
+    later = reservations.time.monotonic() + web_app.allocator.seat_ledger.ttl_seconds + 1
+    with monkeypatch.context() as patch:
+        patch.setattr(reservations.time, 'monotonic', lambda: later)
+        assert web_app.allocator.seat_ledger.reserved_seats(5) == 0
+        assert client.get('/api/pending-actions').get_json() == []
+
+    # Nothing held the seats any more, so the actions were dropped and are suggested afresh
+    web_app.process_buses()
+    assert suggestions(web_app.pending_actions) == [(1, 5, 'Reallocation'), (3, 5, 'Reallocation')]
+    assert web_app.allocator.seat_ledger.reserved_seats(5) == 10
+    assert web_app.slo_tracker.summary()['outcomes']['expired'] == 2
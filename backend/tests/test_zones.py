@@ -0,0 +1,46 @@
+from allocation.engine import COMBINATION, REALLOCATION, suggested_action
+from zones import reconcile_holds
+
+from helpers import suggestions
+
+def zone_action(action, current_bus, nearby_bus, seats):
+    return suggested_action(action, current_bus, nearby_bus, 1.0, seats)
+
+def test_action_whose_seats_went_to_another_zone_is_searched_again(web_app):
+    buses = web_app.load_bus_data()
+    by_id = {bus.id: bus for bus in buses}
+    ledger = web_app.allocator.seat_ledger
+    assert ledger.try_reserve('other zone', 5, 8, 15)
+
+    zone_actions = [
+        zone_action(REALLOCATION, by_id[1], by_id[5], 5),
+        zone_action(REALLOCATION, by_id[3], by_id[5], 5),
+    ]
+    actions = reconcile_holds(zone_actions, buses, lambda bus: buses, web_app.allocator, set())
+
+    # Only 2 of bus 5's free seats were left for bus 3, so it goes to the nearer bus 2
+    assert suggestions(actions) == [(1, 5, 'Reallocation'), (3, 2, 'Reallocation')]
+    assert (ledger.reserved_seats(5), ledger.reserved_seats(2)) == (13, 1)
+
+def test_combination_of_a_bus_with_held_seats_is_dropped(web_app):
+    buses = web_app.load_bus_data()
+    by_id = {bus.id: bus for bus in buses}
+
+    zone_actions = [
+        zone_action(REALLOCATION, by_id[1], by_id[4], 5),
+        zone_action(COMBINATION, by_id[4], by_id[5], 15),
+    ]
+    actions = reconcile_holds(zone_actions, buses, lambda bus: buses, web_app.allocator, set())
+
+    assert suggestions(actions) == [(1, 4, 'Reallocation')]
+    assert web_app.allocator.seat_ledger.reserved_seats(5) == 0
+
+def test_buses_with_pending_actions_are_skipped(web_app):
+    buses = web_app.load_bus_data()
+    by_id = {bus.id: bus for bus in buses}
+
+    zone_actions = [zone_action(REALLOCATION, by_id[1], by_id[5], 5)]
+    actions = reconcile_holds(zone_actions, buses, lambda bus: buses, web_app.allocator, {'1'})
+
+    assert actions == []
+    assert web_app.allocator.seat_ledger.reserved_seats(5) == 0
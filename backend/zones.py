@@ -0,0 +1,212 @@
+import json
+import math
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+# Zone partitioning for multi-campus fleets. Buses are grouped either by their
+# nearest campus ("campus" mode) or by a lat/lng grid cell ("grid" mode), and each
+# zone is swept in its own worker process. Only buses within BORDER_KM of another
+# zone look at that zone's buses as candidates, so per-zone work stays small.
+# Seat holds taken in a worker are proposals: the parent takes them again on the
+# shared ledger in zone order and searches again for any that lost their seats.
+
+# Campus list: JSON file of [{"name": ..., "lat": ..., "lng": ...}, ...]
+CAMPUSES_FILE = os.getenv('CAMPUSES_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'campuses.json'))
+
+# How close (km) a bus has to be to another zone before that zone's buses are considered
+BORDER_KM = float(os.getenv('ZONE_BORDER_KM', '3'))
+
+# Grid cell size in degrees for "grid" mode (0.1 degree is roughly 11 km)
+GRID_CELL_DEGREES = float(os.getenv('ZONE_GRID_CELL_DEGREES', '0.1'))
+
+# Worker processes for zone sweeps (defaults to the number of cores)
+ZONE_WORKERS = int(os.getenv('ZONE_WORKERS', '0')) or None
+
+KM_PER_DEGREE = 111.32
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371 * math.asin(math.sqrt(a))
+
+def load_campuses(file_path=CAMPUSES_FILE):
+    """
+    This function reads the campus list, falling back to the single campus at
+    CENTER_COORDINATES when no campus file exists.
+    """
+    if os.path.exists(file_path):
+        with open(file_path, 'r') as file:
+            return json.load(file)
+
+    from app import CENTER_COORDINATES
+    return [{'name': 'main', 'lat': CENTER_COORDINATES['lat'], 'lng': CENTER_COORDINATES['lng']}]
+
+def campus_zones(bus, campuses, border_km):
+    """
+    This function returns the bus's home campus and the other campuses it is
+    within border_km of being closer to.
+    """
+    distances = sorted(
+        (haversine_km(bus.latitude, bus.longitude, campus['lat'], campus['lng']), campus['name'])
+        for campus in campuses
+    )
+    home_distance, home = distances[0]
+    neighbours = [name for distance, name in distances[1:] if distance - home_distance <= border_km]
+    return home, neighbours
+
+def grid_zones(bus, cell_degrees, border_km):
+    """
+    This function returns the bus's grid cell and the adjacent cells whose edge
+    is within border_km of the bus.
+    """
+    lat, lng = bus.latitude, bus.longitude
+    row, col = math.floor(lat / cell_degrees), math.floor(lng / cell_degrees)
+
+    border_lat = border_km / KM_PER_DEGREE
+    border_lng = border_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    lat_offset = lat - row * cell_degrees
+    lng_offset = lng - col * cell_degrees
+
+    row_steps = [0]
+    if lat_offset <= border_lat:
+        row_steps.append(-1)
+    if cell_degrees - lat_offset <= border_lat:
+        row_steps.append(1)
+    col_steps = [0]
+    if lng_offset <= border_lng:
+        col_steps.append(-1)
+    if cell_degrees - lng_offset <= border_lng:
+        col_steps.append(1)
+
+    neighbours = [(row + dr, col + dc) for dr in row_steps for dc in col_steps if (dr, dc) != (0, 0)]
+    return (row, col), neighbours
+
+def partition_buses(buses, mode='campus', campuses=None, border_km=BORDER_KM, cell_degrees=GRID_CELL_DEGREES):
+    """
+    This function groups buses into zones. It returns the buses per zone and, for
+    every border bus, the neighbouring zones it should also search.
+    """
+    if mode == 'campus':
+        campuses = campuses or load_campuses()
+        locate = lambda bus: campus_zones(bus, campuses, border_km)
+    elif mode == 'grid':
+        locate = lambda bus: grid_zones(bus, cell_degrees, border_km)
+    else:
+        raise ValueError(f"Unknown zone mode: {mode}")
+
+    zones = defaultdict(list)
+    borders = {}
+    for bus in buses:
+        home, neighbours = locate(bus)
+        zones[home].append(bus)
+        if neighbours:
+            borders[bus.id] = neighbours
+    return dict(zones), borders
+
+def sweep_zone(zone_buses, neighbour_buses, borders):
+    """
+    This function runs the attendance check for one zone in a worker process and
+    returns the suggested actions. Interior buses only see their own zone; border
+    buses also see the buses of the zones they border.
+    """
+    from allocation import AllocationEngine, get_allocator
+
+    # Holds go on a ledger of this zone's own, so a worker's earlier zones do not
+    # change the proposals and the result does not depend on the worker count
+    shared = get_allocator()
+    allocator = AllocationEngine(distances=shared.distances, policy=shared.policy)
+    actions = []
+    pending_bus_ids = set()
+    # Neighbouring buses are evaluated too, so a border bus is not sent to one
+    # that is flagged in its own zone
+    plan = allocator.evaluate(zone_buses + [bus for buses in neighbour_buses.values() for bus in buses])
+    zone_ids = {bus.id for bus in zone_buses}
+    for bus in plan.flagged():
+        if bus.id not in zone_ids:
+            continue
+        candidates = zone_buses
+        if bus.id in borders:
+            candidates = zone_buses + [other for zone in borders[bus.id] for other in neighbour_buses.get(zone, [])]
+        allocator.suggest(bus, candidates, actions, pending_bus_ids, plan)
+    return actions
+
+def reconcile_holds(zone_actions, buses, candidates_for, allocator, pending_bus_ids):
+    """
+    This function takes the seats of the workers' actions on the shared ledger
+    with try_reserve, in zone order. An action whose seats are gone (a bus in the
+    neighbouring zone picked the same bus) or whose target now has an action of
+    its own is searched again against the shared ledger; a Combination whose bus
+    now has seats held on it is dropped, as in a flat sweep.
+    """
+    from allocation.engine import COMBINATION
+    from reservations import action_key, free_seats
+
+    plan = None
+    actions = []
+    for action in zone_actions:
+        current_bus, nearby_bus = action['current_bus_details'], action['nearby_bus_details']
+        if str(current_bus.id) in pending_bus_ids:
+            continue
+        if action['action'] == COMBINATION and allocator.seat_ledger.reserved_seats(current_bus.id):
+            continue
+        key = action_key(current_bus.id, nearby_bus.id, action['action'])
+        free = free_seats(action['action'], current_bus, nearby_bus)
+        if str(nearby_bus.id) not in pending_bus_ids and allocator.seat_ledger.try_reserve(key, nearby_bus.id, action['reserved_seats'], free):
+            actions.append(action)
+            pending_bus_ids.add(str(current_bus.id))
+            continue
+        print(f"Bus {nearby_bus.id} was taken by another zone.")
+        if plan is None:
+            plan = allocator.evaluate(buses)
+        allocator.suggest(current_bus, candidates_for(current_bus), actions, pending_bus_ids, plan)
+    return actions
+
+def sweep_zones(buses, mode='campus', workers=ZONE_WORKERS, allocator=None, pending_bus_ids=None, **partition_options):
+    """
+    This function partitions the fleet, sweeps all zones in parallel and takes
+    the seat holds of the suggested actions on the allocator's ledger (the shared
+    engine by default). Buses in pending_bus_ids (str IDs) already have an action
+    and are skipped. Actions come back in a stable zone order.
+    """
+    zones, borders = partition_buses(buses, mode, **partition_options)
+
+    tasks = []
+    for zone in sorted(zones, key=str):
+        zone_borders = {bus.id: borders[bus.id] for bus in zones[zone] if bus.id in borders}
+        wanted = {name for names in zone_borders.values() for name in names}
+        neighbour_buses = {name: zones[name] for name in wanted if name in zones}
+        tasks.append((zones[zone], neighbour_buses, zone_borders))
+
+    if len(tasks) <= 1:
+        results = [sweep_zone(*task) for task in tasks]
+    else:
+        from rate_limit import share_between_processes
+        process_count = min(workers or os.cpu_count() or 1, len(tasks))
+        with ProcessPoolExecutor(max_workers=process_count, initializer=share_between_processes, initargs=(process_count,)) as executor:
+            results = list(executor.map(sweep_zone, *zip(*tasks)))
+
+    home = {bus.id: zone for zone, zone_buses in zones.items() for bus in zone_buses}
+
+    def candidates_for(bus):
+        names = borders.get(bus.id, [])
+        return zones[home[bus.id]] + [other for name in names for other in zones.get(name, [])]
+
+    if allocator is None:
+        from allocation import get_allocator
+        allocator = get_allocator()
+    zone_actions = [action for zone_actions in results for action in zone_actions]
+    return reconcile_holds(zone_actions, buses, candidates_for, allocator, set() if pending_bus_ids is None else pending_bus_ids)
+
+if __name__ == '__main__':
+    import argparse
+    from app import load_bus_data
+
+    parser = argparse.ArgumentParser(description='Show how the fleet is split into sweep zones.')
+    parser.add_argument('--mode', choices=['campus', 'grid'], default='campus')
+    args = parser.parse_args()
+
+    zones, borders = partition_buses(load_bus_data(), args.mode)
+    for zone in sorted(zones, key=str):
+        border_count = sum(1 for bus in zones[zone] if bus.id in borders)
+        print(f"Zone {zone}: {len(zones[zone])} buses, {border_count} near a border")